@@ -1,10 +1,28 @@
 import os
 import gradio as gr
-from garbage_classification.waste_classification_webcam import create_ui
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from garbage_classification.metrics import REGISTRY
+from garbage_classification.waste_classification_webcam import create_ui, model
 
-# Create and launch the interface
-app = create_ui()
+# Create the interface
+demo = create_ui()
+
+# Serve Prometheus metrics next to the Gradio app
+server = FastAPI()
+
+@server.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@server.get("/healthz")
+def healthz():
+    # 503 until the model has loaded and warmed up, so load balancers hold traffic back
+    return JSONResponse({"status": model.status}, status_code=200 if model.ready else 503)
+
+app = gr.mount_gradio_app(server, demo, path="/")
 
 # Launch the app (HF Spaces will expose port 7860)
 if __name__ == "__main__":
-    app.launch(server_name="0.0.0.0", server_port=7860)
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "7860")))
@@ -2,46 +2,153 @@ import streamlit as st
 from ultralytics import YOLO
 from PIL import Image
 import numpy as np
+import io
+import os
+import threading
+import time
+from garbage_classification.categories import ClassTable, get_category_info
+from garbage_classification.detections import CONF_THRESHOLD, extract_detections, load_class_thresholds, predict_conf
+from garbage_classification.model import model_identity, resolve_backend_path
+from garbage_classification.prediction_cache import PredictionCache, content_hash
+from garbage_classification.rendering import OverlayRenderer
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.tiling import TiledDetector
 
-# Load the YOLOv8 model
-model = YOLO('yolov8n.pt')  # Replace with your trained model path if applicable
+@st.cache_resource
+def get_model_path():
+    """Trained weights (same settings as the live demo), resolved once per server process."""
+    path = resolve_model_path(os.getenv("MODEL_PATH", REGISTRY_SPEC))
+    return resolve_backend_path(path, os.getenv("MODEL_BACKEND", "pytorch"), os.getenv("MODEL_INT8", "0") == "1")
 
-st.title('Garbage Classification with YOLOv8')
-st.write('Upload an image to detect and classify garbage items.')
+IMGSZ = int(os.getenv("IMGSZ", "640"))
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))  # Uploaded images per forward pass
 
-# File uploader
-uploaded_file = st.file_uploader('Choose an image...', type=['jpg', 'jpeg', 'png'])
+# Optional per-class confidence table from tune-thresholds; its hash is part of the cache key
+CLASS_THRESHOLDS = os.getenv("CLASS_THRESHOLDS")
+CLASS_THRESHOLDS_ID = model_identity(CLASS_THRESHOLDS) if CLASS_THRESHOLDS else None
 
+# Large JPEGs are downscaled while decoding; keep at least this many pixels on the long side
+DECODE_MAX_SIDE = int(os.getenv("DECODE_MAX_SIDE", str(2 * IMGSZ)))
 
-if uploaded_file is not None:
-    image = Image.open(uploaded_file)
-    image = image.convert('RGB')  # Ensure image is in RGB format
-    image_np = np.array(image)
+# Tiled inference keeps small items in high-resolution uploads (tile size in pixels, 0 starts with it off)
+TILE_SIZE = int(os.getenv("TILE_SIZE", "0"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
 
-    st.image(image, caption='Uploaded Image', use_column_width=True)
+@st.cache_resource
+def load_model(path):
+    """Load the weights once per server process instead of on every rerun."""
+    model = YOLO(path, task="detect")
+    conf = load_class_thresholds(CLASS_THRESHOLDS, model.names, CONF_THRESHOLD)
+    return model, ClassTable(model.names, get_category_info), model_identity(path), conf
 
-    # Perform detection
-    results = model.predict(image_np)
-    print(results)
+@st.cache_resource
+def get_model_lock(path):
+    """Sessions run on their own threads but share one model, and the ultralytics predictor isn't thread-safe."""
+    return threading.Lock()
 
-    # Display results
-    st.write('Detected Objects:')
-    if results:
-        boxes = results[0].boxes
-        res_plotted = results[0].plot()[:, :, ::-1]
-        st.image(res_plotted, caption='Detected Image',
-                    use_column_width=True)
-        try:
-            with st.expander("Detection Results"):
-                for box in boxes:
-                    st.write(box.data)
-        except Exception as ex:
-            # st.write(ex)
-            st.write("No image is uploaded yet!")
+@st.cache_resource
+def get_prediction_cache():
+    """One cache per server process, shared across reruns and sessions."""
+    return PredictionCache(
+        max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "256")),
+        max_age=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),  # Seconds
+        disk_dir=os.getenv("PREDICTION_CACHE_DIR") or None,
+        max_disk_bytes=int(float(os.getenv("PREDICTION_CACHE_DISK_MB", "512")) * 2**20),
+    )
+
+@st.cache_resource
+def get_tiler(_model, tile_size, overlap):
+    return TiledDetector(_model, tile_size, overlap, IMGSZ, BATCH_SIZE)
+
+@st.cache_resource
+def get_renderer():
+    return OverlayRenderer()
+
+def decode_image(data, max_side=DECODE_MAX_SIDE):
+    """Decode upload bytes to an RGB array, letting libjpeg downscale big JPEGs during decoding."""
+    image = Image.open(io.BytesIO(data))
+    if max_side and image.format == "JPEG":
+        # Picks the smallest 1/2, 1/4 or 1/8 scale that stays at least max_side on both axes
+        image.draft("RGB", (max_side, max_side))
+    return np.array(image.convert("RGB"))
+
+def detect_batch(model, images, conf=CONF_THRESHOLD):
+    """Run images through the detector in batches of BATCH_SIZE."""
+    detections = []
+    for start in range(0, len(images), BATCH_SIZE):
+        results = model.predict(images[start:start + BATCH_SIZE], imgsz=IMGSZ, conf=predict_conf(conf),
+                                verbose=False)
+        detections.extend(extract_detections(result, conf) for result in results)
+    return detections
+
+def annotate(image, detections, class_table):
+    frame = image.copy()
+    renderer = get_renderer()
+    for box, conf, class_id in zip(detections.xyxy, detections.conf, detections.class_id):
+        renderer.draw(frame, box, class_table.categories[class_id], class_table.colors[class_id],
+                      class_table.labels[class_id], float(conf))
+    return frame
 
+model, class_table, model_id, conf_threshold = load_model(get_model_path())
+model_lock = get_model_lock(get_model_path())
+cache = get_prediction_cache()
 
+st.title('Garbage Classification with YOLOv8')
+st.write('Upload one or more images to detect and classify garbage items.')
+
+# Tiling runs each image as overlapping full-resolution tiles: more small items found, one forward pass per tile
+tiled = st.sidebar.checkbox('Tiled inference for high-resolution images', value=TILE_SIZE > 0)
+tile_size = int(st.sidebar.number_input('Tile size (pixels)', min_value=320, max_value=2560, value=TILE_SIZE or IMGSZ,
+                                        step=160)) if tiled else 0
+max_side = 0 if tiled else DECODE_MAX_SIDE  # Tiles need the full-resolution image
+
+# File uploader
+uploaded_files = st.file_uploader('Choose images...', type=['jpg', 'jpeg', 'png'], accept_multiple_files=True)
+
+if uploaded_files:
+    # Decode everything first, then send only the uncached images through the model together
+    images, keys = [], []
+    for uploaded_file in uploaded_files:
+        data = uploaded_file.getvalue()
+        images.append(decode_image(data, max_side))
+        keys.append(cache.key(content_hash(data), model_id, conf=CONF_THRESHOLD, thresholds=CLASS_THRESHOLDS_ID,
+                              imgsz=IMGSZ, max_side=max_side, tile=tile_size, tile_overlap=TILE_OVERLAP))
 
-        # annotated_frame = results[0].plot()  # Annotate the image with detections
-        # st.image(annotated_frame, caption='Detected Objects', use_column_width=True)
-    else:
-        st.write('No objects detected.')
\ No newline at end of file
+    detections = [cache.get(key) for key in keys]
+    missing = [i for i, d in enumerate(detections) if d is None]
+    if missing:
+        with st.spinner(f'Classifying {len(missing)} image(s)...'):
+            batch = [images[i] for i in missing]
+            # One session at a time on the shared model; the timing includes waiting for other sessions
+            start = time.perf_counter()
+            with model_lock:
+                if tiled:
+                    tiler = get_tiler(model, tile_size, TILE_OVERLAP)
+                    inputs = sum(tiler.count_tiles(image) for image in batch)
+                    results = tiler(batch, conf_threshold)
+                else:
+                    inputs, results = len(batch), detect_batch(model, batch, conf_threshold)
+            elapsed = time.perf_counter() - start
+            for i, result in zip(missing, results):
+                cache.put(keys[i], result)
+                detections[i] = result
+        st.sidebar.caption(f"{inputs / len(missing):.1f} forward-pass inputs and "
+                           f"{1000 * elapsed / len(missing):.0f} ms per image")
+
+    stats = cache.stats()
+    st.sidebar.caption(f"Prediction cache: {stats['hits'] + stats['disk_hits']} hits, "
+                       f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+    # Display results
+    for uploaded_file, image, result in zip(uploaded_files, images, detections):
+        st.subheader(uploaded_file.name)
+        counts = result.category_counts(class_table)
+        st.write(', '.join(f"{category}: {count}" for category, count in counts.items()))
+        if len(result):
+            st.image(annotate(image, result, class_table), caption='Detected Image',
+                     use_column_width=True)
+            with st.expander("Detection Results"):
+                st.table(result.to_records(class_table))
+        else:
+            st.image(image, caption='Uploaded Image', use_column_width=True)
+            st.write('No objects detected.')
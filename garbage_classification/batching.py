@@ -0,0 +1,149 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Seconds a caller waits for its frame's batch before giving up (0 waits forever)
+PREDICT_TIMEOUT = float(os.getenv("PREDICT_TIMEOUT", "30"))
+
+
+class BatchScheduler:
+    """Collect frames from concurrent callers and run them through the model in batches.
+
+    Every stream event submits its frame and waits on a future. A single worker
+    thread drains the queue, waiting at most ``max_wait`` seconds after the first
+    frame arrives for up to ``max_batch_size`` frames, runs one batched forward
+    pass and hands each caller back its own ``Results`` object. With a
+    ``LatencyController`` each batch runs at the controller's current ``imgsz``
+    and every frame's latency (queue wait plus inference) is reported back to it.
+    A batch that fails anywhere fails all of its unanswered futures, and the
+    worker moves on to the next batch.
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait=0.02, report_every=30.0, controller=None,
+                 **predict_kwargs):
+        self.model = model
+        self.controller = controller
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.report_every = report_every
+        self.predict_kwargs = {"verbose": False, **predict_kwargs}
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_report = self._started
+        self._batches = 0
+        self._frames = 0
+        self._busy_time = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, frame):
+        """Queue a frame for inference and return a future for its result."""
+        future = Future()
+        self._queue.put((frame, future, time.perf_counter()))
+        return future
+
+    def predict(self, frame, timeout=PREDICT_TIMEOUT):
+        """Run a single frame through the batched model and block until it is done.
+
+        Raises ``TimeoutError`` after ``timeout`` seconds; the frame is then dropped unless its batch already started.
+        """
+        future = self.submit(frame)
+        try:
+            return future.result(timeout=timeout or None)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def queue_depth(self):
+        """Number of frames waiting to be picked up by the worker."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Return throughput and queue-wait statistics since start-up."""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            return {
+                "batches": self._batches,
+                "frames": self._frames,
+                "avg_batch_size": self._frames / self._batches if self._batches else 0.0,
+                "throughput_fps": self._frames / elapsed if elapsed > 0 else 0.0,
+                "inference_fps": self._frames / self._busy_time if self._busy_time > 0 else 0.0,
+                "avg_queue_wait_ms": 1000 * self._wait_total / self._frames if self._frames else 0.0,
+                "max_queue_wait_ms": 1000 * self._wait_max,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def _collect(self):
+        """Block for the first frame, then gather more until the batch is full or the deadline passes."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Skip frames whose callers already gave up
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"[batching] Batch of {len(batch)} frames failed: {e!r}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch):
+        frames = [frame for frame, _, _ in batch]
+        predict_kwargs = self.predict_kwargs
+        if self.controller is not None:
+            predict_kwargs = {**predict_kwargs, "imgsz": self.controller.imgsz}
+        start = time.perf_counter()
+        results = self.model(frames, **predict_kwargs)
+        end = time.perf_counter()
+        if len(results) != len(batch):
+            raise RuntimeError(f"Model returned {len(results)} results for a batch of {len(batch)} frames")
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+        self._record(batch, start, end)
+        if self.controller is not None:
+            for _, _, submitted in batch:
+                self.controller.observe(end - submitted)
+
+    def _record(self, batch, start, end):
+        waits = [start - submitted for _, _, submitted in batch]
+        with self._lock:
+            self._batches += 1
+            self._frames += len(batch)
+            self._busy_time += end - start
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            report = self.report_every and end - self._last_report >= self.report_every
+            if report:
+                self._last_report = end
+
+        if report:
+            s = self.stats()
+            print(
+                f"[batching] {s['frames']} frames in {s['batches']} batches "
+                f"(avg batch {s['avg_batch_size']:.1f}), {s['throughput_fps']:.1f} fps, "
+                f"queue wait avg {s['avg_queue_wait_ms']:.1f} ms / max {s['max_queue_wait_ms']:.1f} ms"
+            )
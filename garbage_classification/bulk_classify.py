@@ -0,0 +1,298 @@
+"""Classify large image archives offline.
+
+Images are streamed from directories or glob patterns and handed to a pool of
+worker processes in batches. Each worker loads the model once, decodes its
+batch and runs it through the detector, and maps the detections with the same
+category table as the live demo. Several batches per worker are kept in
+flight, so decoding of the next batch overlaps with inference.
+
+Results are appended to a JSONL file (or to Parquet part files in a directory)
+as batches finish. Re-running the same command skips images that are already
+in the output, so an interrupted run can be resumed.
+
+``--tile`` runs high-resolution images as overlapping tiles (see ``tiling``)
+so small items survive; it costs roughly one forward pass per tile.
+
+Example:
+    classify-images /data/bin-camera --output results.jsonl --workers 8 --batch 16
+    classify-images /data/overhead-4k --output results.jsonl --tile 640 --threads 4
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+
+from garbage_classification.categories import ClassTable, get_category_info
+from garbage_classification.detections import CONF_THRESHOLD, extract_detections, load_class_thresholds, predict_conf
+from garbage_classification.model import BACKENDS, resolve_backend_path
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.tiling import TiledDetector
+
+# A weights path, or "registry" for the best indexed run (see run_registry)
+DEFAULT_WEIGHTS = os.getenv("MODEL_PATH", REGISTRY_SPEC)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def iter_images(inputs):
+    """Yield image paths from directories (recursively) and glob patterns, in a stable order."""
+    for source in inputs:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            for path in sorted(glob.iglob(source, recursive=True)):
+                if path.lower().endswith(IMAGE_EXTENSIONS):
+                    yield path
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushing after every batch."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def done_paths(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue  # A line cut short by an interrupted run
+        return done
+
+    def open(self):
+        self._file = open(self.path, "a+b")
+        # Drop a record cut short by an interrupted run, so new records start on a line of their own
+        self._file.seek(0, os.SEEK_END)
+        end = self._file.tell()
+        while end > 0:
+            step = min(end, 1 << 16)
+            self._file.seek(end - step)
+            newline = self._file.read(step).rfind(b"\n")
+            if newline >= 0:
+                end -= step - newline - 1
+                break
+            end -= step
+        self._file.truncate(end)
+
+    def write(self, records):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records).encode())
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes Parquet part files inside a directory, one per ``rows_per_part`` records.
+
+    Records are buffered and a part is also written after ``flush_every``
+    seconds, so an interrupted run only redoes the images of its last minute
+    instead of leaving one tiny file per batch.
+    """
+
+    COLUMNS = ["path", "width", "height", "compost", "recyclable", "garbage", "detections", "error"]
+
+    def __init__(self, path, rows_per_part=10000, flush_every=60.0):
+        import pyarrow  # noqa: F401  (fail early if Parquet support is missing)
+
+        self.path = path
+        self.rows_per_part = max(1, int(rows_per_part))
+        self.flush_every = flush_every
+        self._part = 0
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+    def done_paths(self):
+        import pyarrow.parquet as pq
+
+        done = set()
+        if os.path.isdir(self.path):
+            for part in glob.glob(os.path.join(self.path, "part-*.parquet")):
+                done.update(pq.read_table(part, columns=["path"]).column("path").to_pylist())
+                self._part = max(self._part, int(os.path.basename(part)[5:-8]) + 1)
+        return done
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        self._last_flush = time.monotonic()
+
+    def write(self, records):
+        self._rows.extend({**r, "detections": json.dumps(r.get("detections", []))} for r in records)
+        if len(self._rows) >= self.rows_per_part or time.monotonic() - self._last_flush >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        table = pa.Table.from_pydict({c: [row.get(c) for row in self._rows] for c in self.COLUMNS})
+        # Write then rename, so a part that exists is always complete
+        path = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._part += 1
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+# Per-process state, set up once by ``_init_worker``
+_worker = {}
+
+
+def _init_worker(weights, imgsz, conf, threads, thresholds=None, tile=0, tile_overlap=0.2, batch_size=16):
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(threads)
+    model = YOLO(weights, task="detect")
+    _worker.update(model=model, table=ClassTable(model.names, get_category_info), imgsz=imgsz,
+                   conf=load_class_thresholds(thresholds, model.names, conf),
+                   tiler=TiledDetector(model, tile, tile_overlap, imgsz, batch_size, workers=threads) if tile else None)
+
+
+def _classify_batch(paths):
+    """Decode and classify one batch of images inside a worker process."""
+    records, images, decoded = [], [], []
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            records.append({"path": path, "error": "could not decode image"})
+            continue
+        images.append(image)
+        decoded.append(path)
+
+    if images:
+        table = _worker["table"]
+        if _worker["tiler"] is not None:
+            batch_detections = _worker["tiler"](images, _worker["conf"])
+        else:
+            results = _worker["model"](images, imgsz=_worker["imgsz"], conf=predict_conf(_worker["conf"]),
+                                       verbose=False)
+            batch_detections = [extract_detections(result, _worker["conf"]) for result in results]
+        for path, image, detections in zip(decoded, images, batch_detections):
+            records.append({
+                "path": path,
+                "width": image.shape[1],
+                "height": image.shape[0],
+                **detections.category_counts(table),
+                "detections": detections.to_records(table),
+            })
+    return records
+
+
+def classify(inputs, output, weights=DEFAULT_WEIGHTS, batch_size=16, workers=None, threads=1,
+             prefetch=2, imgsz=640, conf=CONF_THRESHOLD, thresholds=None, tile=0, tile_overlap=0.2):
+    """Classify every image under ``inputs`` and append the results to ``output``.
+
+    ``thresholds`` is an optional per-class table from ``tune-thresholds``; classes it
+    doesn't list use ``conf``. A positive ``tile`` runs each image as overlapping
+    tiles of that many pixels.
+    """
+    weights = resolve_model_path(weights)
+    writer = ParquetWriter(output) if output.endswith(".parquet") else JsonlWriter(output)
+    done = writer.done_paths()
+    if done:
+        print(f"Resuming: {len(done)} images already in {output}")
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    pending_paths = (p for p in iter_images(inputs) if p not in done)
+    max_in_flight = workers * prefetch
+
+    processed = 0
+    start = time.perf_counter()
+    last_report = start
+    writer.open()
+    # Spawn rather than fork: forked workers can deadlock inside torch's thread pools
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(weights, imgsz, conf, threads, thresholds, tile, tile_overlap,
+                                           batch_size)) as pool:
+            in_flight = set()
+            batches = batched(pending_paths, batch_size)
+            while True:
+                # Keep the pool fed so decoding overlaps with inference
+                for batch in batches:
+                    in_flight.add(pool.submit(_classify_batch, batch))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    records = future.result()
+                    writer.write(records)
+                    processed += len(records)
+
+                now = time.perf_counter()
+                if now - last_report >= 10:
+                    last_report = now
+                    print(f"{processed} images, {processed / (now - start):.1f} images/s")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Classified {processed} images in {elapsed:.1f}s ({rate:.1f} images/s) -> {output}")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Image directories or glob patterns (quote globs)")
+    parser.add_argument("--output", "-o", default="classifications.jsonl",
+                        help="Output .jsonl file, or a directory ending in .parquet for Parquet parts")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--backend", choices=BACKENDS, default=os.getenv("MODEL_BACKEND", "pytorch"))
+    parser.add_argument("--int8", action="store_true", default=os.getenv("MODEL_INT8", "0") == "1")
+    parser.add_argument("--batch", type=int, default=16, help="Images per forward pass")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads per worker")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches queued ahead per worker")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--thresholds", default=os.getenv("CLASS_THRESHOLDS"),
+                        help="Per-class confidence table from tune-thresholds")
+    parser.add_argument("--tile", type=int, default=int(os.getenv("TILE_SIZE", "0")),
+                        help="Run images as overlapping tiles of this many pixels (0 disables)")
+    parser.add_argument("--tile-overlap", type=float, default=float(os.getenv("TILE_OVERLAP", "0.2")),
+                        help="Fraction of a tile shared with its neighbour")
+    args = parser.parse_args()
+
+    weights = resolve_backend_path(resolve_model_path(args.weights), args.backend, args.int8)
+    classify(args.inputs, args.output, weights, args.batch, args.workers, args.threads,
+             args.prefetch, args.imgsz, args.conf, args.thresholds, args.tile, args.tile_overlap)
+
+
+if __name__ == "__main__":
+    main()
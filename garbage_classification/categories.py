@@ -0,0 +1,126 @@
+import numpy as np
+
+# Define waste categories with clear organization
+WASTE_CATEGORIES = {
+    "compost": {
+        "color": (0, 180, 0),  # Bright Green
+        "items": ["Organic", "Wood", "Paper", "Paper bag", "Paper cups", "Cellulose"],
+        "description": "Biodegradable items that break down naturally"
+    },
+    "recyclable": {
+        "color": (0, 0, 255),  # Blue
+        "items": [
+            "Cardboard", "Glass bottle", "Aluminum can", "Plastic bottle", "Plastic bag",
+            "Plastic cup", "Plastic caps", "Scrap metal", "Paper", "Tetra pack", 
+            "Aluminum caps", "Milk bottle"
+        ],
+        "description": "Items that can be processed and reused"
+    },
+    "garbage": {
+        "color": (255, 0, 0),  # Red
+        "items": [
+            "Aerosols", "Ceramic", "Combined plastic", "Container for household chemicals",
+            "Disposable tableware", "Electronics", "Foil", "Furniture", "Iron utensils",
+            "Liquid", "Metal shavings", "Paper shavings", "Papier mache", "Plastic can",
+            "Plastic canister", "Plastic shaker", "Plastic shavings", "Plastic toys",
+            "Postal packaging", "Printing industry", "Stretch film", "Textile", "Tin",
+            "Unknown plastic", "Zip plastic bag"
+        ],
+        "description": "Items that cannot be composted or recycled in standard facilities"
+    }
+}
+
+# Detailed reasoning for each category
+CATEGORY_REASONING = {
+    "compost": "This item is biodegradable and can be broken down naturally into compost.",
+    "recyclable": "This item can be processed and reused to make new products.",
+    "garbage": "This item cannot be composted or recycled in standard facilities."
+}
+
+# Item-specific reasoning with more comprehensive explanations
+ITEM_REASONING = {
+    # Compost items
+    "Organic": "Natural food waste and plant material breaks down easily in compost.",
+    "Wood": "Untreated wood is biodegradable and suitable for composting.",
+    "Paper": "Clean paper products are biodegradable and can be composted.",
+    "Paper bag": "Paper bags are biodegradable and compostable when not contaminated.",
+    "Paper cups": "Paper cups without plastic lining can be composted.",
+    "Cellulose": "Natural cellulose materials break down in compost environments.",
+    
+    # Recyclable items
+    "Cardboard": "Cardboard is made from paper fibers that can be recycled into new paper products.",
+    "Glass bottle": "Glass can be melted down and reformed multiple times without quality degradation.",
+    "Aluminum can": "Aluminum is infinitely recyclable and uses less energy than producing new aluminum.",
+    "Plastic bottle": "Many plastic bottles (PET/HDPE) can be recycled into new plastic products.",
+    "Plastic bag": "Clean plastic bags can be recycled at specialized facilities.",
+    "Plastic cup": "Some plastic cups marked with recycle symbols can be processed at recycling centers.",
+    "Plastic caps": "Hard plastic caps are often recyclable as #2, #4, or #5 plastics.",
+    "Scrap metal": "Metal can be melted down and reused without losing quality.",
+    "Tetra pack": "Multi-layer packaging that can be recycled through specialized processes.",
+    "Aluminum caps": "Metal caps are recyclable similar to aluminum cans.",
+    "Milk bottle": "Plastic milk bottles are typically HDPE (#2) which is widely recyclable.",
+    
+    # Garbage items
+    "Aerosols": "Pressurized containers can be hazardous if not properly handled.",
+    "Ceramic": "Ceramic doesn't break down and can contaminate recycling streams.",
+    "Combined plastic": "Mixed plastic types are difficult to separate for recycling.",
+    "Container for household chemicals": "May contain residual chemicals that contaminate recycling.",
+    "Electronics": "Contains multiple materials and may require special e-waste processing.",
+    "Foil": "Often contaminated with food waste making it unsuitable for standard recycling."
+    # Additional items can be added as needed
+}
+
+def get_category_info(label):
+    """Determine the category and reasoning for a detected item."""
+    # Find which category contains this item
+    for category, data in WASTE_CATEGORIES.items():
+        if label in data["items"]:
+            general_reason = CATEGORY_REASONING[category]
+            specific_reason = ITEM_REASONING.get(label, "")
+            
+            # Combine reasons if we have both
+            if specific_reason:
+                reason = f"{specific_reason} {general_reason}"
+            else:
+                reason = general_reason
+                
+            return {
+                "category": category,
+                "color": data["color"],
+                "reason": reason
+            }
+    
+    # Default to garbage if not found in categories
+    return {
+        "category": "garbage",
+        "color": WASTE_CATEGORIES["garbage"]["color"],
+        "reason": "Unclassified items should be disposed of as garbage."
+    }
+
+
+class ClassTable:
+    """Category, colour and reasoning for every class id, built once from ``model.names``.
+
+    ``lookup`` maps a label to the ``get_category_info`` style dict, so the
+    linear scan over the category lists happens once per class at model load
+    instead of once per box per frame.
+    """
+
+    def __init__(self, names, lookup=get_category_info):
+        size = max(names) + 1 if names else 0
+        self.labels = [names.get(i, str(i)) for i in range(size)]
+
+        info = [lookup(label) for label in self.labels]
+        self.categories = [item["category"] for item in info]
+        self.colors = [tuple(item["color"]) for item in info]
+        self.reasons = [item["reason"] for item in info]
+
+        # Integer category per class for vectorised counting
+        self.category_names = list(WASTE_CATEGORIES)
+        self.category_ids = np.array(
+            [self.category_names.index(c) if c in self.category_names else -1 for c in self.categories],
+            dtype=np.int64,
+        )
+
+    def __len__(self):
+        return len(self.labels)
@@ -0,0 +1,223 @@
+"""Check a YOLO dataset for missing, orphaned and malformed labels and undecodable images.
+
+Each split's ``images`` and ``labels`` folders are listed once and matched as
+sets of file stems, so finding missing or orphaned labels costs one directory
+pass instead of one stat per image. Label files are validated (class id below
+``nc``, normalized in-bounds boxes, no duplicate rows) and images are test-decoded
+in a thread pool. Results are kept in ``.scan_index.json`` inside the dataset,
+keyed by file size and modification time, so re-scans only look at changed files.
+
+Example:
+    scan-dataset YOLO-Waste-Detection-1
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from garbage_classification.utils import load_dataset_config
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+INDEX_NAME = ".scan_index.json"
+INDEX_VERSION = 1
+
+# Slack for boxes that touch the image border after rounding in the export
+BOUNDS_TOLERANCE = 1e-3
+
+
+def check_label(path, nc=None):
+    """List the problems in one YOLO label file (empty list if it is valid)."""
+    try:
+        with open(path, "r") as f:
+            lines = [line.split() for line in f if line.strip()]
+    except (OSError, UnicodeDecodeError) as e:
+        return [f"unreadable: {e}"]
+    if not lines:
+        return []  # Background image
+    if any(len(parts) != 5 for parts in lines):
+        return ["rows must have 5 columns (class x y w h)"]
+    try:
+        rows = np.array(lines, dtype=np.float64)
+    except ValueError:
+        return ["non-numeric values"]
+
+    issues = []
+    classes = rows[:, 0]
+    if np.any(classes != np.round(classes)) or np.any(classes < 0):
+        issues.append("class ids must be non-negative integers")
+    elif nc is not None and np.any(classes >= nc):
+        issues.append(f"class id {int(classes.max())} >= nc ({nc})")
+
+    x, y, w, h = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    low, high = -BOUNDS_TOLERANCE, 1 + BOUNDS_TOLERANCE
+    if np.any((w <= 0) | (h <= 0)):
+        issues.append("zero or negative box size")
+    if np.any((x - w / 2 < low) | (x + w / 2 > high) | (y - h / 2 < low) | (y + h / 2 > high)):
+        issues.append("box outside normalized [0, 1] bounds")
+
+    if len(np.unique(rows.round(6), axis=0)) != len(rows):
+        issues.append("duplicate boxes")
+    return issues
+
+
+def check_image(path):
+    """List the problems in one image file (empty list if it decodes)."""
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None or image.size == 0:
+        return ["does not decode"]
+    return []
+
+
+def _check(task):
+    kind, path, nc = task
+    return check_label(path, nc) if kind == "label" else check_image(path)
+
+
+def list_dir(path, extensions):
+    """``{stem: (file name, size, mtime_ns)}`` for one folder, from a single ``scandir`` pass."""
+    files = {}
+    if not os.path.isdir(path):
+        return files
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(extensions):
+                stat = entry.stat()
+                files[os.path.splitext(entry.name)[0]] = (entry.name, stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def find_splits(dataset_dir):
+    """Subfolders with an ``images`` or ``labels`` folder (train/valid/test, or train/val/test)."""
+    return sorted(
+        name for name in os.listdir(dataset_dir)
+        if any(os.path.isdir(os.path.join(dataset_dir, name, sub)) for sub in ("images", "labels"))
+    )
+
+
+def load_index(path, nc, check_images):
+    try:
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Results from a scan with different settings can't be reused
+    if index.get("version") != INDEX_VERSION or index.get("nc") != nc or index.get("check_images") != check_images:
+        return {}
+    return index.get("files", {})
+
+
+def scan_dataset(dataset_dir, nc=None, check_images=True, workers=None, index_path=None, reuse_index=True):
+    """Scan every split of ``dataset_dir`` and return a report dict (also cached in the index file)."""
+    start = time.perf_counter()
+    if nc is None and os.path.exists(os.path.join(dataset_dir, "data.yaml")):
+        nc = load_dataset_config(dataset_dir).get("nc")
+    index_path = index_path or os.path.join(dataset_dir, INDEX_NAME)
+    previous = load_index(index_path, nc, check_images) if reuse_index else {}
+
+    report = {"dataset": dataset_dir, "nc": nc, "splits": {}}
+    files = {}   # relative path -> [size, mtime_ns, issues]
+    tasks = []   # files that are new or changed since the last scan
+    for split in find_splits(dataset_dir):
+        image_dir = os.path.join(dataset_dir, split, "images")
+        label_dir = os.path.join(dataset_dir, split, "labels")
+        images = list_dir(image_dir, IMAGE_EXTENSIONS)
+        labels = list_dir(label_dir, (".txt",))
+
+        image_stems, label_stems = set(images), set(labels)
+        report["splits"][split] = {
+            "images": len(images),
+            "labels": len(labels),
+            "missing_labels": sorted(image_stems - label_stems),
+            "orphan_labels": sorted(label_stems - image_stems),
+        }
+
+        candidates = [("label", label_dir, entry) for entry in labels.values()]
+        if check_images:
+            candidates += [("image", image_dir, entry) for entry in images.values()]
+        for kind, folder, (name, size, mtime) in candidates:
+            rel = os.path.join(split, os.path.basename(folder), name)
+            cached = previous.get(rel)
+            if cached is not None and cached[0] == size and cached[1] == mtime:
+                files[rel] = cached
+            else:
+                files[rel] = [size, mtime, None]
+                tasks.append((rel, (kind, os.path.join(folder, name), nc)))
+
+    if tasks:
+        # Threads rather than processes: file reads and image decoding release the GIL, and the
+        # scan can be called from training scripts that have no ``__main__`` guard (spawn on macOS)
+        with ThreadPoolExecutor(workers) as pool:
+            results = pool.map(_check, [task for _, task in tasks])
+            for (rel, _), issues in zip(tasks, results):
+                files[rel][2] = issues
+
+    problems = {rel: entry[2] for rel, entry in sorted(files.items()) if entry[2]}
+    report.update(
+        files=len(files),
+        rechecked=len(tasks),
+        problems=problems,
+        seconds=time.perf_counter() - start,
+    )
+
+    with open(index_path, "w") as f:
+        json.dump({"version": INDEX_VERSION, "nc": nc, "check_images": check_images, "files": files}, f)
+    return report
+
+
+def is_clean(report):
+    """True when no split has missing or orphaned labels and no file has problems."""
+    return not report["problems"] and not any(
+        split["missing_labels"] or split["orphan_labels"] for split in report["splits"].values()
+    )
+
+
+def print_report(report, limit=10):
+    for split, info in report["splits"].items():
+        print(f"\nChecking {split} set:")
+        print(f" - Found {info['images']} images")
+        print(f" - Found {info['labels']} labels")
+        if info["missing_labels"]:
+            print(f"❌ Missing labels for {len(info['missing_labels'])} images!")
+            print(info["missing_labels"][:limit])
+        if info["orphan_labels"]:
+            print(f"❌ {len(info['orphan_labels'])} labels have no image!")
+            print(info["orphan_labels"][:limit])
+        if not info["missing_labels"] and not info["orphan_labels"]:
+            print("✅ All images have corresponding labels.")
+
+    problems = report["problems"]
+    if problems:
+        print(f"\n❌ {len(problems)} files with problems:")
+        for rel, issues in list(problems.items())[:limit]:
+            print(f" - {rel}: {'; '.join(issues)}")
+    else:
+        print("\n✅ All label files and images are valid.")
+    print(f"Scanned {report['files']} files ({report['rechecked']} checked, "
+          f"the rest unchanged since the last scan) in {report['seconds']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", nargs="?", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--nc", type=int, default=None, help="Number of classes (default: from data.yaml)")
+    parser.add_argument("--skip-images", action="store_true", help="Don't test-decode images")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--full", action="store_true", help="Ignore the index and check every file again")
+    parser.add_argument("--json", default=None, help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    report = scan_dataset(args.dataset, args.nc, not args.skip_images, args.workers, reuse_index=not args.full)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    raise SystemExit(0 if is_clean(report) else 1)
+
+
+if __name__ == "__main__":
+    main()
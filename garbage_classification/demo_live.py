@@ -1,10 +1,18 @@
 import gradio as gr
 import cv2
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-from ultralytics import YOLO
+import functools
+from garbage_classification.batching import BatchScheduler
+from garbage_classification.categories import WASTE_CATEGORIES, ClassTable, get_category_info
+from garbage_classification.detections import CONF_THRESHOLD, extract_detections, load_class_thresholds, lowest_threshold
+from garbage_classification.latency_controller import LatencyController
+from garbage_classification.metrics import REGISTRY
+from garbage_classification.model import LazyModel, resolve_backend_path
+from garbage_classification.motion import MotionGate
+from garbage_classification.rendering import OverlayRenderer
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.results_panel import ResultsPanel
+from garbage_classification.session import StreamSession
 import os
-import time
 
 # Create necessary directories
 os.makedirs("styles", exist_ok=True)
@@ -12,294 +20,201 @@ os.makedirs("assets", exist_ok=True)
 
 # Load trained YOLO model
 # model_dir = "runs/detect/train24/weights/best.pt"  # Change this to your model path
-model_dir = os.getenv("MODEL_PATH", "runs/detect/train24/weights/best.pt")
-model = YOLO(model_dir)
-
-# Define waste categories with clear organization
-WASTE_CATEGORIES = {
-    "compost": {
-        "color": (0, 180, 0),  # Bright Green
-        "items": ["Organic", "Wood", "Paper", "Paper bag", "Paper cups", "Cellulose"],
-        "description": "Biodegradable items that break down naturally"
-    },
-    "recyclable": {
-        "color": (0, 0, 255),  # Blue
-        "items": [
-            "Cardboard", "Glass bottle", "Aluminum can", "Plastic bottle", "Plastic bag",
-            "Plastic cup", "Plastic caps", "Scrap metal", "Paper", "Tetra pack", 
-            "Aluminum caps", "Milk bottle"
-        ],
-        "description": "Items that can be processed and reused"
-    },
-    "garbage": {
-        "color": (255, 0, 0),  # Red
-        "items": [
-            "Aerosols", "Ceramic", "Combined plastic", "Container for household chemicals",
-            "Disposable tableware", "Electronics", "Foil", "Furniture", "Iron utensils",
-            "Liquid", "Metal shavings", "Paper shavings", "Papier mache", "Plastic can",
-            "Plastic canister", "Plastic shaker", "Plastic shavings", "Plastic toys",
-            "Postal packaging", "Printing industry", "Stretch film", "Textile", "Tin",
-            "Unknown plastic", "Zip plastic bag"
-        ],
-        "description": "Items that cannot be composted or recycled in standard facilities"
-    }
-}
-
-# Detailed reasoning for each category
-CATEGORY_REASONING = {
-    "compost": "This item is biodegradable and can be broken down naturally into compost.",
-    "recyclable": "This item can be processed and reused to make new products.",
-    "garbage": "This item cannot be composted or recycled in standard facilities."
-}
-
-# Item-specific reasoning with more comprehensive explanations
-ITEM_REASONING = {
-    # Compost items
-    "Organic": "Natural food waste and plant material breaks down easily in compost.",
-    "Wood": "Untreated wood is biodegradable and suitable for composting.",
-    "Paper": "Clean paper products are biodegradable and can be composted.",
-    "Paper bag": "Paper bags are biodegradable and compostable when not contaminated.",
-    "Paper cups": "Paper cups without plastic lining can be composted.",
-    "Cellulose": "Natural cellulose materials break down in compost environments.",
-    
-    # Recyclable items
-    "Cardboard": "Cardboard is made from paper fibers that can be recycled into new paper products.",
-    "Glass bottle": "Glass can be melted down and reformed multiple times without quality degradation.",
-    "Aluminum can": "Aluminum is infinitely recyclable and uses less energy than producing new aluminum.",
-    "Plastic bottle": "Many plastic bottles (PET/HDPE) can be recycled into new plastic products.",
-    "Plastic bag": "Clean plastic bags can be recycled at specialized facilities.",
-    "Plastic cup": "Some plastic cups marked with recycle symbols can be processed at recycling centers.",
-    "Plastic caps": "Hard plastic caps are often recyclable as #2, #4, or #5 plastics.",
-    "Scrap metal": "Metal can be melted down and reused without losing quality.",
-    "Tetra pack": "Multi-layer packaging that can be recycled through specialized processes.",
-    "Aluminum caps": "Metal caps are recyclable similar to aluminum cans.",
-    "Milk bottle": "Plastic milk bottles are typically HDPE (#2) which is widely recyclable.",
-    
-    # Garbage items
-    "Aerosols": "Pressurized containers can be hazardous if not properly handled.",
-    "Ceramic": "Ceramic doesn't break down and can contaminate recycling streams.",
-    "Combined plastic": "Mixed plastic types are difficult to separate for recycling.",
-    "Container for household chemicals": "May contain residual chemicals that contaminate recycling.",
-    "Electronics": "Contains multiple materials and may require special e-waste processing.",
-    "Foil": "Often contaminated with food waste making it unsuitable for standard recycling."
-    # Additional items can be added as needed
-}
-
-# Detection persistence settings
-last_valid_results = []
-last_update_time = time.time()
-result_persistence_time = 2.0  # Keep results visible for at least 2 seconds
-
-def get_category_info(label):
-    """Determine the category and reasoning for a detected item."""
-    # Find which category contains this item
-    for category, data in WASTE_CATEGORIES.items():
-        if label in data["items"]:
-            general_reason = CATEGORY_REASONING[category]
-            specific_reason = ITEM_REASONING.get(label, "")
-            
-            # Combine reasons if we have both
-            if specific_reason:
-                reason = f"{specific_reason} {general_reason}"
-            else:
-                reason = general_reason
-                
-            return {
-                "category": category,
-                "color": data["color"],
-                "reason": reason
-            }
-    
-    # Default to garbage if not found in categories
-    return {
-        "category": "garbage",
-        "color": WASTE_CATEGORIES["garbage"]["color"],
-        "reason": "Unclassified items should be disposed of as garbage."
-    }
-
-def format_results_html(results):
-    """Format detection results as styled HTML for display."""
-    if not results:
-        return """
-        <div class='no-detections'>
-            <div class='empty-state'>
-                <div class='empty-icon'>📷</div>
-                <div class='empty-message'>Point your camera at waste items to classify them</div>
-            </div>
-        </div>
-        """
-    
-    html = "<div class='results-container'>"
-    
-    # Add summary count by category
-    categories = {}
-    for item in results:
-        cat = item["category"]
-        categories[cat] = categories.get(cat, 0) + 1
-    
-    html += "<div class='summary-section'>"
-    html += "<h3>Summary</h3>"
-    html += "<div class='category-counts'>"
-    
-    # Create summary bars for each category
-    for category in ["compost", "recyclable", "garbage"]:
-        count = categories.get(category, 0)
-        total = len(results)
-        percentage = (count / total * 100) if total > 0 else 0
-        
-        html += f"""
-        <div class='category-summary'>
-            <div class='category-label category-{category}'>
-                <span class='category-icon'></span>
-                <span class='category-name'>{category.upper()}</span>
-            </div>
-            <div class='category-bar-container'>
-                <div class='category-bar category-{category}-bg' style='width: {percentage}%;'></div>
-                <span class='category-count'>{count}</span>
-            </div>
+# "registry" (the default) serves the best indexed run in runs/detect; a path pins those weights
+model_dir = resolve_model_path(os.getenv("MODEL_PATH", REGISTRY_SPEC))
+
+# Optionally serve an exported ONNX Runtime / OpenVINO (INT8) version of the same weights
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "pytorch")  # pytorch, onnx or openvino
+MODEL_INT8 = os.getenv("MODEL_INT8", "0") == "1"
+model_dir = resolve_backend_path(model_dir, MODEL_BACKEND, MODEL_INT8)
+
+IMGSZ = int(os.getenv("IMGSZ", "640"))  # Inference image size (train24 was trained at 640)
+
+# Per-frame latency budget: above it the batches step down from IMGSZ to 320 and the detector runs on
+# fewer frames, below it they step back up (0 keeps IMGSZ and every DETECT_EVERY-th frame)
+LATENCY_TARGET_MS = float(os.getenv("LATENCY_TARGET_MS", "0"))
+controller = LatencyController(LATENCY_TARGET_MS, sizes=(320, IMGSZ)) if LATENCY_TARGET_MS > 0 else None
+
+# Weights load and warm up in the background (at every size the controller can pick) so the UI can start right away
+model = LazyModel(model_dir, imgsz=IMGSZ, warmup_sizes=controller.sizes if controller else ()).start()
+
+# Frames from all active streams are batched into a single forward pass
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))
+BATCH_MAX_WAIT = float(os.getenv("BATCH_MAX_WAIT", "0.02"))  # Seconds to wait for a batch to fill
+# Optional per-class confidence table from tune-thresholds (one global CONF_THRESHOLD otherwise); the model
+# keeps every box down to the table's lowest cutoff so extract_detections can apply it
+CLASS_THRESHOLDS = os.getenv("CLASS_THRESHOLDS")
+scheduler = BatchScheduler(model, max_batch_size=BATCH_SIZE, max_wait=BATCH_MAX_WAIT, controller=controller, imgsz=IMGSZ,
+                           conf=lowest_threshold(CLASS_THRESHOLDS, CONF_THRESHOLD))
+
+# Pipeline gauges exposed on the metrics endpoint
+REGISTRY.register_gauge("model_ready", lambda: model.ready, "1 once the model is loaded and warmed up.")
+REGISTRY.register_gauge("queue_depth", scheduler.queue_depth, "Frames waiting for the batch scheduler.")
+REGISTRY.register_gauge("batch_size_avg", lambda: scheduler.stats()["avg_batch_size"], "Average frames per batched forward pass.")
+REGISTRY.register_gauge("queue_wait_avg_ms", lambda: scheduler.stats()["avg_queue_wait_ms"], "Average time a frame waits for its batch.")
+REGISTRY.register_gauge("motion_skip_ratio", MotionGate.overall_skip_ratio, "Fraction of detector runs skipped on static scenes.")
+if controller is not None:
+    REGISTRY.register_gauge("latency_target_ms", lambda: controller.target_ms, "Per-frame latency budget.")
+    REGISTRY.register_gauge("latency_ewma_ms", lambda: controller.ewma_ms, "Smoothed per-frame latency (queue wait plus inference).")
+    REGISTRY.register_gauge("inference_imgsz", lambda: controller.imgsz, "Image size the controller currently runs batches at.")
+    REGISTRY.register_gauge("detect_stride", lambda: controller.stride, "Extra detector thinning chosen by the controller.")
+
+# Draws boxes and cached label sprites directly into the frame
+renderer = OverlayRenderer()
+
+# Detector cadence and track lifetimes; tracks carry boxes forward between detector runs
+DETECT_EVERY = int(os.getenv("DETECT_EVERY", "3"))  # Run the detector on every Nth frame
+TRACK_MAX_AGE = float(os.getenv("TRACK_MAX_AGE", "1.0"))  # Seconds a track survives without a detection
+
+# Skip the detector while the scene is static (mean pixel change below this, 0 disables the gate)
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "3.0"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_class_table():
+    """Category, color and reasoning for every class id the model can predict (built once the model is loaded)."""
+    return ClassTable(model.names, get_category_info)
+
+@functools.lru_cache(maxsize=None)
+def get_conf_threshold():
+    """Confidence cutoff for ``extract_detections``: CONF_THRESHOLD, or one per class id from CLASS_THRESHOLDS."""
+    return load_class_thresholds(CLASS_THRESHOLDS, model.names, CONF_THRESHOLD)
+
+# Results panel templates, compiled once per class by ResultsPanel
+EMPTY_RESULTS_HTML = """
+<div class='no-detections'>
+    <div class='empty-state'>
+        <div class='empty-icon'>📷</div>
+        <div class='empty-message'>Point your camera at waste items to classify them</div>
+    </div>
+</div>
+"""
+
+RESULTS_LAYOUT = """<div class='results-container'>\
+<div class='summary-section'><h3>Summary</h3><div class='category-counts'>{summary}</div></div>\
+<div class='details-section'><h3>Detected Items</h3><div class='items-list'>{items}</div></div>\
+</div>"""
+
+SUMMARY_TEMPLATE = """
+<div class='category-summary'>
+    <div class='category-label category-{category}'>
+        <span class='category-icon'></span>
+        <span class='category-name'>{category_upper}</span>
+    </div>
+    <div class='category-bar-container'>
+        <div class='category-bar category-{category}-bg' style='width: {percentage}%;'></div>
+        <span class='category-count'>{count}</span>
+    </div>
+</div>
+"""
+
+ITEM_TEMPLATE = """
+<div class='detection-item category-{category}'>
+    <div class='detection-header'>
+        <div class='item-info'>
+            <span class='item-number'>{number}</span>
+            <span class='item-label'>{label}</span>
         </div>
-        """
-    
-    html += "</div></div>"  # Close summary section
-    
-    # Add detailed results
-    html += "<div class='details-section'>"
-    html += "<h3>Detected Items</h3>"
-    html += "<div class='items-list'>"
-    
-    for idx, item in enumerate(results):
-        label = item["label"]
-        category = item["category"]
-        confidence = item["confidence"]
-        reasoning = item["reasoning"]
-        
-        # Determine CSS class based on category
-        category_class = f"category-{category}"
-        
-        html += f"""
-        <div class='detection-item {category_class}'>
-            <div class='detection-header'>
-                <div class='item-info'>
-                    <span class='item-number'>{idx + 1}</span>
-                    <span class='item-label'>{label}</span>
-                </div>
-                <div class='item-meta'>
-                    <span class='item-category'>{category.upper()}</span>
-                    <span class='item-confidence'>{confidence:.1%}</span>
-                </div>
-            </div>
-            <div class='detection-reasoning'>
-                {reasoning}
-            </div>
+        <div class='item-meta'>
+            <span class='item-category'>{category_upper}</span>
+            <span class='item-confidence'>{confidence}</span>
         </div>
-        """
-    
-    html += "</div></div></div>"  # Close details and container
-    return html
-
-def process_frame(frame):
-    """Process a webcam frame and return the annotated frame with classification results."""
-    global last_valid_results, last_update_time
+    </div>
+    <div class='detection-reasoning'>
+        {reasoning}
+    </div>
+</div>
+"""
+
+# Confidence change that counts as a new panel (smaller changes don't resend it)
+PANEL_CONF_STEP = float(os.getenv("PANEL_CONF_STEP", "0.05"))
+
+@functools.lru_cache(maxsize=None)
+def get_results_panel():
+    """Results panel with HTML fragments precompiled for every class (built once the model is loaded)."""
+    return ResultsPanel(get_class_table(), RESULTS_LAYOUT, SUMMARY_TEMPLATE, ITEM_TEMPLATE, EMPTY_RESULTS_HTML,
+                        conf_step=PANEL_CONF_STEP)
+
+def model_status():
+    """Model readiness for the status line; stops the polling timer once the model is ready."""
+    if model.ready:
+        return "", gr.Timer(active=False)
+    if model.status == "loading":
+        return "⏳ Loading model, detections will start shortly...", gr.Timer(active=True)
+    return f"⚠️ Model unavailable ({model.status})", gr.Timer(active=False)
+
+@REGISTRY.timed("process_frame")
+def process_frame(frame, session=None):
+    """Process a webcam frame and return the annotated frame with the results panel HTML."""
+    if session is None:
+        session = StreamSession(
+            detect_every=DETECT_EVERY,
+            motion_threshold=MOTION_THRESHOLD,
+            max_age=TRACK_MAX_AGE
+        )
     
     if frame is None:
-        return None, last_valid_results
+        return None, gr.skip(), session
     
-    # Process the frame with YOLO model
-    results = model(frame)
+    # Pass frames through untouched until the model has finished warming up
+    if not model.ready:
+        return frame, gr.skip(), session
     
-    # Convert frame to PIL Image for drawing
-    img = Image.fromarray(frame)
-    draw = ImageDraw.Draw(img)
+    REGISTRY.count_frame()
     
-    # Try to load a larger font for better visibility
-    try:
-        # Try to use a more readable font if available
-        title_font = ImageFont.truetype("arial.ttf", 30)
-        label_font = ImageFont.truetype("arial.ttf", 22)
-    except IOError:
-        # Fallback to default font if arial not available
-        title_font = ImageFont.load_default()
-        label_font = title_font
+    # Make sure we can annotate the frame in place
+    with REGISTRY.time("decode"):
+        frame = renderer.prepare(frame)
     
-    detailed_results = []
-    
-    # Extract detections and draw bounding boxes
-    for r in results:
-        boxes = r.boxes
-        for box in boxes:
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            conf = float(box.conf[0])
-            class_id = int(box.cls[0].item())
-            label = r.names[class_id]
-            
-            # Skip low confidence detections
-            if conf < 0.35:
-                continue
-            
-            # Get category info
-            category_info = get_category_info(label)
-            category = category_info["category"]
-            color = category_info["color"]
-            reasoning = category_info["reason"]
-            
-            # Convert coordinates to integers
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            # Draw rectangle with thicker line
-            draw.rectangle([(x1, y1), (x2, y2)], outline=color, width=4)
-            
-            # Prepare text
-            category_text = f"{category.upper()}"
-            label_text = f"{label} ({conf:.1%})"
-            
-            # Calculate text dimensions
-            text_width = title_font.getbbox(category_text)[2] if hasattr(title_font, 'getbbox') else 200
-            text_height = title_font.getbbox(category_text)[3] if hasattr(title_font, 'getbbox') else 30
-            
-            # Draw background for category label (top)
-            draw.rectangle(
-                [(x1, y1 - text_height - 10), (x1 + text_width + 10, y1)], 
-                fill=(*color, 180)  # Semi-transparent background
-            )
+    if session.next_frame(controller.stride if controller is not None else 1):
+        if session.scene_changed(frame):
+            # Process the frame with YOLO model (batched with other active streams)
+            with REGISTRY.time("inference"):
+                result = scheduler.predict(frame)
             
-            # Draw background for item label (bottom)
-            label_width = label_font.getbbox(label_text)[2] if hasattr(label_font, 'getbbox') else 200
-            label_height = label_font.getbbox(label_text)[3] if hasattr(label_font, 'getbbox') else 22
+            # Drop low confidence detections and pull out all boxes at once
+            with REGISTRY.time("postprocess"):
+                detections = extract_detections(result, get_conf_threshold())
+            with REGISTRY.time("tracking"):
+                session.tracker.update(detections.xyxy, detections.conf, detections.class_id)
+        else:
+            # Static scene: reuse the last detections
+            REGISTRY.inc("motion_skipped_frames", help="Detector runs skipped because the scene was static.")
+            session.tracker.hold()
+    else:
+        # Carry the tracked boxes forward without running the detector
+        with REGISTRY.time("tracking"):
+            session.tracker.predict()
+    
+    class_table = get_class_table()
+    class_ids = []
+    confs = []
+    
+    # Draw bounding boxes
+    with REGISTRY.time("render"):
+        for track in session.tracker.active_tracks():
+            x1, y1, x2, y2 = track.box.tolist()
+            conf = track.conf
             
-            draw.rectangle(
-                [(x1, y1), (x1 + label_width + 10, y1 + label_height + 5)], 
-                fill=(0, 0, 0, 180)  # Semi-transparent black
-            )
+            # Category info comes straight from the per-class table
+            label = class_table.labels[track.class_id]
+            category = class_table.categories[track.class_id]
+            color = class_table.colors[track.class_id]
             
-            # Draw text
-            draw.text((x1 + 5, y1 - text_height - 5), category_text, font=title_font, fill=(255, 255, 255))
-            draw.text((x1 + 5, y1 + 2), label_text, font=label_font, fill=(255, 255, 255))
+            # Draw box, category and label directly into the frame
+            renderer.draw(frame, (x1, y1, x2, y2), category, color, label, conf)
             
-            # Add to detailed results
-            detailed_results.append({
-                "label": label,
-                "category": category,
-                "confidence": conf,
-                "reasoning": reasoning,
-                "bounding_box": [x1, y1, x2, y2]
-            })
+            class_ids.append(track.class_id)
+            confs.append(conf)
     
-    # Update the last valid results if we have any detections or enough time has passed
-    current_time = time.time()
-    if detailed_results:
-        last_valid_results = detailed_results
-        last_update_time = current_time
-    elif (current_time - last_update_time) > result_persistence_time:
-        # Only clear the results if enough time has passed without new detections
-        last_valid_results = []
+    # Results panel from precompiled fragments, only sent when the detections changed
+    with REGISTRY.time("format_html"):
+        results_html = get_results_panel().update(session, class_ids, confs)
+    if results_html is None:
+        REGISTRY.inc("panel_updates_skipped", help="Results panel updates skipped because the detections were unchanged.")
+        results_html = gr.skip()
     
-    # Use the most recent valid results (prevents flickering)
-    results_to_return = last_valid_results if last_valid_results else detailed_results
-    
-    # Convert back to numpy array for Gradio
-    annotated_frame = np.array(img)
-    
-    return annotated_frame, results_to_return
+    return frame, results_html, session
 
 def create_css():
     """Create an improved CSS file for the application."""
@@ -722,6 +637,12 @@ def create_ui():
         with gr.Column(elem_classes=["container"]):
             gr.Markdown("# GarbEDGE: Smart Waste Classification", elem_classes=["app-title"])
             
+            # Model loading status, polled until the model is ready
+            model_status_md = gr.Markdown(elem_classes=["model-status"])
+            status_timer = gr.Timer(1.0)
+            status_timer.tick(fn=model_status, outputs=[model_status_md, status_timer])
+            demo.load(fn=model_status, outputs=[model_status_md, status_timer])
+            
             # Color-coded legend
             with gr.Row(elem_classes=["legend"]):
                 for category, data in WASTE_CATEGORIES.items():
@@ -749,27 +670,22 @@ def create_ui():
                 with gr.Column(scale=2):
                     gr.Markdown("### Classification Results", elem_classes=["results-title"])
                     # HTML output for formatted results
-                    results_html = gr.HTML(elem_classes=["results-output"])
+                    results_html = gr.HTML(EMPTY_RESULTS_HTML, elem_classes=["results-output"])
             
-            # Hidden JSON output for processing
-            results_json = gr.JSON(visible=False)
+            # Per-session detection state (tracker, frame counter)
+            session_state = gr.State()
             
             # Stream the webcam input for real-time processing
             webcam_input.stream(
                 fn=process_frame,
-                inputs=webcam_input,
-                outputs=[webcam_input, results_json],
+                inputs=[webcam_input, session_state],
+                outputs=[webcam_input, results_html, session_state],
                 show_progress=False,
+                concurrency_limit=BATCH_SIZE,  # Let enough streams run at once to fill a batch
                 time_limit=300,      # Process for up to 5 minutes at a time
                 stream_every=0.1     # Process every 0.1 seconds for smooth real-time effect
             )
             
-            # Update the HTML display whenever results_json changes
-            results_json.change(
-                fn=format_results_html,
-                inputs=results_json,
-                outputs=results_html
-            )
             
             # How it works section
             with gr.Row(elem_classes=["how-it-works"]):
@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+
+# Default confidence cutoff used by the live demo
+CONF_THRESHOLD = 0.35
+
+
+class Detections:
+    """Detections for one image as parallel NumPy arrays (xyxy boxes, confidences, class ids)."""
+
+    def __init__(self, xyxy, conf, class_id):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.class_id = class_id
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.zeros((0, 4), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.conf)
+
+    def category_counts(self, table):
+        """Number of detections per waste category, counted with one ``bincount``."""
+        category_ids = table.category_ids[self.class_id]
+        counts = np.bincount(category_ids[category_ids >= 0], minlength=len(table.category_names))
+        return dict(zip(table.category_names, counts.tolist()))
+
+    def to_records(self, table):
+        """Result dicts in the same shape the live demo produces, built only for the kept boxes."""
+        records = []
+        for (x1, y1, x2, y2), conf, class_id in zip(self.xyxy.astype(int).tolist(), self.conf.tolist(), self.class_id.tolist()):
+            records.append({
+                "label": table.labels[class_id],
+                "category": table.categories[class_id],
+                "confidence": conf,
+                "bounding_box": [x1, y1, x2, y2]
+            })
+        return records
+
+
+def load_class_thresholds(path, names, default=CONF_THRESHOLD):
+    """Per-class confidence cutoffs from a ``tune-thresholds`` table, as an array indexed by class id.
+
+    Classes missing from the table keep ``default``. Returns ``default``
+    itself when no table is configured, so callers can pass the result
+    straight to ``extract_detections``.
+    """
+    if not path:
+        return default
+    with open(path, "r") as f:
+        thresholds = json.load(f)["thresholds"]
+    size = max(names) + 1 if names else 0
+    return np.array([thresholds.get(names.get(i), default) for i in range(size)], dtype=np.float32)
+
+
+def lowest_threshold(path, default=CONF_THRESHOLD):
+    """Lowest cutoff a ``tune-thresholds`` table (or ``default``) can apply, without needing the class names."""
+    if not path:
+        return default
+    with open(path, "r") as f:
+        thresholds = json.load(f)["thresholds"]
+    return float(min([default, *thresholds.values()]))
+
+
+def predict_conf(conf_threshold):
+    """``conf=`` for the model call: the lowest of the cutoffs ``extract_detections`` will apply.
+
+    Ultralytics drops boxes under its own default of 0.25 before they reach
+    ``extract_detections``, which would silently raise every tuned threshold
+    below that to 0.25.
+    """
+    return float(np.min(conf_threshold))
+
+
+def extract_detections(result, conf_threshold=CONF_THRESHOLD):
+    """Filter a YOLO ``Results`` object by confidence and pull out its boxes in one vectorised step.
+
+    ``conf_threshold`` is a single cutoff or an array with one per class id.
+    The mask is applied to the box tensors before anything is copied off the
+    device or turned into Python objects.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return Detections.empty()
+
+    if np.ndim(conf_threshold):
+        # Look up every box's class cutoff on the device, in one indexing step
+        conf_threshold = boxes.conf.new_tensor(conf_threshold)[boxes.cls.long()]
+    kept = boxes[boxes.conf >= conf_threshold].cpu().numpy()
+    return Detections(
+        kept.xyxy.astype(np.float32, copy=False),
+        kept.conf.astype(np.float32, copy=False),
+        kept.cls.astype(np.int64),
+    )
@@ -0,0 +1,346 @@
+"""Cache a model's raw validation predictions and recompute detection metrics from them.
+
+``collect`` runs the model once over a split with the same permissive settings
+``yolo val`` uses (confidence 0.001, NMS IoU 0.7, up to 300 boxes) and stores
+every box, together with the ground truth, in ``.eval_cache/`` inside the
+dataset. The file is keyed by the content hash of the weights, so retrained
+weights never reuse old predictions.
+
+``evaluate`` then recomputes mAP50, mAP50-95, per-class AP, precision/recall
+curves and the confusion matrix from the cache in NumPy, for any confidence
+threshold, a stricter NMS IoU, or a class mapping (e.g. the waste categories),
+without running the model again.
+
+Example:
+    eval-cache --weights runs/detect/train24/weights/best.pt --data YOLO-Waste-Detection-1 --conf 0.35 --categories
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from garbage_classification.categories import ClassTable
+from garbage_classification.dataset_scan import IMAGE_EXTENSIONS, list_dir
+from garbage_classification.detections import CONF_THRESHOLD, extract_detections
+from garbage_classification.label_store import read_label_file
+from garbage_classification.model import model_identity
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.utils import SPLIT_DIRS
+
+CACHE_DIR = ".eval_cache"
+
+# Settings ``yolo val`` predicts with; anything stricter can be re-applied from the cache
+COLLECT_CONF = 0.001
+COLLECT_IOU = 0.7
+COLLECT_MAX_DET = 300
+
+# IoU thresholds for mAP50-95, and the matching IoU ultralytics uses for its confusion matrix
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+CONFUSION_IOU = 0.45
+
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+def cache_path(weights, dataset_dir, split="val", imgsz=640):
+    """Where the predictions of ``weights`` on one split are cached."""
+    identity = model_identity(weights)
+    key = identity[:16] if len(identity) == 64 else os.path.basename(identity.rstrip(os.sep))
+    return os.path.join(dataset_dir, CACHE_DIR, f"{key}_{split}_{imgsz}.npz")
+
+
+def collect(weights, dataset_dir="YOLO-Waste-Detection-1", split="val", imgsz=640, batch=16, device=None,
+            refresh=False):
+    """Predict one split and cache boxes and ground truth; returns the cache path."""
+    path = cache_path(weights, dataset_dir, split, imgsz)
+    if os.path.exists(path) and not refresh:
+        return path
+
+    from ultralytics import YOLO
+
+    split_dir = os.path.join(dataset_dir, SPLIT_DIRS.get(split, split))
+    images = sorted(list_dir(os.path.join(split_dir, "images"), IMAGE_EXTENSIONS).items())
+    if not images:
+        raise FileNotFoundError(f"No images found in {split_dir}/images")
+    labels = list_dir(os.path.join(split_dir, "labels"), (".txt",))
+
+    model = YOLO(weights)
+    pred = {"image": [], "xyxy": [], "conf": [], "cls": []}
+    gt = {"image": [], "xyxy": [], "cls": []}
+    start = time.perf_counter()
+    for first in range(0, len(images), batch):
+        chunk = images[first:first + batch]
+        results = model.predict([os.path.join(split_dir, "images", name) for _, (name, _, _) in chunk],
+                                imgsz=imgsz, conf=COLLECT_CONF, iou=COLLECT_IOU, max_det=COLLECT_MAX_DET,
+                                device=device, verbose=False)
+        for image_id, ((stem, _), result) in enumerate(zip(chunk, results), start=first):
+            detections = extract_detections(result, COLLECT_CONF)
+            pred["image"].append(np.full(len(detections), image_id, dtype=np.int32))
+            pred["xyxy"].append(detections.xyxy)
+            pred["conf"].append(detections.conf)
+            pred["cls"].append(detections.class_id.astype(np.int16))
+
+            if stem in labels:
+                class_ids, xywh = read_label_file(os.path.join(split_dir, "labels", labels[stem][0]))
+                h, w = result.orig_shape
+                xyxy = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+                gt["image"].append(np.full(len(class_ids), image_id, dtype=np.int32))
+                gt["xyxy"].append((xyxy * [w, h, w, h]).astype(np.float32))
+                gt["cls"].append(class_ids)
+
+    meta = {"weights": weights, "model": model_identity(weights), "split": split, "imgsz": imgsz,
+            "conf": COLLECT_CONF, "iou": COLLECT_IOU, "names": [model.names[i] for i in range(len(model.names))],
+            "files": [name for _, (name, _, _) in images]}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path[:-len(".npz")] + ".tmp.npz"
+    np.savez(
+        tmp_path, meta=np.array(json.dumps(meta)),
+        **{f"pred_{k}": np.concatenate(v) for k, v in pred.items()},
+        **{f"gt_{k}": np.concatenate(v) if v else np.zeros((0, 4) if k == "xyxy" else 0) for k, v in gt.items()},
+    )
+    os.replace(tmp_path, path)
+    print(f"Cached predictions for {len(images)} {split} images in {path} ({time.perf_counter() - start:.0f}s)")
+    return path
+
+
+class EvalCache:
+    """Predictions and ground truth of one model on one split, as flat arrays sorted by image."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.meta = json.loads(str(data["meta"]))
+            self.pred_image = data["pred_image"]
+            self.pred_xyxy = data["pred_xyxy"]
+            self.pred_conf = data["pred_conf"]
+            self.pred_cls = data["pred_cls"].astype(np.int64)
+            self.gt_image = data["gt_image"]
+            self.gt_xyxy = data["gt_xyxy"]
+            self.gt_cls = data["gt_cls"].astype(np.int64)
+        self.names = self.meta["names"]
+
+    @property
+    def num_images(self):
+        return len(self.meta["files"])
+
+
+def box_iou(a, b):
+    """Pairwise IoU between ``(n, 4)`` and ``(m, 4)`` xyxy boxes."""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def image_slices(image_ids, num_images):
+    """``(start, end)`` row range of every image in an array sorted by image id."""
+    ids = np.arange(num_images)
+    return np.searchsorted(image_ids, ids, side="left"), np.searchsorted(image_ids, ids, side="right")
+
+
+def nms(xyxy, conf, cls, image_ids, num_images, iou_threshold):
+    """Class-aware greedy NMS per image; returns a keep mask over the rows."""
+    keep = np.zeros(len(conf), dtype=bool)
+    for start, end in zip(*image_slices(image_ids, num_images)):
+        if start == end:
+            continue
+        order = start + np.argsort(-conf[start:end], kind="stable")
+        overlaps = box_iou(xyxy[order], xyxy[order]) * (cls[order][:, None] == cls[order][None, :])
+        suppressed = np.zeros(len(order), dtype=bool)
+        for i in range(len(order)):
+            if not suppressed[i]:
+                keep[order[i]] = True
+                suppressed |= overlaps[i] > iou_threshold
+    return keep
+
+
+def match_predictions(pred_cls, gt_cls, overlaps, iou_thresholds=IOU_THRESHOLDS):
+    """True-positive matrix ``(predictions, thresholds)``; greedy by IoU, one prediction per box (as ultralytics)."""
+    correct = np.zeros((len(pred_cls), len(iou_thresholds)), dtype=bool)
+    overlaps = overlaps * (gt_cls[:, None] == pred_cls[None, :])
+    for t, threshold in enumerate(iou_thresholds):
+        matches = np.argwhere(overlaps >= threshold)
+        if len(matches) > 1:
+            matches = matches[overlaps[matches[:, 0], matches[:, 1]].argsort()[::-1]]
+            matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+            matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+        correct[matches[:, 1], t] = True
+    return correct
+
+
+def true_positives(pred_xyxy, pred_cls, pred_image, gt_xyxy, gt_cls, gt_image, num_images):
+    """Match every image's predictions to its ground truth; ``(predictions, IoU thresholds)`` bool matrix."""
+    tp = np.zeros((len(pred_cls), len(IOU_THRESHOLDS)), dtype=bool)
+    pred_slices = zip(*image_slices(pred_image, num_images))
+    gt_slices = zip(*image_slices(gt_image, num_images))
+    for (p0, p1), (g0, g1) in zip(pred_slices, gt_slices):
+        if p1 > p0 and g1 > g0:
+            tp[p0:p1] = match_predictions(pred_cls[p0:p1], gt_cls[g0:g1], box_iou(gt_xyxy[g0:g1], pred_xyxy[p0:p1]))
+    return tp
+
+
+def compute_ap(recall, precision):
+    """Area under the precision envelope, 101-point interpolation (COCO / ultralytics)."""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return _trapezoid(np.interp(x, mrec, mpre), x)
+
+
+def ap_per_class(tp, conf, pred_cls, gt_cls, nc, points=1000):
+    """Per-class AP at every IoU threshold, plus precision and recall curves over confidence."""
+    order = np.argsort(-conf, kind="stable")
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+    n_gt = np.bincount(gt_cls, minlength=nc)
+    x = np.linspace(0, 1, points)
+    ap = np.zeros((nc, tp.shape[1]))
+    p_curve, r_curve = np.zeros((nc, points)), np.zeros((nc, points))
+    for c in np.flatnonzero(n_gt):
+        mask = pred_cls == c
+        if not mask.any():
+            continue
+        tpc = tp[mask].cumsum(axis=0)
+        fpc = (1 - tp[mask]).cumsum(axis=0)
+        recall = tpc / n_gt[c]
+        precision = tpc / (tpc + fpc)
+        r_curve[c] = np.interp(-x, -conf[mask], recall[:, 0], left=0)
+        p_curve[c] = np.interp(-x, -conf[mask], precision[:, 0], left=1)
+        ap[c] = [compute_ap(recall[:, t], precision[:, t]) for t in range(tp.shape[1])]
+    return ap, p_curve, r_curve, n_gt
+
+
+def confusion_matrix(slices, pred_xyxy, pred_cls, gt_xyxy, gt_cls, nc, iou_threshold=CONFUSION_IOU):
+    """``(nc + 1) x (nc + 1)`` counts indexed ``[predicted, true]``; the last row/column is background."""
+    matrix = np.zeros((nc + 1, nc + 1), dtype=np.int64)
+    for (p0, p1), (g0, g1) in slices:
+        pc, gc = pred_cls[p0:p1], gt_cls[g0:g1]
+        matched_pred = np.zeros(len(pc), dtype=bool)
+        matched_gt = np.full(len(gc), -1)
+        if len(pc) and len(gc):
+            overlaps = box_iou(gt_xyxy[g0:g1], pred_xyxy[p0:p1])
+            matches = np.argwhere(overlaps > iou_threshold)
+            if len(matches) > 1:
+                matches = matches[overlaps[matches[:, 0], matches[:, 1]].argsort()[::-1]]
+                matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+                matches = matches[overlaps[matches[:, 0], matches[:, 1]].argsort()[::-1]]
+                matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+            matched_gt[matches[:, 0]] = matches[:, 1]
+            matched_pred[matches[:, 1]] = True
+        hit = matched_gt >= 0
+        np.add.at(matrix, (pc[matched_gt[hit]], gc[hit]), 1)
+        np.add.at(matrix, (nc, gc[~hit]), 1)
+        np.add.at(matrix, (pc[~matched_pred], nc), 1)
+    return matrix
+
+
+def evaluate(cache, conf=CONF_THRESHOLD, nms_iou=None, class_map=None, class_names=None):
+    """Recompute metrics from a cache.
+
+    mAP is computed over every cached box (like ``yolo val``); precision,
+    recall and the confusion matrix are taken at the ``conf`` operating point.
+    ``nms_iou`` re-applies class-aware NMS with a stricter IoU than the one
+    used when collecting. ``class_map`` maps every class id to a new id (-1
+    drops the class) so metrics can be reported per category.
+    """
+    start = time.perf_counter()
+    pred_xyxy, pred_conf, pred_cls, pred_image = cache.pred_xyxy, cache.pred_conf, cache.pred_cls, cache.pred_image
+    gt_xyxy, gt_cls, gt_image = cache.gt_xyxy, cache.gt_cls, cache.gt_image
+    names = class_names or cache.names
+
+    if class_map is not None:
+        class_map = np.asarray(class_map)
+        pred_cls, gt_cls = class_map[pred_cls], class_map[gt_cls]
+        kept_pred, kept_gt = pred_cls >= 0, gt_cls >= 0
+        pred_xyxy, pred_conf, pred_cls, pred_image = (a[kept_pred] for a in (pred_xyxy, pred_conf, pred_cls, pred_image))
+        gt_xyxy, gt_cls, gt_image = (a[kept_gt] for a in (gt_xyxy, gt_cls, gt_image))
+    if nms_iou is not None and nms_iou < cache.meta["iou"]:
+        kept = nms(pred_xyxy, pred_conf, pred_cls, pred_image, cache.num_images, nms_iou)
+        pred_xyxy, pred_conf, pred_cls, pred_image = (a[kept] for a in (pred_xyxy, pred_conf, pred_cls, pred_image))
+    nc = len(names)
+
+    tp = true_positives(pred_xyxy, pred_cls, pred_image, gt_xyxy, gt_cls, gt_image, cache.num_images)
+    gt_slices = list(zip(*image_slices(gt_image, cache.num_images)))
+    ap, p_curve, r_curve, n_gt = ap_per_class(tp, pred_conf, pred_cls, gt_cls, nc)
+    present = n_gt > 0
+
+    # Operating point: boxes at or above ``conf``, matched at IoU 0.5
+    above = pred_conf >= conf
+    tp_at = np.bincount(pred_cls[above], weights=tp[above, 0], minlength=nc)
+    pred_at = np.bincount(pred_cls[above], minlength=nc)
+    precision = np.divide(tp_at, pred_at, out=np.zeros(nc), where=pred_at > 0)
+    recall = np.divide(tp_at, n_gt, out=np.zeros(nc), where=present)
+
+    # The confusion matrix only sees the boxes above ``conf``, so their rows are sliced again
+    kept_slices = list(zip(*image_slices(pred_image[above], cache.num_images)))
+    matrix = confusion_matrix(list(zip(kept_slices, gt_slices)), pred_xyxy[above], pred_cls[above],
+                              gt_xyxy, gt_cls, nc)
+
+    return {
+        "model": cache.meta["model"],
+        "split": cache.meta["split"],
+        "conf": conf,
+        "nms_iou": nms_iou if nms_iou is not None else cache.meta["iou"],
+        "precision": float(tp_at.sum() / max(pred_at.sum(), 1)),
+        "recall": float(tp_at.sum() / max(n_gt.sum(), 1)),
+        "mAP50": float(ap[present, 0].mean()) if present.any() else 0.0,
+        "mAP50-95": float(ap[present].mean()) if present.any() else 0.0,
+        "per_class": [
+            {"name": names[c], "instances": int(n_gt[c]), "precision": float(precision[c]),
+             "recall": float(recall[c]), "AP50": float(ap[c, 0]), "AP50-95": float(ap[c].mean())}
+            for c in range(nc) if present[c] or pred_at[c]
+        ],
+        "pr_curve": {"confidence": np.linspace(0, 1, p_curve.shape[1]).tolist(),
+                     "precision": p_curve[present].mean(axis=0).tolist() if present.any() else [],
+                     "recall": r_curve[present].mean(axis=0).tolist() if present.any() else []},
+        "confusion_matrix": {"labels": list(names) + ["background"], "counts": matrix.tolist()},
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def print_metrics(metrics, limit=None):
+    print(f"\n{metrics['split']} at conf {metrics['conf']:.2f}, NMS IoU {metrics['nms_iou']:.2f}:")
+    print(f"  precision {metrics['precision']:.4f}  recall {metrics['recall']:.4f}  "
+          f"mAP50 {metrics['mAP50']:.4f}  mAP50-95 {metrics['mAP50-95']:.4f}")
+    rows = sorted(metrics["per_class"], key=lambda row: row["AP50-95"])
+    print(f"\n{'class':<36}{'boxes':>7}{'P':>8}{'R':>8}{'AP50':>8}{'AP50-95':>9}")
+    for row in rows[:limit]:
+        print(f"{row['name']:<36}{row['instances']:>7}{row['precision']:>8.3f}{row['recall']:>8.3f}"
+              f"{row['AP50']:>8.3f}{row['AP50-95']:>9.3f}")
+    print(f"\nRecomputed in {metrics['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=os.getenv("MODEL_PATH", REGISTRY_SPEC),
+                        help="Weights, or \"registry\" for the best indexed run")
+    parser.add_argument("--data", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--split", default="val")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--refresh", action="store_true", help="Run the model again even if a cache exists")
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD, help="Operating confidence for P/R and confusion")
+    parser.add_argument("--nms-iou", type=float, default=None, help=f"Re-apply NMS at this IoU (below {COLLECT_IOU})")
+    parser.add_argument("--categories", action="store_true", help="Report per waste category instead of per class")
+    parser.add_argument("--json", default=None, help="Also write the metrics to this file")
+    args = parser.parse_args()
+    args.weights = resolve_model_path(args.weights)
+
+    cache = EvalCache(collect(args.weights, args.data, args.split, args.imgsz, args.batch, args.device, args.refresh))
+    class_map = class_names = None
+    if args.categories:
+        table = ClassTable(dict(enumerate(cache.names)))
+        class_map, class_names = table.category_ids, table.category_names
+    metrics = evaluate(cache, args.conf, args.nms_iou, class_map, class_names)
+    print_metrics(metrics)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(metrics, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
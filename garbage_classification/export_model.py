@@ -0,0 +1,204 @@
+"""Export the trained detector to ONNX Runtime or OpenVINO, optionally INT8-quantized, and compare backends.
+
+Examples:
+    python -m garbage_classification.export_model export --backend onnx --int8
+    python -m garbage_classification.export_model export --backend openvino --int8
+    python -m garbage_classification.export_model compare --backends pytorch onnx onnx-int8 openvino-int8
+
+Run the live demo on an exported model with ``MODEL_BACKEND=onnx`` (or
+``openvino``) and ``MODEL_INT8=1``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+from garbage_classification.model import resolve_backend_path
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.utils import SPLIT_DIRS, resolve_data_yaml
+
+# A weights path, or "registry" for the best indexed run (see run_registry)
+DEFAULT_WEIGHTS = os.getenv("MODEL_PATH", REGISTRY_SPEC)
+DEFAULT_DATASET = "YOLO-Waste-Detection-1"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def calibration_images(dataset_dir, limit=300):
+    """Paths of up to ``limit`` images from the dataset's validation split."""
+    image_dir = os.path.join(dataset_dir, SPLIT_DIRS["val"], "images")
+    paths = sorted(p for p in glob.glob(os.path.join(image_dir, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found in {image_dir}")
+    return paths[:limit]
+
+
+def letterbox(image, imgsz, color=(114, 114, 114)):
+    """Resize keeping aspect ratio and pad to a square ``imgsz``, as ultralytics does before inference."""
+    h, w = image.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    top = (imgsz - new_h) // 2
+    left = (imgsz - new_w) // 2
+    return cv2.copyMakeBorder(resized, top, imgsz - new_h - top, left, imgsz - new_w - left,
+                              cv2.BORDER_CONSTANT, value=color)
+
+
+class ImageCalibrationReader:
+    """Feeds preprocessed validation images to ONNX Runtime's static quantizer."""
+
+    def __init__(self, input_name, paths, imgsz):
+        self.input_name = input_name
+        self.paths = iter(paths)
+        self.imgsz = imgsz
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            image = letterbox(image, self.imgsz)[:, :, ::-1]  # BGR to RGB
+            blob = np.ascontiguousarray(image.transpose(2, 0, 1), dtype=np.float32)[None] / 255.0
+            return {self.input_name: blob}
+        return None
+
+
+def quantize_onnx(fp32_path, int8_path, dataset_dir, imgsz, calib_limit=300):
+    """Post-training static INT8 quantization of an ONNX model, calibrated on validation images."""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # Shape inference / graph cleanup improves which nodes get quantized
+    prepped_path = fp32_path.replace(".onnx", "_prep.onnx")
+    quant_pre_process(fp32_path, prepped_path, skip_symbolic_shape=True)
+
+    input_name = ort.InferenceSession(prepped_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = ImageCalibrationReader(input_name, calibration_images(dataset_dir, calib_limit), imgsz)
+    quantize_static(
+        prepped_path,
+        int8_path,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    os.remove(prepped_path)
+    return int8_path
+
+
+def export(weights=DEFAULT_WEIGHTS, backend="onnx", int8=False, dataset_dir=DEFAULT_DATASET, imgsz=640, calib_limit=300):
+    """Export ``weights`` for ``backend`` and return the artifact path ``MODEL_BACKEND`` will resolve to."""
+    from ultralytics import YOLO
+
+    weights = resolve_model_path(weights)
+    model = YOLO(weights)
+    target = resolve_backend_path(weights, backend, int8)
+
+    if backend == "openvino":
+        # OpenVINO quantizes with NNCF using the dataset's validation split
+        exported = model.export(format="openvino", imgsz=imgsz, int8=int8, data=resolve_data_yaml(dataset_dir),
+                                dynamic=True)
+    elif backend == "onnx":
+        # Dynamic axes so the batch scheduler can send several frames at once
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            exported = quantize_onnx(exported, target, dataset_dir, imgsz, calib_limit)
+    else:
+        raise ValueError(f"Nothing to export for backend {backend!r}")
+
+    if os.path.normpath(exported) != os.path.normpath(target):
+        shutil.move(exported, target)
+    print(f"Exported {weights} -> {target}")
+    return target
+
+
+def measure_latency(model, imgsz, runs=50, warmup=5):
+    """Median single-frame CPU latency in milliseconds on a synthetic frame."""
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    for _ in range(warmup):
+        model(frame, imgsz=imgsz, device="cpu", verbose=False)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(frame, imgsz=imgsz, device="cpu", verbose=False)
+        timings.append(time.perf_counter() - start)
+    return 1000 * float(np.median(timings))
+
+
+def compare(weights=DEFAULT_WEIGHTS, variants=("pytorch", "onnx", "onnx-int8"), dataset_dir=DEFAULT_DATASET,
+            imgsz=640, report_path="reports/backend_comparison.json"):
+    """Validate every backend variant on CPU and report mAP and latency side by side."""
+    from ultralytics import YOLO
+
+    weights = resolve_model_path(weights)
+    data_yaml = resolve_data_yaml(dataset_dir)
+    rows = []
+    for variant in variants:
+        backend, _, suffix = variant.partition("-")
+        path = resolve_backend_path(weights, backend, int8=suffix == "int8")
+        if not os.path.exists(path):
+            print(f"Skipping {variant}: {path} not found (run the export command first)")
+            continue
+
+        model = YOLO(path, task="detect")
+        metrics = model.val(data=data_yaml, imgsz=imgsz, batch=1, device="cpu", plots=False, verbose=False)
+        rows.append({
+            "variant": variant,
+            "path": path,
+            "mAP50": float(metrics.box.map50),
+            "mAP50-95": float(metrics.box.map),
+            "val_inference_ms": float(metrics.speed["inference"]),
+            "frame_latency_ms": measure_latency(model, imgsz),
+        })
+
+    if rows:
+        baseline = rows[0]
+        print(f"\n{'variant':<16}{'mAP50':>8}{'mAP50-95':>10}{'latency ms':>12}{'speedup':>9}")
+        for row in rows:
+            row["speedup"] = baseline["frame_latency_ms"] / row["frame_latency_ms"]
+            print(f"{row['variant']:<16}{row['mAP50']:>8.4f}{row['mAP50-95']:>10.4f}"
+                  f"{row['frame_latency_ms']:>12.1f}{row['speedup']:>8.2f}x")
+
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump({"weights": weights, "imgsz": imgsz, "dataset": dataset_dir, "results": rows}, f, indent=2)
+        print(f"\nReport written to {report_path}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--data", default=DEFAULT_DATASET, help="Dataset directory (used for calibration and validation)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Export the checkpoint for a CPU backend")
+    export_parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    export_parser.add_argument("--int8", action="store_true", help="Apply post-training INT8 quantization")
+    export_parser.add_argument("--calib-images", type=int, default=300, help="Validation images used for calibration")
+
+    compare_parser = sub.add_parser("compare", help="Compare mAP and CPU latency across backends")
+    compare_parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "onnx-int8"],
+                                help="Variants such as pytorch, onnx, onnx-int8, openvino, openvino-int8")
+    compare_parser.add_argument("--report", default="reports/backend_comparison.json")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.weights, args.backend, args.int8, args.data, args.imgsz, args.calib_images)
+    else:
+        compare(args.weights, args.backends, args.data, args.imgsz, args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Columnar store of every box in a YOLO dataset, for fast class-balance and box-size statistics.
+
+All label files are consolidated into memory-mapped ``.npy`` columns (one row
+per box: image id, split, class, x, y, w, h) under ``.label_store/`` in the
+dataset. ``update`` only re-reads label files whose size or modification time
+changed since the last run; queries are vectorised NumPy over the columns.
+
+Example:
+    label-stats YOLO-Waste-Detection-1
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from garbage_classification.dataset_scan import find_splits, list_dir
+from garbage_classification.utils import load_dataset_config
+
+STORE_DIR = ".label_store"
+COLUMNS = {"image_id": np.int32, "split": np.int8, "class_id": np.int16, "xywh": np.float32}
+
+# Box area as a fraction of the image; COCO-like small / medium / large buckets
+DEFAULT_AREA_BINS = [0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+def read_label_file(path):
+    """``(class ids, xywh)`` arrays for one label file; rows that don't parse are skipped."""
+    rows = []
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 5:
+                try:
+                    rows.append([float(p) for p in parts])
+                except ValueError:
+                    continue
+    if not rows:
+        return np.zeros(0, dtype=np.int16), np.zeros((0, 4), dtype=np.float32)
+    rows = np.array(rows, dtype=np.float32)
+    return rows[:, 0].astype(np.int16), rows[:, 1:]
+
+
+class LabelStore:
+    """Memory-mapped box columns for one dataset."""
+
+    def __init__(self, dataset_dir, store_dir=None):
+        self.dataset_dir = dataset_dir
+        self.store_dir = store_dir or os.path.join(dataset_dir, STORE_DIR)
+        self.splits = []
+        self.images = []  # [split index, label file name, size, mtime_ns] per image id
+        self.columns = {}
+        self.names = []
+        if os.path.exists(os.path.join(dataset_dir, "data.yaml")):
+            self.names = list(load_dataset_config(dataset_dir).get("names", []))
+        self._load()
+
+    @property
+    def nc(self):
+        if self.names:
+            return len(self.names)
+        class_ids = self.columns.get("class_id")
+        return int(class_ids.max()) + 1 if class_ids is not None and len(class_ids) else 0
+
+    def __len__(self):
+        return len(self.columns["class_id"]) if self.columns else 0
+
+    def _load(self):
+        meta_path = os.path.join(self.store_dir, "images.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        self.splits = meta["splits"]
+        self.images = meta["images"]
+        self.columns = {
+            name: np.load(os.path.join(self.store_dir, f"{name}.npy"), mmap_mode="r") for name in COLUMNS
+        }
+
+    def update(self):
+        """Bring the store in line with the label files on disk; returns how many files were re-read."""
+        start = time.perf_counter()
+        known = {}
+        if self.columns:
+            # Row range of every stored image, from one pass over the image id column
+            image_ids = np.asarray(self.columns["image_id"])
+            starts = np.searchsorted(image_ids, np.arange(len(self.images)), side="left")
+            ends = np.searchsorted(image_ids, np.arange(len(self.images)), side="right")
+            for image_id, (split, name, size, mtime) in enumerate(self.images):
+                known[(self.splits[split], name)] = (size, mtime, starts[image_id], ends[image_id])
+
+        splits = find_splits(self.dataset_dir)
+        images, keep_rows, new_parts = [], [], []
+        reread = 0
+        for split_index, split in enumerate(splits):
+            label_dir = os.path.join(self.dataset_dir, split, "labels")
+            for stem, (name, size, mtime) in sorted(list_dir(label_dir, (".txt",)).items()):
+                image_id = len(images)
+                images.append([split_index, name, size, mtime])
+                cached = known.get((split, name))
+                if cached is not None and cached[0] == size and cached[1] == mtime:
+                    keep_rows.append((image_id, split_index, int(cached[2]), int(cached[3])))
+                else:
+                    class_ids, xywh = read_label_file(os.path.join(label_dir, name))
+                    new_parts.append((image_id, split_index, class_ids, xywh))
+                    reread += 1
+
+        unchanged = reread == 0 and len(images) == len(self.images) and splits == self.splits
+        if not unchanged:
+            self._write(splits, images, keep_rows, new_parts)
+        print(f"Label store: {len(images)} label files, {reread} re-read, {len(self)} boxes "
+              f"({time.perf_counter() - start:.2f}s)")
+        return reread
+
+    def _write(self, splits, images, keep_rows, new_parts):
+        """Write fresh columns (rows sorted by image id) and swap them in."""
+        sizes = [(image_id, end - begin) for image_id, _, begin, end in keep_rows]
+        sizes += [(image_id, len(class_ids)) for image_id, _, class_ids, _ in new_parts]
+        total = int(sum(size for _, size in sizes))
+
+        offsets = np.zeros(len(images) + 1, dtype=np.int64)
+        for image_id, size in sizes:
+            offsets[image_id + 1] = size
+        offsets = np.cumsum(offsets)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        out = {}
+        for name, dtype in COLUMNS.items():
+            shape = (total, 4) if name == "xywh" else (total,)
+            out[name] = np.lib.format.open_memmap(
+                os.path.join(self.store_dir, f"{name}.tmp.npy"), mode="w+", dtype=dtype, shape=shape
+            )
+
+        # Image id and split columns follow directly from the per-image row counts
+        rows_per_image = np.diff(offsets)
+        out["image_id"][:] = np.repeat(np.arange(len(images), dtype=np.int32), rows_per_image)
+        out["split"][:] = np.repeat(np.array([split for split, *_ in images], dtype=np.int8), rows_per_image)
+
+        # Unchanged images: one gather from the old columns into their new positions
+        if keep_rows:
+            keep = np.array([(image_id, begin, end) for image_id, _, begin, end in keep_rows], dtype=np.int64)
+            lengths = keep[:, 2] - keep[:, 1]
+            within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            src = np.repeat(keep[:, 1], lengths) + within
+            dest = np.repeat(offsets[keep[:, 0]], lengths) + within
+            out["class_id"][dest] = self.columns["class_id"][src]
+            out["xywh"][dest] = self.columns["xywh"][src]
+
+        for image_id, _, class_ids, xywh in new_parts:
+            dest = slice(offsets[image_id], offsets[image_id + 1])
+            out["class_id"][dest] = class_ids
+            out["xywh"][dest] = xywh
+
+        for array in out.values():
+            array.flush()
+        out.clear()
+        self.columns = {}  # Release the old maps before replacing their files
+        for name in COLUMNS:
+            os.replace(os.path.join(self.store_dir, f"{name}.tmp.npy"), os.path.join(self.store_dir, f"{name}.npy"))
+        with open(os.path.join(self.store_dir, "images.json"), "w") as f:
+            json.dump({"splits": splits, "images": images}, f)
+        self._load()
+
+    def _mask(self, split=None, class_id=None):
+        mask = np.ones(len(self), dtype=bool)
+        if split is not None:
+            mask &= np.asarray(self.columns["split"]) == self.splits.index(split)
+        if class_id is not None:
+            mask &= np.asarray(self.columns["class_id"]) == class_id
+        return mask
+
+    def class_counts(self, split=None):
+        """Boxes per class id (array of length ``nc``), optionally for one split."""
+        class_ids = np.asarray(self.columns["class_id"])
+        if split is not None:
+            class_ids = class_ids[self._mask(split)]
+        return np.bincount(class_ids, minlength=self.nc)
+
+    def split_class_counts(self):
+        """Boxes per (split, class) as a ``len(splits) x nc`` array, from a single ``bincount``."""
+        nc = self.nc
+        flat = np.asarray(self.columns["split"]).astype(np.int64) * nc + np.asarray(self.columns["class_id"])
+        return np.bincount(flat, minlength=len(self.splits) * nc).reshape(len(self.splits), nc)
+
+    def images_per_split(self):
+        counts = np.bincount([split for split, *_ in self.images], minlength=len(self.splits))
+        return dict(zip(self.splits, counts.tolist()))
+
+    def boxes_per_image(self, split=None):
+        """Number of boxes on every image (background images count as 0)."""
+        counts = np.bincount(np.asarray(self.columns["image_id"]), minlength=len(self.images))
+        if split is not None:
+            in_split = np.array([s == self.splits.index(split) for s, *_ in self.images], dtype=bool)
+            counts = counts[in_split]
+        return counts
+
+    def area_histogram(self, bins=DEFAULT_AREA_BINS, split=None, class_id=None):
+        """``(counts, bin edges)`` of box area as a fraction of the image area."""
+        xywh = np.asarray(self.columns["xywh"])
+        if split is not None or class_id is not None:
+            xywh = xywh[self._mask(split, class_id)]
+        return np.histogram(xywh[:, 2] * xywh[:, 3], bins=bins)
+
+    def label(self, class_id):
+        return self.names[class_id] if class_id < len(self.names) else str(class_id)
+
+
+def print_summary(store):
+    counts = store.split_class_counts()
+    images = store.images_per_split()
+    header = f"{'class':<36}" + "".join(f"{split:>9}" for split in store.splits) + f"{'total':>9}"
+    print(header)
+    print("-" * len(header))
+    for class_id in np.argsort(-counts.sum(axis=0)):
+        row = counts[:, class_id]
+        print(f"{store.label(int(class_id)):<36}" + "".join(f"{c:>9}" for c in row) + f"{row.sum():>9}")
+    print("-" * len(header))
+    print(f"{'boxes':<36}" + "".join(f"{c:>9}" for c in counts.sum(axis=1)) + f"{counts.sum():>9}")
+    print(f"{'images':<36}" + "".join(f"{images[s]:>9}" for s in store.splits) + f"{sum(images.values()):>9}")
+
+    hist, edges = store.area_histogram()
+    print("\nBox area (fraction of image):")
+    for count, low, high in zip(hist, edges[:-1], edges[1:]):
+        print(f"  {low:>5.2f} - {high:<5.2f} {count:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", nargs="?", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--no-update", action="store_true", help="Query the existing store without checking for changes")
+    args = parser.parse_args()
+
+    store = LabelStore(args.dataset)
+    if not args.no_update or not len(store):
+        store.update()
+    start = time.perf_counter()
+    print_summary(store)
+    print(f"\nQueries took {1000 * (time.perf_counter() - start):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import threading
+import time
+
+
+class LatencyController:
+    """Keep per-frame latency within a budget by adapting the inference size and how often the detector runs.
+
+    ``observe`` is fed the latency of every inferred frame (queue wait plus the
+    batched ``model(frames)`` call) and keeps an exponentially weighted moving
+    average. When the average is over ``target_ms`` the controller first steps
+    the image size down (e.g. 640 -> 320), then runs the detector on fewer
+    frames (``stride``). When there is headroom it undoes those steps in
+    reverse order, stepping the size up only if the larger size is predicted
+    to fit (latency grows roughly with the pixel count). Changes are at least
+    ``cooldown`` seconds apart so each one is measured before the next.
+    """
+
+    def __init__(self, target_ms, sizes=(320, 640), start_size=None, max_stride=4, alpha=0.2,
+                 headroom=0.7, cooldown=2.0):
+        self.target_ms = float(target_ms)
+        self.sizes = sorted(set(int(s) for s in sizes))
+        self.max_stride = max(1, int(max_stride))
+        self.alpha = alpha
+        self.headroom = headroom
+        self.cooldown = cooldown
+
+        start_size = self.sizes[-1] if start_size is None else start_size
+        self._size_index = max([i for i, s in enumerate(self.sizes) if s <= start_size] or [0])
+        self._stride = 1
+        self._ewma_ms = None
+        self._last_change = 0.0
+        self._changes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def imgsz(self):
+        """Image size the next batch should be run at."""
+        return self.sizes[self._size_index]
+
+    @property
+    def stride(self):
+        """Extra detector thinning on top of each stream's own ``detect_every``."""
+        return self._stride
+
+    @property
+    def ewma_ms(self):
+        return self._ewma_ms or 0.0
+
+    def observe(self, latency_seconds, now=None):
+        """Record one frame's latency and adjust the settings if it is time to."""
+        now = time.monotonic() if now is None else now
+        latency_ms = 1000 * latency_seconds
+        with self._lock:
+            if self._ewma_ms is None:
+                self._ewma_ms = latency_ms
+            else:
+                self._ewma_ms += self.alpha * (latency_ms - self._ewma_ms)
+            if now - self._last_change >= self.cooldown and self._adjust():
+                self._last_change = now
+                self._changes += 1
+                print(f"[latency] {self._ewma_ms:.0f} ms against a {self.target_ms:.0f} ms budget: "
+                      f"imgsz {self.imgsz}, detector stride {self._stride}")
+
+    def _adjust(self):
+        """Take at most one step; returns whether anything changed."""
+        if self._ewma_ms > self.target_ms:
+            if self._size_index > 0:
+                self._resize(self._size_index - 1)
+                return True
+            if self._stride < self.max_stride:
+                self._stride += 1
+                return True
+        elif self._ewma_ms < self.target_ms * self.headroom:
+            if self._stride > 1:
+                self._stride -= 1
+                return True
+            if self._size_index < len(self.sizes) - 1:
+                scale = (self.sizes[self._size_index + 1] / self.imgsz) ** 2
+                if self._ewma_ms * scale < self.target_ms * self.headroom:
+                    self._resize(self._size_index + 1)
+                    return True
+        return False
+
+    def _resize(self, index):
+        # Start the average from the predicted latency at the new size instead of the old size's readings
+        self._ewma_ms *= (self.sizes[index] / self.imgsz) ** 2
+        self._size_index = index
+
+    def stats(self):
+        with self._lock:
+            return {
+                "target_ms": self.target_ms,
+                "latency_ewma_ms": self.ewma_ms,
+                "imgsz": self.imgsz,
+                "stride": self._stride,
+                "changes": self._changes,
+            }
@@ -0,0 +1,169 @@
+import bisect
+import collections
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond drawing up to slow inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate quantile: the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Per-stage latency histograms, counters and gauges for the live pipeline.
+
+    ``render`` produces the Prometheus text exposition format, which ``app.py``
+    serves at ``/metrics``.
+    """
+
+    def __init__(self, prefix="garbedge", fps_window=5.0):
+        self.prefix = prefix
+        self.fps_window = fps_window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._gauges = {}
+        self._frames = collections.deque()
+
+    def observe(self, stage, seconds):
+        """Record one latency sample for a pipeline stage."""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block as ``stage``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage):
+        """Decorator form of ``time``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name, amount=1, help=""):
+        """Increase a counter."""
+        with self._lock:
+            value, _ = self._counters.get(name, (0, help))
+            self._counters[name] = (value + amount, help)
+
+    def set_gauge(self, name, value, help=""):
+        """Set a gauge to a fixed value."""
+        with self._lock:
+            self._gauges[name] = (value, help)
+
+    def register_gauge(self, name, fn, help=""):
+        """Register a gauge whose value is read from ``fn()`` at scrape time."""
+        with self._lock:
+            self._gauges[name] = (fn, help)
+
+    def count_frame(self):
+        """Mark one processed frame, for the frames-per-second gauge."""
+        now = time.monotonic()
+        with self._lock:
+            self._frames.append(now)
+            self._trim_frames(now)
+
+    def fps(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim_frames(now)
+            return len(self._frames) / self.fps_window
+
+    def _trim_frames(self, now):
+        while self._frames and now - self._frames[0] > self.fps_window:
+            self._frames.popleft()
+
+    def snapshot(self):
+        """Per-stage count, mean and approximate p50/p99 in milliseconds."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "mean_ms": 1000 * h.sum / h.count if h.count else 0.0,
+                    "p50_ms": 1000 * h.quantile(0.5),
+                    "p99_ms": 1000 * h.quantile(0.99),
+                }
+                for stage, h in self._stages.items()
+            }
+
+    def render(self):
+        """Render all metrics in the Prometheus text format."""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_latency_seconds Latency of each stage of the live pipeline.",
+            f"# TYPE {p}_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            stages = {name: (list(h.buckets), list(h.counts), h.sum, h.count) for name, h in self._stages.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        for stage, (buckets, counts, total, count) in sorted(stages.items()):
+            running = 0
+            for bound, bucket_count in zip(buckets, counts):
+                running += bucket_count
+                lines.append(f'{p}_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {running}')
+            lines.append(f'{p}_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{p}_stage_latency_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{p}_stage_latency_seconds_count{{stage="{stage}"}} {count}')
+
+        for name, (value, help) in sorted(counters.items()):
+            lines.append(f"# HELP {p}_{name}_total {help}")
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {value}")
+
+        gauges["frames_per_second"] = (self.fps, "Frames processed per second over the last few seconds.")
+        for name, (value, help) in sorted(gauges.items()):
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    continue
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry for the whole process
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,137 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+# Inference backends a PyTorch checkpoint can be exported to
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+
+def resolve_backend_path(path, backend="pytorch", int8=False):
+    """Path of the exported artifact for ``backend`` next to a ``.pt`` checkpoint.
+
+    Uses the same names that ``export_model`` (and ultralytics) write, so the
+    result can be passed straight to ``YOLO``.
+    """
+    backend = (backend or "pytorch").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "pytorch" or not path.endswith(".pt"):
+        return path
+
+    stem = path[:-len(".pt")] + ("_int8" if int8 else "")
+    if backend == "onnx":
+        return stem + ".onnx"
+    return stem + "_openvino_model" + os.sep
+
+
+@functools.lru_cache(maxsize=None)
+def _digest(path, mtime, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_identity(path):
+    """Content hash of a weights file (or of every file in an exported model directory).
+
+    Used to key cached predictions, so retraining into the same path never
+    serves stale results. Hashes are memoised per file modification time.
+    Paths that don't exist locally (hub names such as ``yolov8n.pt``) fall
+    back to the path itself.
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    elif os.path.isfile(path):
+        files = [path]
+    else:
+        return path
+    digest = hashlib.sha256()
+    for file in files:
+        stat = os.stat(file)
+        digest.update(_digest(file, stat.st_mtime_ns, stat.st_size).encode())
+    return digest.hexdigest()
+
+
+class LazyModel:
+    """YOLO model that loads and warms up in a background thread.
+
+    The UI can come up immediately while the weights load. After loading, a few
+    dummy inferences at the configured image size (and at every other size in
+    ``warmup_sizes``, e.g. the ones a ``LatencyController`` can switch to) run
+    before the model is marked ready, so the first real frame at any of those
+    sizes is served at steady-state latency.
+    Calling the object (or reading ``names``) blocks until loading is done.
+    """
+
+    def __init__(self, path, imgsz=640, warmup_runs=3, warmup_sizes=()):
+        self.path = path
+        self.imgsz = imgsz
+        self.warmup_runs = warmup_runs
+        self.warmup_sizes = list(dict.fromkeys([imgsz, *warmup_sizes]))
+        self.load_seconds = None
+        self._model = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Begin loading in the background (safe to call more than once)."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            from ultralytics import YOLO
+
+            model = YOLO(self.path, task="detect")
+            for size in self.warmup_sizes:
+                dummy = np.zeros((size, size, 3), dtype=np.uint8)
+                for _ in range(self.warmup_runs):
+                    model(dummy, imgsz=size, verbose=False)
+
+            self._model = model
+            self.load_seconds = time.perf_counter() - start
+            print(f"Model {self.path} ready after {self.load_seconds:.1f}s ({self.warmup_runs} warm-up runs at {self.warmup_sizes})")
+        except Exception as e:
+            self._error = e
+            print(f"Failed to load model {self.path}: {e}")
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        """True once the model is loaded and warmed up."""
+        return self._ready.is_set() and self._error is None
+
+    @property
+    def status(self):
+        if not self._ready.is_set():
+            return "loading"
+        return "ready" if self._error is None else f"failed: {self._error}"
+
+    def wait(self, timeout=None):
+        """Block until loading finishes and return the underlying YOLO model."""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Model {self.path} is still loading")
+        if self._error is not None:
+            raise RuntimeError(f"Model {self.path} failed to load") from self._error
+        return self._model
+
+    @property
+    def names(self):
+        return self.wait().names
+
+    def __call__(self, *args, **kwargs):
+        return self.wait()(*args, **kwargs)
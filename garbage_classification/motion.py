@@ -0,0 +1,71 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decide whether a frame differs enough from the last inferred frame to be worth running the model on.
+
+    Frames are reduced to a small grayscale thumbnail and compared against the
+    thumbnail of the frame the detector last ran on, so slow drift still adds
+    up to a change. A detector run is forced every ``max_interval`` seconds even
+    when the scene looks static. Frames are RGB (Gradio) unless ``bgr`` is set
+    for OpenCV frames.
+    """
+
+    # Totals across every gate, for process-wide reporting
+    _totals_lock = threading.Lock()
+    total_checked = 0
+    total_skipped = 0
+
+    def __init__(self, threshold=3.0, size=(64, 48), max_interval=5.0, bgr=False):
+        self.threshold = threshold
+        self.gray_code = cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY
+        self.size = size
+        self.max_interval = max_interval
+        self.reference = None
+        self.last_pass = 0.0
+        self.checked = 0
+        self.skipped = 0
+
+    def thumbnail(self, frame):
+        """Downscaled grayscale version of the frame used for comparisons."""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, self.gray_code)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def difference(self, thumbnail):
+        """Mean absolute difference (0-255) between a thumbnail and the reference."""
+        if self.reference is None or self.reference.shape != thumbnail.shape:
+            return float("inf")
+        return float(np.abs(thumbnail - self.reference).mean())
+
+    def changed(self, frame, now=None):
+        """Return True if the detector should run on this frame."""
+        now = time.monotonic() if now is None else now
+        thumbnail = self.thumbnail(frame)
+        run = self.difference(thumbnail) > self.threshold or now - self.last_pass >= self.max_interval
+
+        if run:
+            self.reference = thumbnail
+            self.last_pass = now
+        else:
+            self.skipped += 1
+        self.checked += 1
+
+        with MotionGate._totals_lock:
+            MotionGate.total_checked += 1
+            MotionGate.total_skipped += 0 if run else 1
+        return run
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+    @classmethod
+    def overall_skip_ratio(cls):
+        """Fraction of gated frames skipped across all sessions."""
+        with cls._totals_lock:
+            return cls.total_skipped / cls.total_checked if cls.total_checked else 0.0
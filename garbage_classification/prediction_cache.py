@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_hash(data):
+    """SHA-256 of an image's content: raw file bytes, a NumPy array or a PIL image."""
+    digest = hashlib.sha256()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        digest.update(data)
+    else:
+        array = np.ascontiguousarray(np.asarray(data))
+        # Shape and dtype are part of the content, so equal bytes in a different layout don't collide
+        digest.update(f"{array.shape}{array.dtype}".encode())
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """LRU cache for model predictions keyed by image content, model identity and inference settings.
+
+    The in-memory tier holds up to ``max_entries`` predictions and drops the
+    least recently used one when full; entries older than ``max_age`` seconds
+    are treated as misses and dropped. With ``disk_dir`` set, predictions are
+    also pickled to disk so they survive restarts and are shared between
+    worker processes; a disk hit is promoted back into memory. The disk tier
+    is swept on start-up, whenever it grows past ``max_disk_bytes`` and at
+    least every ``max_age`` seconds: expired files are removed, then the
+    oldest ones until it is back under 90% of the limit, so the next few puts
+    don't trigger another sweep.
+    """
+
+    def __init__(self, max_entries=256, max_age=3600.0, disk_dir=None, max_disk_bytes=512 * 2**20):
+        self.max_entries = max(1, int(max_entries))
+        self.max_age = max_age
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._disk_bytes = 0  # Estimate between sweeps; other processes write to the same directory
+        self._last_sweep = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.sweep_disk()
+
+    @staticmethod
+    def key(image_hash, model_id, **settings):
+        """Cache key for one image under one model and set of inference settings (thresholds, image size)."""
+        parts = [image_hash, model_id] + [f"{name}={settings[name]!r}" for name in sorted(settings)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def _expired(self, stored_at, now):
+        return self.max_age is not None and now - stored_at > self.max_age
+
+    def sweep_disk(self, now=None):
+        """Remove expired and half-written disk entries, then the oldest ones beyond ``max_disk_bytes``."""
+        now = time.time() if now is None else now
+        with self._sweep_lock:
+            files = []
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # Removed by another process
+                    # Temp files are only left behind by writers that crashed mid-write
+                    stale = name.endswith(".tmp") and now - stat.st_mtime > 60
+                    if stale or (name.endswith(".pkl") and self._expired(stat.st_mtime, now)):
+                        self._remove(path)
+                    elif name.endswith(".pkl"):
+                        files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            if self.max_disk_bytes is not None and total > self.max_disk_bytes:
+                files.sort()
+                for _, size, path in files:
+                    if total <= 0.9 * self.max_disk_bytes:
+                        break
+                    self._remove(path)
+                    total -= size
+            self._disk_bytes = total
+            self._last_sweep = now
+            return total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self.disk_evictions += 1
+        except OSError:
+            pass
+
+    def _store(self, key, value, stored_at):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.evictions += 1
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                stored_at = os.path.getmtime(path)
+                if self._expired(stored_at, now):
+                    os.remove(path)
+                else:
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+                    with self._lock:
+                        self._store(key, value, stored_at)
+                        self.disk_hits += 1
+                    return value
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass  # Missing, expired or half-written file
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                self._disk_bytes += size
+                over_budget = self.max_disk_bytes is not None and self._disk_bytes > self.max_disk_bytes
+            if over_budget or (self.max_age is not None and now - self._last_sweep > self.max_age):
+                self.sweep_disk(now)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached prediction for ``key``, running ``compute()`` and storing its result on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counts and hit rate since start-up."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
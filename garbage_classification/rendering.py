@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_COLOR = (255, 255, 255)
+LABEL_BACKGROUND = (0, 0, 0)
+
+
+class OverlayRenderer:
+    """Draw detection boxes and labels straight into a numpy frame.
+
+    Text is rasterised once into small sprites (text on its background) and
+    cached, so annotating a frame is a rectangle plus a couple of array copies
+    per box. The category sprite is cached per (category, colour); the item
+    label is composed from a cached per-label prefix and a cached confidence
+    suffix, which keeps the cache bounded while the confidence changes every frame.
+    """
+
+    def __init__(self, title_scale=0.9, label_scale=0.65, text_thickness=2, box_thickness=4, padding=5):
+        self.title_scale = title_scale
+        self.label_scale = label_scale
+        self.text_thickness = text_thickness
+        self.box_thickness = box_thickness
+        self.padding = padding
+        self._sprites = {}
+        self._line_metrics = {}
+
+    def prepare(self, frame):
+        """Return a frame that can be drawn on in place (only copies when it has to)."""
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            return cv2.cvtColor(frame, cv2.COLOR_RGBA2RGB)
+        if not frame.flags.writeable or not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame).copy()
+        return frame
+
+    def draw(self, frame, box, category, color, label, conf):
+        """Annotate one detection on ``frame`` in place and return the frame."""
+        x1, y1, x2, y2 = (int(v) for v in box)
+        color = tuple(int(c) for c in color)
+
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, self.box_thickness)
+
+        title = self.text_sprite(category.upper(), self.title_scale, color)
+        self._blit(frame, title, x1, y1 - title.shape[0])
+
+        label_sprite = np.hstack([
+            self.text_sprite(f"{label} (", self.label_scale, LABEL_BACKGROUND, pad_right=False),
+            self.text_sprite(f"{conf:.1%})", self.label_scale, LABEL_BACKGROUND, pad_left=False),
+        ])
+        self._blit(frame, label_sprite, x1, y1)
+        return frame
+
+    def text_sprite(self, text, scale, background, pad_left=True, pad_right=True):
+        """Rasterise ``text`` on a solid background, cached by its arguments."""
+        key = (text, scale, background, pad_left, pad_right)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            ascent, descent = self._metrics(scale)
+            (width, _), _ = cv2.getTextSize(text, FONT, scale, self.text_thickness)
+            left = self.padding if pad_left else 0
+            right = self.padding if pad_right else 0
+
+            sprite = np.empty((ascent + descent + 2 * self.padding, left + width + right, 3), dtype=np.uint8)
+            sprite[:] = background
+            cv2.putText(sprite, text, (left, self.padding + ascent), FONT, scale,
+                        TEXT_COLOR, self.text_thickness, cv2.LINE_AA)
+            self._sprites[key] = sprite
+        return sprite
+
+    def _metrics(self, scale):
+        """Line ascent/descent for a font scale, so all sprites of one scale share a height."""
+        metrics = self._line_metrics.get(scale)
+        if metrics is None:
+            (_, ascent), baseline = cv2.getTextSize("Hg(", FONT, scale, self.text_thickness)
+            metrics = (ascent, baseline + self.text_thickness)
+            self._line_metrics[scale] = metrics
+        return metrics
+
+    @staticmethod
+    def _blit(frame, sprite, x, y):
+        """Copy ``sprite`` into ``frame`` with its top-left corner at (x, y), clipped to the frame."""
+        height, width = frame.shape[:2]
+        sh, sw = sprite.shape[:2]
+        fx1, fy1 = max(x, 0), max(y, 0)
+        fx2, fy2 = min(x + sw, width), min(y + sh, height)
+        if fx1 >= fx2 or fy1 >= fy2:
+            return
+        frame[fy1:fy2, fx1:fx2] = sprite[fy1 - y:fy2 - y, fx1 - x:fx2 - x]
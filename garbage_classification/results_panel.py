@@ -0,0 +1,87 @@
+import numpy as np
+
+# Placeholders swapped in while compiling item fragments; never present in real labels
+_NUMBER = "\x00"
+_CONFIDENCE = "\x01"
+
+
+class ResultsPanel:
+    """Build the classification results panel from HTML fragments compiled once per class.
+
+    ``item_template`` is formatted for every class id up front (label, category,
+    reasoning) and split around the item number and confidence, so a frame's
+    panel is a join of ready-made strings. ``update`` returns ``None`` when the
+    detections are materially the same as the last panel sent to that session
+    (same classes in the same order, every confidence less than ``conf_step``
+    away from what that panel shows), so the caller can skip re-sending it.
+
+    Templates use ``str.format`` fields:
+        layout:           {summary}, {items}
+        summary_template: {category}, {category_upper}, {count}, {percentage}, {plural}
+        item_template:    {label}, {category}, {category_upper}, {reasoning}, {number}, {confidence}
+    """
+
+    def __init__(self, class_table, layout, summary_template, item_template, empty_html,
+                 hide_empty_categories=False, conf_step=0.05):
+        self.class_table = class_table
+        self.layout = layout
+        self.summary_template = summary_template
+        self.empty_html = empty_html
+        self.hide_empty_categories = hide_empty_categories
+        self.conf_step = conf_step
+
+        # (before number, between number and confidence, after confidence) per class id
+        self.item_fragments = []
+        for label, category, reasoning in zip(class_table.labels, class_table.categories, class_table.reasons):
+            compiled = item_template.format(
+                label=label, category=category, category_upper=category.upper(), reasoning=reasoning,
+                number=_NUMBER, confidence=_CONFIDENCE,
+            )
+            head, rest = compiled.split(_NUMBER)
+            middle, tail = rest.split(_CONFIDENCE)
+            self.item_fragments.append((head, middle, tail))
+
+    def signature(self, class_ids, confs):
+        """What the panel shows: the class ids in order and their confidences."""
+        return tuple(np.asarray(class_ids, dtype=np.int64).tolist()), np.asarray(confs, dtype=np.float32)
+
+    def unchanged(self, shown, signature):
+        """Whether a panel built from ``signature`` would look the same as the ``shown`` one."""
+        if shown is None or shown[0] != signature[0]:
+            return False
+        # Compared against the panel actually sent, so slow drift still adds up to an update
+        return len(signature[1]) == 0 or float(np.abs(signature[1] - shown[1]).max()) < self.conf_step
+
+    def render(self, class_ids, confs):
+        """Panel HTML for detections given as parallel class id / confidence sequences."""
+        if len(class_ids) == 0:
+            return self.empty_html
+
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        category_ids = self.class_table.category_ids[class_ids]
+        counts = np.bincount(category_ids[category_ids >= 0], minlength=len(self.class_table.category_names))
+        total = len(class_ids)
+
+        summary = []
+        for category, count in zip(self.class_table.category_names, counts.tolist()):
+            if count == 0 and self.hide_empty_categories:
+                continue
+            summary.append(self.summary_template.format(
+                category=category, category_upper=category.upper(), count=count,
+                percentage=count / total * 100, plural="s" if count > 1 else "",
+            ))
+
+        items = []
+        for number, (class_id, conf) in enumerate(zip(class_ids.tolist(), confs), start=1):
+            head, middle, tail = self.item_fragments[class_id]
+            items.append(f"{head}{number}{middle}{conf:.1%}{tail}")
+
+        return self.layout.format(summary="".join(summary), items="".join(items))
+
+    def update(self, session, class_ids, confs):
+        """Panel HTML for this frame, or ``None`` if the session already shows the same detections."""
+        signature = self.signature(class_ids, confs)
+        if self.unchanged(session.panel_signature, signature):
+            return None
+        session.panel_signature = signature
+        return self.render(class_ids, confs)
@@ -0,0 +1,397 @@
+"""SQLite index of training runs, their metrics and measured CPU latency, for picking a model to deploy.
+
+Every folder under ``runs/detect`` (and any other ``--root``) is parsed once:
+``args.yaml`` for the settings, ``results.csv`` for the best epoch's metrics
+(chosen by ultralytics' fitness, the epoch ``best.pt`` is saved from), and the
+weights. Folders are re-read only when one of those files changes. Latency is
+measured on demand and stored per weights hash, image size, device and
+backend, so it survives re-indexing.
+
+With ``MODEL_PATH`` unset or set to ``registry``, the demos and the upload app
+serve the best indexed run by val mAP50-95 among runs trained on the same
+class names as ``REGISTRY_DATA`` (so a run on another dataset never replaces
+the 42-class model the category table expects), optionally only among runs
+measured under ``MODEL_MAX_LATENCY_MS``.
+
+Examples:
+    run-registry update
+    run-registry measure --imgsz 640
+    run-registry best --max-latency-ms 60
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import yaml
+
+from garbage_classification.model import BACKENDS, model_identity, resolve_backend_path
+from garbage_classification.utils import load_dataset_config
+
+REGISTRY_PATH = os.getenv("RUN_REGISTRY", "runs/registry.sqlite")
+DEFAULT_ROOTS = ("runs/detect",)
+
+# ``MODEL_PATH`` value that asks the registry for the model, and what to serve if it has none
+REGISTRY_SPEC = "registry"
+FALLBACK_MODEL_PATH = "runs/detect/train24/weights/best.pt"
+
+# Dataset whose class names a served run must have been trained on
+REGISTRY_DATA = os.getenv("REGISTRY_DATA", "YOLO-Waste-Detection-1")
+
+# Ultralytics' fitness: the epoch with the highest value is the one saved as best.pt
+FITNESS_WEIGHTS = {"metrics/mAP50(B)": 0.1, "metrics/mAP50-95(B)": 0.9}
+RESULT_COLUMNS = {
+    "precision": "metrics/precision(B)",
+    "recall": "metrics/recall(B)",
+    "map50": "metrics/mAP50(B)",
+    "map50_95": "metrics/mAP50-95(B)",
+}
+METRICS = tuple(RESULT_COLUMNS) + ("test_map50_95",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT PRIMARY KEY,
+    name TEXT,
+    mode TEXT,
+    model TEXT,
+    data TEXT,
+    imgsz INTEGER,
+    epochs INTEGER,
+    epochs_done INTEGER,
+    best_epoch INTEGER,
+    precision REAL,
+    recall REAL,
+    map50 REAL,
+    map50_95 REAL,
+    test_map50_95 REAL,
+    weights TEXT,
+    weights_hash TEXT,
+    names TEXT,
+    signature TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS latency (
+    weights_hash TEXT,
+    imgsz INTEGER,
+    device TEXT,
+    backend TEXT,
+    ms REAL,
+    measured_at REAL,
+    PRIMARY KEY (weights_hash, imgsz, device, backend)
+);
+"""
+
+
+def file_signature(paths):
+    """Size and modification time of the files a run's entry is built from."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            signature.append([os.path.basename(path), None, None])
+    return json.dumps(signature)
+
+
+def read_results(results_csv):
+    """Metrics of the best-fitness epoch and the number of finished epochs from ``results.csv``."""
+    try:
+        with open(results_csv, "r", newline="") as f:
+            rows = [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(f)]
+    except OSError:
+        return {}
+    best, best_fitness = None, float("-inf")
+    for row in rows:
+        try:
+            fitness = sum(weight * float(row[column]) for column, weight in FITNESS_WEIGHTS.items())
+        except (KeyError, ValueError):
+            continue
+        if fitness > best_fitness:
+            best, best_fitness = row, fitness
+    if best is None:
+        return {"epochs_done": len(rows)}
+    return {
+        "epochs_done": len(rows),
+        "best_epoch": int(float(best.get("epoch", 0))),
+        **{name: float(best[column]) for name, column in RESULT_COLUMNS.items() if best.get(column)},
+    }
+
+
+def class_names(config):
+    """Class names of a dataset config as a list ordered by class id (``names`` may be a list or a dict)."""
+    names = (config or {}).get("names")
+    if isinstance(names, dict):
+        return [names[i] for i in sorted(names)]
+    return list(names) if names else None
+
+
+def read_class_names(data):
+    """Class names of the dataset a run was trained on, from the ``data`` entry of its ``args.yaml``.
+
+    Runs trained on Windows store backslash paths. Returns ``None`` if the
+    dataset config can't be found.
+    """
+    if not data:
+        return None
+    path = str(data).replace("\\", "/")
+    if os.path.isdir(path):
+        path = os.path.join(path, "data.yaml")
+    try:
+        with open(path, "r") as f:
+            return class_names(yaml.safe_load(f))
+    except (OSError, yaml.YAMLError):
+        return None
+
+
+def serving_class_names(dataset_dir=REGISTRY_DATA):
+    """Class names the served model must have, or ``None`` (no filter) if the dataset isn't available."""
+    try:
+        return class_names(load_dataset_config(dataset_dir))
+    except OSError:
+        return None
+
+
+def report_path(name, reports_dir="reports"):
+    """Where ``train-model`` writes the report of a run."""
+    return os.path.join(reports_dir, f"train_{name}.json")
+
+
+def read_test_metric(name):
+    """Test mAP50-95 from the ``train-model`` report of a run, if there is one."""
+    try:
+        with open(report_path(name), "r") as f:
+            return json.load(f).get("test", {}).get("mAP50-95")
+    except (OSError, ValueError):
+        return None
+
+
+class RunRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(runs)")}
+        if "names" not in columns:
+            # Registries created before class names were stored: add the column and re-read every run
+            self.db.execute("ALTER TABLE runs ADD COLUMN names TEXT")
+            self.db.execute("UPDATE runs SET signature = NULL")
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def update(self, roots=DEFAULT_ROOTS, verbose=True):
+        """Index new and changed run folders and drop ones that disappeared; returns how many were (re)read."""
+        start = time.perf_counter()
+        known = {row["path"]: row["signature"] for row in self.db.execute("SELECT path, signature FROM runs")}
+        seen, changed = set(), 0
+        for root in roots:
+            if not os.path.isdir(root):
+                continue
+            for name in sorted(os.listdir(root)):
+                run_dir = os.path.join(root, name)
+                if not os.path.isdir(run_dir):
+                    continue
+                weights = os.path.join(run_dir, "weights", "best.pt")
+                files = [os.path.join(run_dir, "args.yaml"), os.path.join(run_dir, "results.csv"), weights,
+                         report_path(name)]
+                signature = file_signature(files)
+                seen.add(run_dir)
+                if known.get(run_dir) == signature:
+                    continue
+                self._index(run_dir, name, weights, signature)
+                changed += 1
+
+        gone = set(known) - seen
+        self.db.executemany("DELETE FROM runs WHERE path = ?", [(path,) for path in gone])
+        self.db.commit()
+        if verbose:
+            print(f"Run registry: {len(seen)} runs, {changed} indexed, {len(gone)} removed "
+                  f"({time.perf_counter() - start:.2f}s)")
+        return changed
+
+    def _index(self, run_dir, name, weights, signature):
+        args = {}
+        if os.path.exists(os.path.join(run_dir, "args.yaml")):
+            with open(os.path.join(run_dir, "args.yaml"), "r") as f:
+                args = yaml.safe_load(f) or {}
+        has_weights = os.path.exists(weights)
+        row = {
+            "path": run_dir,
+            "name": name,
+            "mode": args.get("mode", "val" if name.startswith("val") else None),
+            "model": args.get("model"),
+            "data": args.get("data"),
+            "imgsz": args.get("imgsz"),
+            "epochs": args.get("epochs"),
+            "epochs_done": None, "best_epoch": None,
+            **dict.fromkeys(RESULT_COLUMNS),
+            **read_results(os.path.join(run_dir, "results.csv")),
+            "test_map50_95": read_test_metric(name),
+            "weights": weights if has_weights else None,
+            "weights_hash": model_identity(weights) if has_weights else None,
+            "names": json.dumps(read_class_names(args.get("data"))),
+            "signature": signature,
+            "indexed_at": time.time(),
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        self.db.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})", list(row.values()))
+
+    def runs(self, device="cpu", backend="pytorch", imgsz=None):
+        """Every indexed run with its latency stored at ``imgsz`` (default: its training size), best first.
+
+        ``latency_ms`` is ``None`` if the run wasn't measured at that size.
+        """
+        return [dict(row) for row in self.db.execute(
+            "SELECT runs.*, latency.ms AS latency_ms FROM runs LEFT JOIN latency "
+            "ON latency.weights_hash = runs.weights_hash AND latency.imgsz = COALESCE(?, runs.imgsz) "
+            "AND latency.device = ? AND latency.backend = ? "
+            "ORDER BY runs.map50_95 IS NULL, runs.map50_95 DESC, runs.path", (imgsz, device, backend),
+        )]
+
+    def best(self, metric="map50_95", max_latency_ms=None, imgsz=None, device="cpu", backend="pytorch", names=None):
+        """Run with the highest ``metric`` that has weights (and a measured latency under the budget, if given).
+
+        The budget applies to the latency measured at ``imgsz`` (default: each
+        run's training size), so it is checked at the size the model is served at.
+        With ``names``, only runs trained on exactly those class names qualify;
+        runs whose dataset config couldn't be read are skipped too.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+        names = json.dumps(list(names)) if names is not None else None
+        candidates = [
+            run for run in self.runs(device, backend, imgsz)
+            if run["weights"] and run[metric] is not None
+            and (names is None or run["names"] == names)
+            and (max_latency_ms is None or (run["latency_ms"] is not None and run["latency_ms"] <= max_latency_ms))
+        ]
+        return max(candidates, key=lambda run: run[metric], default=None)
+
+    def measure(self, run, device="cpu", backend="pytorch", imgsz=None, runs=20):
+        """Time single-image inference for a run's weights and store it; returns milliseconds."""
+        imgsz = imgsz or run["imgsz"] or 640
+        ms = measure_latency(resolve_backend_path(run["weights"], backend), imgsz, device, runs)
+        self.db.execute(
+            "INSERT OR REPLACE INTO latency (weights_hash, imgsz, device, backend, ms, measured_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (run["weights_hash"], imgsz, device, backend, ms, time.time()),
+        )
+        self.db.commit()
+        return ms
+
+
+def measure_latency(weights, imgsz=640, device="cpu", runs=20, warmup=3):
+    """Median single-image inference time in milliseconds on a synthetic frame."""
+    from ultralytics import YOLO
+
+    model = YOLO(weights, task="detect")
+    frame = np.random.default_rng(0).integers(0, 255, (imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(warmup):
+        model.predict(frame, imgsz=imgsz, device=device, verbose=False)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict(frame, imgsz=imgsz, device=device, verbose=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def resolve_model_path(value, fallback=FALLBACK_MODEL_PATH, max_latency_ms=None, imgsz=None):
+    """``MODEL_PATH`` as given, or the best registered run's weights when it is ``registry``.
+
+    The registry is refreshed first (cheap when nothing changed). A latency
+    budget is checked against measurements at ``imgsz``, by default the
+    serving ``IMGSZ``. Falls back to ``fallback`` when no indexed run qualifies.
+    """
+    if value != REGISTRY_SPEC:
+        return value
+    if max_latency_ms is None and os.getenv("MODEL_MAX_LATENCY_MS"):
+        max_latency_ms = float(os.getenv("MODEL_MAX_LATENCY_MS"))
+    if imgsz is None:
+        imgsz = int(os.getenv("IMGSZ", "640"))
+    registry = RunRegistry()
+    try:
+        registry.update()
+        run = registry.best(max_latency_ms=max_latency_ms, imgsz=imgsz, names=serving_class_names())
+    finally:
+        registry.close()
+    if run is None:
+        budget = f" under {max_latency_ms:g} ms" if max_latency_ms is not None else ""
+        print(f"No registered {REGISTRY_DATA} run with weights{budget}; using {fallback}")
+        return fallback
+    latency = f", {run['latency_ms']:.0f} ms at {imgsz}px" if run["latency_ms"] is not None else ""
+    print(f"Using {run['weights']} from the run registry (mAP50-95 {run['map50_95']:.4f}{latency})")
+    return run["weights"]
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def print_runs(runs):
+    print(f"{'run':<28}{'mode':<7}{'imgsz':>6}{'epochs':>8}{'P':>8}{'R':>8}{'mAP50':>8}{'mAP50-95':>10}"
+          f"{'test':>8}{'ms':>8}  weights")
+    for run in runs:
+        epochs = f"{run['epochs_done']}/{run['epochs']}" if run["epochs_done"] is not None else fmt(run["epochs"], "")
+        print(f"{run['path']:<28}{run['mode'] or '-':<7}{fmt(run['imgsz'], ''):>6}{epochs:>8}"
+              f"{fmt(run['precision'], '.3f'):>8}{fmt(run['recall'], '.3f'):>8}{fmt(run['map50'], '.3f'):>8}"
+              f"{fmt(run['map50_95'], '.4f'):>10}{fmt(run['test_map50_95'], '.4f'):>8}"
+              f"{fmt(run['latency_ms'], '.1f'):>8}  {'yes' if run['weights'] else '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registry", default=REGISTRY_PATH)
+    parser.add_argument("--root", nargs="+", default=list(DEFAULT_ROOTS), help="Folders that contain run folders")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--backend", choices=BACKENDS, default="pytorch")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("update", help="Index new and changed runs")
+    list_parser = sub.add_parser("list", help="Show every run")
+    list_parser.add_argument("--imgsz", type=int, default=None, help="Show latency measured at this size")
+
+    measure_parser = sub.add_parser("measure", help="Measure inference latency of runs with weights")
+    measure_parser.add_argument("--imgsz", type=int, default=None, help="Default: each run's training size")
+    measure_parser.add_argument("--runs", type=int, default=20, help="Timed inferences per model")
+    measure_parser.add_argument("--force", action="store_true", help="Measure again even if already stored")
+
+    best_parser = sub.add_parser("best", help="Print the weights of the best run (for MODEL_PATH)")
+    best_parser.add_argument("--metric", choices=METRICS, default="map50_95")
+    best_parser.add_argument("--max-latency-ms", type=float, default=None)
+    best_parser.add_argument("--imgsz", type=int, default=None,
+                             help="Size the latency budget is checked at (default: each run's training size)")
+    best_parser.add_argument("--data", default=REGISTRY_DATA,
+                             help="Only runs trained on this dataset's class names (\"\" for any run)")
+    args = parser.parse_args()
+
+    registry = RunRegistry(args.registry)
+    # Keep ``best`` output to the path alone so it can be used as MODEL_PATH=$(run-registry best)
+    registry.update(args.root, verbose=args.command != "best")
+    if args.command == "list":
+        print_runs(registry.runs(args.device, args.backend, args.imgsz))
+    elif args.command == "measure":
+        for run in registry.runs(args.device, args.backend, args.imgsz):
+            if not run["weights"] or (run["latency_ms"] is not None and not args.force):
+                continue
+            ms = registry.measure(run, args.device, args.backend, args.imgsz, args.runs)
+            print(f"{run['path']}: {ms:.1f} ms at {args.imgsz or run['imgsz']}px on {args.device} ({args.backend})")
+    elif args.command == "best":
+        names = serving_class_names(args.data) if args.data else None
+        run = registry.best(args.metric, args.max_latency_ms, args.imgsz, args.device, args.backend, names)
+        if run is None:
+            raise SystemExit("No run matches (measure latency first with `run-registry measure`)")
+        print(run["weights"])
+    registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from garbage_classification.motion import MotionGate
+from garbage_classification.tracking import BoxTracker
+
+
+class StreamSession:
+    """Detection state for a single webcam stream.
+
+    Each browser session gets its own instance (through ``gr.State``) so
+    concurrent users no longer overwrite each other's results. When
+    ``motion_threshold`` is positive, a ``MotionGate`` skips detector runs
+    while the scene is unchanged.
+    """
+
+    def __init__(self, detect_every=3, motion_threshold=0.0, **tracker_kwargs):
+        self.detect_every = max(1, int(detect_every))
+        self.tracker = BoxTracker(**tracker_kwargs)
+        self.motion = MotionGate(threshold=motion_threshold) if motion_threshold > 0 else None
+        self.frame_index = 0
+        self.panel_signature = None  # What the results panel last sent to this session shows
+
+    def next_frame(self, stride=1):
+        """Advance to the next frame and return whether the detector should run on it.
+
+        ``stride`` thins detector runs further, e.g. a ``LatencyController`` stride under load.
+        """
+        run_detector = self.frame_index % (self.detect_every * max(1, stride)) == 0
+        self.frame_index += 1
+        return run_detector
+
+    def scene_changed(self, frame):
+        """Whether the frame differs from the last one the detector saw (always True without a gate)."""
+        return self.motion is None or self.motion.changed(frame)
@@ -0,0 +1,123 @@
+"""Tune one confidence threshold per class on cached validation predictions.
+
+Uses the prediction cache from ``eval_cache`` (collected on the first run).
+For every class, precision and recall at IoU 0.5 are computed for every
+threshold on a grid with a single 2-D ``bincount``, and the threshold with the
+best F-score is kept (the highest one on ties). Classes with too few
+validation boxes, or with no correct prediction at all, keep the global
+threshold. The table is written as JSON; point ``CLASS_THRESHOLDS`` (or the
+``--thresholds`` option of the batch tools) at it to use it.
+
+Example:
+    tune-thresholds --weights runs/detect/train24/weights/best.pt --data YOLO-Waste-Detection-1 --output class_thresholds.json
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from garbage_classification.detections import CONF_THRESHOLD
+from garbage_classification.eval_cache import EvalCache, collect, true_positives
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+
+DEFAULT_GRID = np.round(np.arange(0.05, 0.951, 0.01), 2)
+
+
+def threshold_curves(cache, grid=DEFAULT_GRID):
+    """Per class and grid threshold: ``(true positives, predictions, ground-truth boxes)``."""
+    nc = len(cache.names)
+    tp = true_positives(cache.pred_xyxy, cache.pred_cls, cache.pred_image, cache.gt_xyxy, cache.gt_cls,
+                        cache.gt_image, cache.num_images)[:, 0]
+
+    # Bucket = number of grid thresholds at or below the box's confidence; a box counts for threshold g
+    # when its bucket is above g, so a reversed cumulative sum over buckets gives every threshold at once
+    # (compared in float32, like ``extract_detections`` compares confidences against a loaded table)
+    buckets = np.searchsorted(grid.astype(np.float32), cache.pred_conf, side="right")
+    flat = cache.pred_cls * (len(grid) + 1) + buckets
+    size = nc * (len(grid) + 1)
+    pred_hist = np.bincount(flat, minlength=size).reshape(nc, -1)
+    tp_hist = np.bincount(flat, weights=tp, minlength=size).reshape(nc, -1)
+    preds_at = np.cumsum(pred_hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    tp_at = np.cumsum(tp_hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    return tp_at, preds_at, np.bincount(cache.gt_cls, minlength=nc)
+
+
+def tune(cache, grid=DEFAULT_GRID, beta=1.0, min_instances=5, default=CONF_THRESHOLD):
+    """Best threshold per class by F-beta; returns the table written by ``main``."""
+    tp_at, preds_at, n_gt = threshold_curves(cache, grid)
+    precision = np.divide(tp_at, preds_at, out=np.zeros_like(tp_at), where=preds_at > 0)
+    recall = np.divide(tp_at, n_gt[:, None], out=np.zeros_like(tp_at), where=n_gt[:, None] > 0)
+    b2 = beta ** 2
+    denominator = b2 * precision + recall
+    score = np.divide((1 + b2) * precision * recall, denominator, out=np.zeros_like(tp_at), where=denominator > 0)
+
+    # Ties go to the highest threshold; classes the model never gets right keep the default
+    best = len(grid) - 1 - score[:, ::-1].argmax(axis=1)
+    tuned = (n_gt >= min_instances) & (score.max(axis=1) > 0)
+    thresholds = np.where(tuned, grid[best], default)
+
+    classes = {}
+    for c, name in enumerate(cache.names):
+        g = best[c] if tuned[c] else min(np.searchsorted(grid, default), len(grid) - 1)
+        classes[name] = {"instances": int(n_gt[c]), "tuned": bool(tuned[c]), "precision": float(precision[c, g]),
+                         "recall": float(recall[c, g]), "f": float(score[c, g])}
+    return {
+        "model": cache.meta["model"],
+        "weights": cache.meta["weights"],
+        "split": cache.meta["split"],
+        "beta": beta,
+        "default": default,
+        "thresholds": {name: float(t) for name, t in zip(cache.names, thresholds)},
+        "classes": classes,
+        "overall": {"global": overall(tp_at, preds_at, n_gt, grid, np.full(len(n_gt), default)),
+                    "per_class": overall(tp_at, preds_at, n_gt, grid, thresholds)},
+    }
+
+
+def overall(tp_at, preds_at, n_gt, grid, thresholds):
+    """Micro-averaged precision and recall when every class uses its entry in ``thresholds``."""
+    columns = np.minimum(np.searchsorted(grid, thresholds - 1e-9), len(grid) - 1)
+    rows = np.arange(len(thresholds))
+    tp, preds = tp_at[rows, columns].sum(), preds_at[rows, columns].sum()
+    return {"precision": float(tp / max(preds, 1)), "recall": float(tp / max(n_gt.sum(), 1)), "boxes": int(preds)}
+
+
+def print_table(table, limit=None):
+    rows = sorted(table["classes"].items(), key=lambda item: table["thresholds"][item[0]])
+    print(f"{'class':<36}{'boxes':>7}{'thresh':>8}{'P':>8}{'R':>8}")
+    for name, row in rows[:limit]:
+        marker = "" if row["tuned"] else "  (default)"
+        print(f"{name:<36}{row['instances']:>7}{table['thresholds'][name]:>8.2f}{row['precision']:>8.3f}"
+              f"{row['recall']:>8.3f}{marker}")
+    for label, key in [(f"Global {table['default']:.2f}", "global"), ("Per class", "per_class")]:
+        stats = table["overall"][key]
+        print(f"{label:<12} precision {stats['precision']:.4f}  recall {stats['recall']:.4f}  "
+              f"kept boxes {stats['boxes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=os.getenv("MODEL_PATH", REGISTRY_SPEC),
+                        help="Weights, or \"registry\" for the best indexed run")
+    parser.add_argument("--data", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--split", default="val")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--beta", type=float, default=1.0, help="F-beta to maximise (>1 favours recall)")
+    parser.add_argument("--min-instances", type=int, default=5, help="Fewer validation boxes keep the default")
+    parser.add_argument("--default", type=float, default=CONF_THRESHOLD, help="Threshold for untuned classes")
+    parser.add_argument("--output", default="class_thresholds.json")
+    args = parser.parse_args()
+    args.weights = resolve_model_path(args.weights)
+
+    cache = EvalCache(collect(args.weights, args.data, args.split, args.imgsz))
+    table = tune(cache, beta=args.beta, min_instances=args.min_instances, default=args.default)
+    print_table(table)
+    with open(args.output, "w") as f:
+        json.dump(table, f, indent=2)
+    print(f"\nThresholds written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import time
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two arrays of xyxy boxes, shape (len(a), len(b))."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class Track:
+    """A single tracked object smoothed with a constant-velocity alpha-beta filter."""
+
+    def __init__(self, track_id, box, conf, class_id, now):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # Pixels per second for x1, y1, x2, y2
+        self.conf = float(conf)
+        self.class_id = int(class_id)
+        self.hits = 1
+        self.last_seen = now
+        self.last_step = now
+
+    def step(self, now):
+        """Move the box forward along its estimated velocity."""
+        dt = now - self.last_step
+        if dt > 0:
+            self.box = self.box + self.velocity * dt
+            self.last_step = now
+
+    def correct(self, box, conf, now, alpha, beta):
+        """Blend a matched detection into the (already stepped) track state."""
+        dt = max(now - self.last_seen, 1e-3)
+        residual = np.asarray(box, dtype=np.float32) - self.box
+        self.box = self.box + alpha * residual
+        self.velocity = self.velocity + (beta / dt) * residual
+        self.conf = float(conf)
+        self.hits += 1
+        self.last_seen = now
+
+
+class BoxTracker:
+    """Carry detections forward between detector runs using IoU matching.
+
+    Detections are matched to existing tracks of the same class greedily by IoU.
+    Between detector runs ``predict`` moves every track along its velocity so the
+    boxes keep up with the object, and a track is dropped once it has gone
+    ``max_age`` seconds without a matching detection.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=1.0, min_hits=1, alpha=0.6, beta=0.1):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.alpha = alpha
+        self.beta = beta
+        self.tracks = []
+        self._next_id = 1
+
+    def predict(self, now=None):
+        """Advance all tracks to ``now`` and drop the ones that have expired."""
+        now = time.monotonic() if now is None else now
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+        for track in self.tracks:
+            track.step(now)
+
+    def hold(self, now=None):
+        """Keep every track where it is and alive, for frames where the scene is known to be static."""
+        now = time.monotonic() if now is None else now
+        for track in self.tracks:
+            track.velocity[:] = 0
+            track.last_seen = now
+            track.last_step = now
+
+    def update(self, boxes, confs, class_ids, now=None):
+        """Match a fresh set of detections (xyxy boxes, confidences, class ids) to the tracks."""
+        now = time.monotonic() if now is None else now
+        self.predict(now)
+
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confs = np.asarray(confs, dtype=np.float32).reshape(-1)
+        class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+
+        matched_tracks = set()
+        matched_dets = set()
+        if self.tracks and len(boxes):
+            track_boxes = np.stack([t.box for t in self.tracks])
+            track_classes = np.array([t.class_id for t in self.tracks])
+            iou = iou_matrix(track_boxes, boxes)
+            iou[track_classes[:, None] != class_ids[None, :]] = 0.0
+
+            # Greedy assignment, best overlaps first
+            for flat in np.argsort(-iou, axis=None):
+                t, d = np.unravel_index(flat, iou.shape)
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_dets:
+                    continue
+                self.tracks[t].correct(boxes[d], confs[d], now, self.alpha, self.beta)
+                matched_tracks.add(t)
+                matched_dets.add(d)
+
+        for d in range(len(boxes)):
+            if d not in matched_dets:
+                self.tracks.append(Track(self._next_id, boxes[d], confs[d], class_ids[d], now))
+                self._next_id += 1
+
+    def active_tracks(self):
+        """Tracks that have been confirmed by at least ``min_hits`` detections."""
+        return [t for t in self.tracks if t.hits >= self.min_hits]
@@ -0,0 +1,307 @@
+"""Shrink the detector for CPU kiosks: distill into a narrower student, prune channels, fine-tune.
+
+Steps, each saved as an ordinary ultralytics checkpoint under ``runs/detect``
+(so ``MODEL_PATH`` and the run registry pick them up like any training run):
+
+1. ``distill``: the teacher labels the training images; its confident boxes
+   that no ground-truth box covers are added to the labels, and a student with
+   narrower layers (``--student-width``) is trained on them from scratch.
+2. ``prune``: channels with the smallest weight magnitudes are removed with
+   ``torch_pruning`` until the model is under the FLOPs budget.
+3. ``finetune``: the pruned model is trained further to recover accuracy.
+
+Every step is validated and timed on CPU; the table of mAP against latency is
+written to ``reports/compress_report.json``. Pruning needs the optional
+``torch-pruning`` package (``pip install garbage-classification[compression]``).
+
+Example:
+    python -m garbage_classification.training.compress --weights runs/detect/train24/weights/best.pt --flops-ratio 0.5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from copy import deepcopy
+
+import numpy as np
+import torch
+import torch.nn as nn
+import yaml
+from ultralytics import YOLO, __version__
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.nn.modules import C2f, Conv, Detect
+from ultralytics.nn.tasks import yaml_model_load
+from ultralytics.utils.torch_utils import get_flops, get_num_params
+
+from garbage_classification.dataset_scan import IMAGE_EXTENSIONS, list_dir
+from garbage_classification.detections import extract_detections
+from garbage_classification.eval_cache import box_iou
+from garbage_classification.label_store import read_label_file
+from garbage_classification.run_registry import REGISTRY_SPEC, measure_latency, resolve_model_path
+from garbage_classification.training.train import box_metrics, fmt
+from garbage_classification.utils import SPLIT_DIRS, load_dataset_config, resolve_data_yaml
+
+WORK_DIR = "runs/compress"
+PRUNED_WEIGHTS = "runs/detect/compress_pruned/weights/best.pt"
+
+# Teacher boxes at least this close to a ground-truth box are already labelled
+PSEUDO_LABEL_IOU = 0.5
+
+
+class C2fSplit(nn.Module):
+    """``C2f`` with its channel split done by two convolutions instead of ``chunk``.
+
+    Same outputs as the block it replaces, but every tensor comes from a
+    convolution, which lets ``torch_pruning`` trace which channels depend on
+    each other.
+    """
+
+    def __init__(self, block):
+        super().__init__()
+        c = block.c
+        self.c = c
+        self.cv0 = Conv(block.cv1.conv.in_channels, c, 1, 1)
+        self.cv1 = Conv(block.cv1.conv.in_channels, c, 1, 1)
+        for half, conv in enumerate((self.cv0, self.cv1)):
+            rows = slice(half * c, (half + 1) * c)
+            conv.conv.weight.data.copy_(block.cv1.conv.weight.data[rows])
+            for name in ("weight", "bias", "running_mean", "running_var"):
+                getattr(conv.bn, name).data.copy_(getattr(block.cv1.bn, name).data[rows])
+        self.cv2 = block.cv2
+        self.m = block.m
+        # Attributes ultralytics' model forward pass and saving rely on
+        for name in ("f", "i", "type", "np"):
+            if hasattr(block, name):
+                setattr(self, name, getattr(block, name))
+
+    def forward(self, x):
+        y = [self.cv0(x), self.cv1(x)]
+        y.extend(m(y[-1]) for m in self.m)
+        return self.cv2(torch.cat(y, 1))
+
+
+def replace_c2f(module):
+    """Swap every ``C2f`` block for the traceable ``C2fSplit`` in place."""
+    for name, child in module.named_children():
+        if isinstance(child, C2f):
+            setattr(module, name, C2fSplit(child))
+        else:
+            replace_c2f(child)
+
+
+class FineTuneTrainer(DetectionTrainer):
+    """Trains the loaded model object itself; the default rebuilds it from its yaml, which would undo pruning."""
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        if not isinstance(weights, nn.Module):
+            return super().get_model(cfg, weights, verbose)
+        for p in weights.parameters():
+            p.requires_grad = True
+        return weights
+
+
+def save_checkpoint(model, path, train_args=None):
+    """Save a model object in the checkpoint layout ``YOLO(path)`` loads."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save({"model": deepcopy(model).half(), "train_args": train_args or {}, "version": __version__,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S")}, path)
+    return path
+
+
+def pseudo_label_dataset(teacher, dataset_dir, out_dir, conf=0.5, imgsz=640, batch=16, device=None):
+    """Training images linked into ``out_dir`` with ground truth plus the teacher's extra boxes; returns a data yaml."""
+    config = load_dataset_config(dataset_dir)
+    split_dir = os.path.join(dataset_dir, SPLIT_DIRS["train"])
+    images = sorted(list_dir(os.path.join(split_dir, "images"), IMAGE_EXTENSIONS).items())
+    if not images:
+        raise FileNotFoundError(f"No images found in {split_dir}/images")
+    labels = list_dir(os.path.join(split_dir, "labels"), (".txt",))
+    os.makedirs(os.path.join(out_dir, "images"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "labels"), exist_ok=True)
+
+    added = 0
+    for first in range(0, len(images), batch):
+        chunk = images[first:first + batch]
+        paths = [os.path.abspath(os.path.join(split_dir, "images", name)) for _, (name, _, _) in chunk]
+        results = teacher.predict(paths, imgsz=imgsz, conf=conf, device=device, verbose=False)
+        for (stem, (name, _, _)), path, result in zip(chunk, paths, results):
+            link = os.path.join(out_dir, "images", name)
+            if not os.path.lexists(link):
+                try:
+                    os.symlink(path, link)
+                except OSError:  # No symlink permission (e.g. Windows without developer mode)
+                    shutil.copy2(path, link)
+
+            class_ids, xywh = np.zeros(0, dtype=np.int16), np.zeros((0, 4), dtype=np.float32)
+            if stem in labels:
+                class_ids, xywh = read_label_file(os.path.join(split_dir, "labels", labels[stem][0]))
+            detections = extract_detections(result, conf)
+            h, w = result.orig_shape
+            boxes = detections.xyxy / np.array([w, h, w, h], dtype=np.float32)
+            gt_boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+            if len(boxes) and len(gt_boxes):
+                new = box_iou(boxes, gt_boxes).max(axis=1) < PSEUDO_LABEL_IOU
+            else:
+                new = np.ones(len(boxes), dtype=bool)
+            extra_xywh = np.concatenate([(boxes[new, :2] + boxes[new, 2:]) / 2, boxes[new, 2:] - boxes[new, :2]], axis=1)
+            added += int(new.sum())
+
+            with open(os.path.join(out_dir, "labels", stem + ".txt"), "w") as f:
+                for class_id, box in zip(np.concatenate([class_ids, detections.class_id[new]]).tolist(),
+                                         np.concatenate([xywh, extra_xywh]).tolist()):
+                    f.write(f"{int(class_id)} " + " ".join(f"{v:.6f}" for v in box) + "\n")
+
+    data_yaml = os.path.join(out_dir, "data.yaml")
+    with open(resolve_data_yaml(dataset_dir), "r") as f:
+        local = yaml.safe_load(f)
+    with open(data_yaml, "w") as f:
+        yaml.safe_dump({
+            "train": os.path.abspath(os.path.join(out_dir, "images")),
+            "val": os.path.join(local["path"], local["val"]),
+            "test": os.path.join(local["path"], local["test"]),
+            "nc": config["nc"],
+            "names": config["names"],
+        }, f, sort_keys=False)
+    print(f"Pseudo-labels: {added} teacher boxes added to {len(images)} training images")
+    return data_yaml
+
+
+def student_config(nc, width, out_dir):
+    """yolov8n architecture with ``width`` as the channel multiplier (yolov8n uses 0.25)."""
+    config = yaml_model_load("yolov8n.yaml")
+    for key in ("scale", "yaml_file"):
+        config.pop(key, None)
+    depth, _, max_channels = config["scales"]["n"]
+    config["scales"] = {"n": [depth, width, max_channels]}
+    config["nc"] = nc
+    # The "n" in the file name tells ultralytics which scale to read
+    path = os.path.join(out_dir, "yolov8n-student.yaml")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return path
+
+
+def prune(weights, out_path, imgsz=640, flops_ratio=0.5, target_gflops=None, steps=20):
+    """Remove low-magnitude channels until the model is under the FLOPs budget; returns the checkpoint path."""
+    import torch_pruning as tp  # Optional dependency, only needed for this step
+
+    source = YOLO(weights)
+    model = deepcopy(source.model).float()
+    replace_c2f(model)
+    for p in model.parameters():
+        p.requires_grad = True
+    model.eval()
+
+    example = torch.randn(1, 3, imgsz, imgsz)
+    base_macs, base_params = tp.utils.count_ops_and_params(model, example)
+    # ultralytics reports GFLOPs as 2 x MACs
+    target_macs = target_gflops * 1e9 / 2 if target_gflops else base_macs * flops_ratio
+    pruner = tp.pruner.MagnitudePruner(
+        model, example, importance=tp.importance.MagnitudeImportance(p=2), iterative_steps=steps,
+        pruning_ratio=0.9, ignored_layers=[m for m in model.modules() if isinstance(m, Detect)],
+    )
+    macs, params = base_macs, base_params
+    for step in range(steps):
+        pruner.step()
+        macs, params = tp.utils.count_ops_and_params(model, example)
+        print(f"Pruning step {step + 1}: {2 * macs / 1e9:.2f} GFLOPs, {params / 1e6:.2f}M parameters")
+        if macs <= target_macs:
+            break
+    print(f"Pruned {2 * base_macs / 1e9:.2f} -> {2 * macs / 1e9:.2f} GFLOPs "
+          f"({base_params / 1e6:.2f}M -> {params / 1e6:.2f}M parameters)")
+    return save_checkpoint(model, out_path, source.ckpt.get("train_args") if source.ckpt else None)
+
+
+def measure(step, weights, data_yaml, imgsz, batch, device, latency_runs):
+    """Validation metrics, size and CPU latency of one step's checkpoint."""
+    model = YOLO(weights)
+    metrics = box_metrics(model.val(data=data_yaml, split="val", imgsz=imgsz, batch=batch, device=device,
+                                    plots=False, verbose=False))
+    latency_ms = measure_latency(weights, imgsz, "cpu", latency_runs)
+    return {
+        "step": step,
+        "weights": weights,
+        "params": get_num_params(model.model),
+        "gflops": get_flops(model.model, imgsz),
+        "mAP50": metrics["mAP50"],
+        "mAP50-95": metrics["mAP50-95"],
+        "cpu_latency_ms": latency_ms,
+        "cpu_fps": 1000 / latency_ms,
+    }
+
+
+def print_report(rows, target_fps):
+    print(f"\n{'step':<10}{'params':>10}{'GFLOPs':>8}{'mAP50':>8}{'mAP50-95':>10}{'CPU ms':>8}{'FPS':>6}")
+    for row in rows:
+        ok = " *" if row["cpu_fps"] >= target_fps else ""
+        print(f"{row['step']:<10}{row['params'] / 1e6:>9.2f}M{row['gflops']:>8.2f}{fmt(row['mAP50'], '.3f'):>8}"
+              f"{fmt(row['mAP50-95'], '.4f'):>10}{row['cpu_latency_ms']:>8.1f}{row['cpu_fps']:>6.1f}{ok}")
+    print(f"* meets the {target_fps:g} FPS target")
+
+
+def compress(args):
+    data_yaml = resolve_data_yaml(args.data)
+    nc = load_dataset_config(args.data)["nc"]
+    common = dict(imgsz=args.imgsz, batch=args.batch, device=args.device, workers=args.workers,
+                  project="runs/detect", exist_ok=True)
+    rows = [measure("teacher", args.weights, data_yaml, args.imgsz, args.batch, args.device, args.latency_runs)]
+    current = args.weights
+
+    if not args.skip_distill:
+        teacher = YOLO(args.weights)
+        pseudo_yaml = pseudo_label_dataset(teacher, args.data, os.path.join(WORK_DIR, "pseudo_labels"),
+                                           args.pseudo_conf, args.imgsz, args.batch, args.device)
+        student = YOLO(student_config(nc, args.student_width, WORK_DIR))
+        student.train(data=pseudo_yaml, epochs=args.distill_epochs, name="compress_student", **common)
+        current = str(student.trainer.best)
+        rows.append(measure("student", current, data_yaml, args.imgsz, args.batch, args.device, args.latency_runs))
+
+    if not args.skip_prune:
+        current = prune(current, PRUNED_WEIGHTS, args.imgsz,
+                        args.flops_ratio, args.target_gflops)
+        rows.append(measure("pruned", current, data_yaml, args.imgsz, args.batch, args.device, args.latency_runs))
+
+        model = YOLO(current)
+        model.train(data=data_yaml, epochs=args.finetune_epochs, name="compress_finetune", trainer=FineTuneTrainer,
+                    **common)
+        current = str(model.trainer.best)
+        rows.append(measure("finetune", current, data_yaml, args.imgsz, args.batch, args.device, args.latency_runs))
+
+    print_report(rows, args.target_fps)
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump({"imgsz": args.imgsz, "target_fps": args.target_fps, "final_weights": current, "steps": rows},
+                  f, indent=2)
+    print(f"\nReport written to {args.report}; final weights: {current} (usable as MODEL_PATH)")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=os.getenv("MODEL_PATH", REGISTRY_SPEC), help="Teacher weights")
+    parser.add_argument("--data", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--device", default=None, help="Training device (latency is always measured on CPU)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--student-width", type=float, default=0.1875, help="Channel multiplier (yolov8n: 0.25)")
+    parser.add_argument("--pseudo-conf", type=float, default=0.5, help="Teacher confidence for pseudo-labels")
+    parser.add_argument("--distill-epochs", type=int, default=50)
+    parser.add_argument("--flops-ratio", type=float, default=0.5, help="Prune to this fraction of the FLOPs")
+    parser.add_argument("--target-gflops", type=float, default=None, help="Absolute budget (overrides the ratio)")
+    parser.add_argument("--finetune-epochs", type=int, default=20)
+    parser.add_argument("--skip-distill", action="store_true", help="Prune the teacher directly")
+    parser.add_argument("--skip-prune", action="store_true", help="Only distill")
+    parser.add_argument("--latency-runs", type=int, default=20)
+    parser.add_argument("--target-fps", type=float, default=15.0)
+    parser.add_argument("--report", default="reports/compress_report.json")
+    args = parser.parse_args()
+    args.weights = resolve_model_path(args.weights)
+    compress(args)
+
+
+if __name__ == "__main__":
+    main()
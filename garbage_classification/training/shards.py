@@ -0,0 +1,248 @@
+"""Pre-decoded, memory-mapped image shards for CPU training.
+
+``pack`` decodes every image of a split once, resizes it the way ultralytics
+does (long side to ``imgsz``, aspect ratio kept) and writes it into the
+top-left corner of a fixed ``imgsz x imgsz`` uint8 slot in ``.npy`` shards.
+An index records each image's shard, slot and original/resized sizes.
+
+During training ``ShardedYOLODataset.load_image`` returns a slice of the
+memory-mapped shard instead of decoding the JPEG, so the data loader workers
+only touch pages the OS already has cached. Shards are opened copy-on-write,
+so in-place augmentations never modify the files.
+
+Examples:
+    python -m garbage_classification.training.shards pack --data YOLO-Waste-Detection-1 --imgsz 320
+    python -m garbage_classification.training.shards compare --data YOLO-Waste-Detection-1 --imgsz 320
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+
+from garbage_classification.utils import SPLIT_DIRS, resolve_data_yaml
+
+SHARDS_DIR = ".shards"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Columns of the per-image index
+INDEX_COLUMNS = ("shard", "slot", "h0", "w0", "h", "w")
+
+
+def shard_dir_for(dataset_dir, split, imgsz):
+    return os.path.join(dataset_dir, SHARDS_DIR, f"{split}_{imgsz}")
+
+
+def resize_long_side(image, imgsz):
+    """Resize so the long side is ``imgsz``, with the same rounding as ultralytics' ``load_image``."""
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image
+
+
+def pack(dataset_dir, split="train", imgsz=640, shard_size=1024, workers=None):
+    """Decode and pack one split into shards; returns the shard directory."""
+    image_dir = os.path.join(dataset_dir, SPLIT_DIRS.get(split, split), "images")
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(IMAGE_EXTENSIONS))
+    if not names:
+        raise FileNotFoundError(f"No images found in {image_dir}")
+
+    out_dir = shard_dir_for(dataset_dir, split, imgsz)
+    os.makedirs(out_dir, exist_ok=True)
+    index = np.zeros((len(names), len(INDEX_COLUMNS)), dtype=np.int32)
+    start = time.perf_counter()
+
+    def load(name):
+        image = cv2.imread(os.path.join(image_dir, name))  # BGR, like ultralytics
+        if image is None:
+            return None, (0, 0)
+        return resize_long_side(image, imgsz), image.shape[:2]
+
+    with ThreadPoolExecutor(workers) as pool:
+        for shard_id, first in enumerate(range(0, len(names), shard_size)):
+            chunk = names[first:first + shard_size]
+            shard = np.lib.format.open_memmap(
+                os.path.join(out_dir, f"shard_{shard_id:04d}.npy"), mode="w+", dtype=np.uint8,
+                shape=(len(chunk), imgsz, imgsz, 3),
+            )
+            # Decoding releases the GIL, so threads decode the chunk in parallel
+            for slot, (image, (h0, w0)) in enumerate(pool.map(load, chunk)):
+                if image is None:
+                    index[first + slot] = (-1, -1, 0, 0, 0, 0)
+                    continue
+                h, w = image.shape[:2]
+                shard[slot, :h, :w] = image
+                index[first + slot] = (shard_id, slot, h0, w0, h, w)
+            shard.flush()
+            del shard
+
+    np.save(os.path.join(out_dir, "index.npy"), index)
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"imgsz": imgsz, "split": split, "columns": INDEX_COLUMNS, "files": names}, f)
+
+    skipped = int((index[:, 0] < 0).sum())
+    print(f"Packed {len(names) - skipped} images ({skipped} unreadable) into {out_dir} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return out_dir
+
+
+class ShardReader:
+    """Look up pre-decoded images by file name; shards are memory-mapped on first use."""
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+        self.imgsz = meta["imgsz"]
+        self.index = np.load(os.path.join(shard_dir, "index.npy"))
+        self.rows = {name: row for row, name in enumerate(meta["files"]) if self.index[row, 0] >= 0}
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, path):
+        return os.path.basename(path) in self.rows
+
+    def _shard(self, shard_id):
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            # Copy-on-write: augmentations that work in place only touch private pages
+            shard = np.load(os.path.join(self.shard_dir, f"shard_{shard_id:04d}.npy"), mmap_mode="c")
+            self._shards[shard_id] = shard
+        return shard
+
+    def get(self, path):
+        """``(image view, (h0, w0), (h, w))`` for ``path``, or ``None`` if it isn't packed."""
+        row = self.rows.get(os.path.basename(path))
+        if row is None:
+            return None
+        shard_id, slot, h0, w0, h, w = self.index[row].tolist()
+        return self._shard(shard_id)[slot, :h, :w], (h0, w0), (h, w)
+
+    def __getstate__(self):
+        # Data loader workers re-open the maps in their own process
+        return {**self.__dict__, "_shards": {}}
+
+
+class ShardedYOLODataset(YOLODataset):
+    """``YOLODataset`` whose images come from pre-decoded shards instead of JPEG decoding."""
+
+    shards = None
+
+    def load_image(self, i, rect_mode=True):
+        if self.ims[i] is None and self.shards is not None and rect_mode and self.imgsz == self.shards.imgsz:
+            packed = self.shards.get(self.im_files[i])
+            if packed is not None:
+                if self.augment:
+                    self._buffer(i, *packed)
+                return packed
+        return super().load_image(i, rect_mode)
+
+    def _buffer(self, i, im, hw0, hw):
+        """Same bookkeeping as ``BaseDataset.load_image``: mosaic draws its other images from ``self.buffer``."""
+        self.ims[i], self.im_hw0[i], self.im_hw[i] = im, hw0, hw
+        self.buffer.append(i)
+        if 1 < len(self.buffer) >= self.max_buffer_length:  # Prevent buffer overflow
+            j = self.buffer.pop(0)
+            if self.cache != "ram":
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
+
+class ShardedDetectionTrainer(DetectionTrainer):
+    """``DetectionTrainer`` that reads packed splits and reports how long each epoch took.
+
+    Splits that haven't been packed for the training ``imgsz`` fall back to
+    normal decoding, as does everything when ``use_shards`` is False (useful
+    as a timed baseline). Use ``sharded_trainer`` to bind a dataset directory.
+    """
+
+    dataset_dir = None
+    use_shards = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.epoch_times = []
+        self.add_callback("on_train_epoch_start", self._epoch_start)
+        self.add_callback("on_train_epoch_end", self._epoch_end)
+
+    @staticmethod
+    def _epoch_start(trainer):
+        trainer._epoch_started = time.perf_counter()
+
+    @staticmethod
+    def _epoch_end(trainer):
+        trainer.epoch_times.append(time.perf_counter() - trainer._epoch_started)
+        print(f"Epoch {len(trainer.epoch_times)} took {trainer.epoch_times[-1]:.1f}s")
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        dataset = super().build_dataset(img_path, mode, batch)
+        split = "train" if mode == "train" else "val"
+        shard_dir = shard_dir_for(self.dataset_dir, split, self.args.imgsz)
+        if self.use_shards and os.path.exists(os.path.join(shard_dir, "index.npy")):
+            # Same dataset state, only load_image changes; avoids repeating ultralytics' constructor arguments
+            dataset.__class__ = ShardedYOLODataset
+            dataset.shards = ShardReader(shard_dir)
+            print(f"{mode}: reading {len(dataset.shards)} pre-decoded images from {shard_dir}")
+        return dataset
+
+
+def sharded_trainer(dataset_dir, use_shards=True):
+    """Trainer class for ``model.train(trainer=...)`` that reads the shards packed under ``dataset_dir``."""
+    return type("ShardedDetectionTrainer", (ShardedDetectionTrainer,),
+                {"dataset_dir": dataset_dir, "use_shards": use_shards})
+
+
+def compare(dataset_dir, imgsz=320, epochs=1, batch=16, workers=2, weights="yolov8n.pt"):
+    """Train the same short run with and without shards on CPU and report mean epoch time."""
+    data_yaml = resolve_data_yaml(dataset_dir)
+    times = {}
+    for name, use_shards in [("jpeg", False), ("shards", True)]:
+        model = YOLO(weights)
+        model.train(data=data_yaml, epochs=epochs, imgsz=imgsz, batch=batch, workers=workers, device="cpu",
+                    trainer=sharded_trainer(dataset_dir, use_shards), val=False, plots=False,
+                    project="runs/shards", name=name, exist_ok=True)
+        times[name] = float(np.mean(model.trainer.epoch_times))
+
+    print(f"\nMean epoch time: JPEG decoding {times['jpeg']:.1f}s, shards {times['shards']:.1f}s "
+          f"({times['jpeg'] / times['shards']:.2f}x faster)")
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--imgsz", type=int, default=320, choices=[320, 640])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = sub.add_parser("pack", help="Decode and pack splits into shards")
+    pack_parser.add_argument("--splits", nargs="+", default=["train", "val"])
+    pack_parser.add_argument("--shard-size", type=int, default=1024, help="Images per shard file")
+    pack_parser.add_argument("--workers", type=int, default=None)
+
+    compare_parser = sub.add_parser("compare", help="Compare epoch time with and without shards")
+    compare_parser.add_argument("--epochs", type=int, default=1)
+    compare_parser.add_argument("--batch", type=int, default=16)
+    compare_parser.add_argument("--workers", type=int, default=2)
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        for split in args.splits:
+            pack(args.data, split, args.imgsz, args.shard_size, args.workers)
+    else:
+        compare(args.data, args.imgsz, args.epochs, args.batch, args.workers)
+
+
+if __name__ == "__main__":
+    main()
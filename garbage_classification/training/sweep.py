@@ -0,0 +1,244 @@
+"""Parallel hyperparameter sweep over the ``hyp.yaml`` keys with early pruning.
+
+Trials are short ultralytics training runs launched as subprocesses, as many
+at a time as the machine has cores for (``--threads`` torch threads each).
+While they run, every trial's ``results.csv`` is polled; from ``--min-epochs``
+on, a trial whose validation mAP50-95 is below the median of the other trials
+at the same epoch is stopped (median pruning). Finished trials are ranked in
+``reports/sweep_leaderboard.json`` and the best values are written as a
+``hyp.yaml``-style file.
+
+Example:
+    python -m garbage_classification.training.sweep --trials 24 --epochs 5 --imgsz 320
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+import yaml
+
+from garbage_classification.utils import resolve_data_yaml
+
+METRIC = "metrics/mAP50-95(B)"
+
+# Search ranges for the hyp.yaml keys: (low, high, "log" | "linear"), or a list of choices
+DEFAULT_SPACE = {
+    "lr0": (1e-4, 1e-1, "log"),
+    "lrf": (1e-3, 1e-1, "log"),
+    "momentum": (0.8, 0.98, "linear"),
+    "weight_decay": (1e-5, 1e-3, "log"),
+    "hsv_h": (0.0, 0.05, "linear"),
+    "hsv_s": (0.3, 0.9, "linear"),
+    "hsv_v": (0.2, 0.6, "linear"),
+    "translate": (0.0, 0.2, "linear"),
+    "scale": (0.2, 0.8, "linear"),
+    "fliplr": (0.0, 0.5, "linear"),
+    "mosaic": (0.5, 1.0, "linear"),
+    "mixup": (0.0, 0.3, "linear"),
+}
+
+
+def load_space(path=None, hyp_path="hyp.yaml"):
+    """Search space from a YAML file (same shape as ``DEFAULT_SPACE``), checked against the keys in ``hyp.yaml``."""
+    space = dict(DEFAULT_SPACE)
+    if path:
+        with open(path, "r") as f:
+            space = {k: tuple(v) if isinstance(v, list) and len(v) == 3 and isinstance(v[2], str) else v
+                     for k, v in yaml.safe_load(f).items()}
+    if os.path.exists(hyp_path):
+        with open(hyp_path, "r") as f:
+            hyp = yaml.safe_load(f) or {}
+        unknown = sorted(set(space) - set(hyp))
+        if unknown:
+            print(f"Note: {', '.join(unknown)} not in {hyp_path}; sweeping them anyway")
+    return space
+
+
+def sample(space, rng):
+    """Draw one configuration from the search space."""
+    config = {}
+    for key, spec in space.items():
+        if isinstance(spec, list):
+            config[key] = rng.choice(spec)
+        else:
+            low, high, scale = spec
+            if scale == "log":
+                config[key] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+            else:
+                config[key] = float(rng.uniform(low, high))
+            config[key] = float(f"{config[key]:.4g}")
+    return config
+
+
+def read_metric(results_csv):
+    """Validation metric per finished epoch from a trial's ``results.csv`` (may still be growing)."""
+    try:
+        with open(results_csv, "r") as f:
+            content = f.read()
+    except OSError:
+        return []
+    # Ignore a last line that is still being written
+    content = content[:content.rfind("\n") + 1]
+    rows = [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(io.StringIO(content))]
+    values = []
+    for row in rows:
+        try:
+            values.append(float(row[METRIC]))
+        except (KeyError, TypeError, ValueError):
+            break
+    return values
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+class Trial:
+    def __init__(self, number, config, project):
+        self.number = number
+        self.name = f"trial_{number:03d}"
+        self.config = config
+        self.dir = os.path.join(project, self.name)
+        self.process = None
+        self.log = None
+        self.started = None
+        self.history = []
+        self.status = "pending"
+        self.seconds = 0.0
+
+    @property
+    def best(self):
+        return max(self.history) if self.history else float("-inf")
+
+
+def launch(trial, args, data_yaml):
+    overrides = {
+        "data": data_yaml, "model": args.weights, "epochs": args.epochs, "imgsz": args.imgsz,
+        "batch": args.batch, "device": args.device, "workers": args.workers, "fraction": args.fraction,
+        "project": args.project, "name": trial.name, "exist_ok": True, "plots": False, "verbose": False,
+        **trial.config,
+    }
+    # Same as the ``yolo detect train key=value ...`` CLI, without depending on the script being on PATH
+    command = [sys.executable, "-c", "from ultralytics.cfg import entrypoint; entrypoint()", "detect", "train"]
+    command += [f"{key}={value}" for key, value in overrides.items()]
+
+    env = dict(os.environ, OMP_NUM_THREADS=str(args.threads), MKL_NUM_THREADS=str(args.threads))
+    os.makedirs(trial.dir, exist_ok=True)
+    log = open(os.path.join(trial.dir, "sweep.log"), "w")
+    trial.process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=env)
+    trial.log = log
+    trial.status = "running"
+    trial.started = time.perf_counter()
+
+
+def should_prune(trial, trials, min_epochs):
+    """Median rule: stop if this trial is below the median of the others at its latest epoch."""
+    epoch = len(trial.history)
+    if epoch < min_epochs:
+        return False
+    peers = [t.history[epoch - 1] for t in trials if t is not trial and len(t.history) >= epoch]
+    return len(peers) >= 2 and trial.history[-1] < median(peers)
+
+
+def sweep(args):
+    rng = random.Random(args.seed)
+    space = load_space(args.space, args.hyp)
+    data_yaml = resolve_data_yaml(args.data)
+    parallel = args.parallel or max(1, (os.cpu_count() or 1) // args.threads)
+    trials = [Trial(i, sample(space, rng), args.project) for i in range(args.trials)]
+    print(f"Sweeping {len(space)} keys with {len(trials)} trials, {parallel} at a time ({args.threads} threads each)")
+
+    start = time.perf_counter()
+    pending = list(trials)
+    running = []
+    try:
+        while pending or running:
+            while pending and len(running) < parallel:
+                trial = pending.pop(0)
+                launch(trial, args, data_yaml)
+                running.append(trial)
+
+            time.sleep(args.poll)
+            for trial in list(running):
+                trial.history = read_metric(os.path.join(trial.dir, "results.csv"))
+                code = trial.process.poll()
+                if code is None and should_prune(trial, trials, args.min_epochs):
+                    trial.process.terminate()
+                    trial.process.wait()
+                    trial.status = f"pruned@{len(trial.history)}"
+                elif code is not None:
+                    trial.status = "done" if code == 0 else f"failed ({code})"
+                else:
+                    continue
+                trial.seconds = time.perf_counter() - trial.started
+                trial.log.close()
+                running.remove(trial)
+                print(f"{trial.name}: {trial.status}, best {METRIC} {trial.best:.4f} after {trial.seconds:.0f}s")
+    finally:
+        # Don't leave training processes behind on Ctrl+C or errors
+        for trial in running:
+            trial.process.terminate()
+
+    return write_leaderboard(trials, args, time.perf_counter() - start)
+
+
+def write_leaderboard(trials, args, elapsed):
+    ranked = sorted((t for t in trials if t.history), key=lambda t: t.best, reverse=True)
+    rows = [
+        {"rank": i + 1, "trial": t.name, "status": t.status, "epochs": len(t.history),
+         "best_map50_95": t.best, "seconds": round(t.seconds, 1), "hyp": t.config}
+        for i, t in enumerate(ranked)
+    ]
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump({"data": args.data, "epochs": args.epochs, "imgsz": args.imgsz, "elapsed_seconds": elapsed,
+                   "trials": rows}, f, indent=2)
+
+    print(f"\n{'rank':<6}{'trial':<12}{'status':<14}{'epochs':>7}{'mAP50-95':>10}")
+    for row in rows[:10]:
+        print(f"{row['rank']:<6}{row['trial']:<12}{row['status']:<14}{row['epochs']:>7}{row['best_map50_95']:>10.4f}")
+    print(f"\nSweep took {elapsed / 3600:.1f}h; leaderboard written to {args.report}")
+
+    if rows:
+        best_path = os.path.join(args.project, "best_hyp.yaml")
+        with open(best_path, "w") as f:
+            yaml.safe_dump(rows[0]["hyp"], f, sort_keys=False)
+        print(f"Best hyperparameters written to {best_path} (copy into hyp.yaml for a full run)")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="YOLO-Waste-Detection-1", help="Dataset directory")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--hyp", default="hyp.yaml", help="Baseline hyperparameters whose keys are swept")
+    parser.add_argument("--space", default=None, help="YAML of search ranges (default: built-in ranges)")
+    parser.add_argument("--trials", type=int, default=16)
+    parser.add_argument("--epochs", type=int, default=5, help="Epochs per trial")
+    parser.add_argument("--min-epochs", type=int, default=2, help="Epochs before a trial can be pruned")
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--fraction", type=float, default=0.25, help="Fraction of the training set per trial")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--threads", type=int, default=2, help="Torch threads per trial")
+    parser.add_argument("--workers", type=int, default=1, help="Data loader workers per trial")
+    parser.add_argument("--parallel", type=int, default=None, help="Concurrent trials (default: cores / threads)")
+    parser.add_argument("--poll", type=float, default=10.0, help="Seconds between results.csv checks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--project", default="runs/sweep")
+    parser.add_argument("--report", default="reports/sweep_leaderboard.json")
+    sweep(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Train the waste detector, then evaluate val and test together and write one metrics report.
+
+The settings of the earlier per-person training scripts are kept as presets
+(``allen``: dataset 2 at 640px with AdamW and ``hyp.yaml`` on GPU 0; ``matt``:
+dataset 1 at 320px on Apple silicon; ``raw``: the Kaggle data in
+``dataset.yaml``). Options given on the command line override the preset.
+
+Before training the dataset is checked with ``dataset_scan``; packed image
+shards (see ``training/shards.py``) are used when they exist for ``imgsz``.
+After training the best weights are loaded once and val and test are
+evaluated concurrently; all metrics go to ``reports/train_<run name>.json``.
+
+Examples:
+    train-model --preset matt
+    train-model --preset allen --epochs 100 --set patience=5
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from ultralytics import YOLO
+
+from garbage_classification.dataset_scan import print_report, scan_dataset
+from garbage_classification.training.shards import sharded_trainer
+from garbage_classification.utils import resolve_data_yaml
+
+PRESETS = {
+    "allen": {
+        "data": "YOLO-Waste-Detection-2", "epochs": 50, "imgsz": 640, "batch": 16, "device": "0",
+        "workers": 4, "hyp": "hyp.yaml", "train_args": {"amp": True, "optimizer": "AdamW", "augment": True},
+    },
+    "matt": {
+        "data": "YOLO-Waste-Detection-1", "epochs": 10, "imgsz": 320, "batch": 8, "device": "mps",
+        "workers": 2, "train_args": {"amp": True, "augment": False},
+    },
+    "raw": {
+        "data": "dataset.yaml", "epochs": 10, "imgsz": 320, "batch": 8, "device": "mps", "workers": 8,
+        "train_args": {},
+    },
+}
+
+# Reported metrics: name -> attribute of ``metrics.box``
+BOX_METRICS = {"precision": "mp", "recall": "mr", "mAP50": "map50", "mAP50-95": "map"}
+
+
+def fmt(value, spec=".4f"):
+    """Format a metric, or ``N/A`` if it is missing (instead of crashing on the format spec)."""
+    return format(value, spec) if isinstance(value, (int, float)) else "N/A"
+
+
+def resolve_data(data):
+    """Dataset directories get a data.yaml with local paths; yaml files are used as they are."""
+    if os.path.isdir(data):
+        return resolve_data_yaml(data)
+    return data
+
+
+def dataset_dir_of(data):
+    if os.path.isdir(data):
+        return data
+    with open(data, "r") as f:
+        path = (yaml.safe_load(f) or {}).get("path")
+    return path if path and os.path.isdir(path) else os.path.dirname(os.path.abspath(data))
+
+
+def box_metrics(metrics):
+    """The reported metrics from an ultralytics ``DetMetrics`` object (``None`` when unavailable)."""
+    box = getattr(metrics, "box", None)
+    values = {name: float(getattr(box, attr)) if box is not None and hasattr(box, attr) else None
+              for name, attr in BOX_METRICS.items()}
+    values["speed_ms"] = dict(getattr(metrics, "speed", {}) or {})
+    names = getattr(metrics, "names", None) or {}
+    if box is not None and len(getattr(box, "ap_class_index", [])):
+        values["per_class_mAP50-95"] = {
+            names.get(int(c), str(int(c))): float(box.maps[int(c)]) for c in box.ap_class_index
+        }
+    return values
+
+
+def evaluate(weights, data_yaml, imgsz, batch, device, splits=("val", "test")):
+    """Evaluate ``weights`` on several splits at once, loading the checkpoint a single time."""
+    model = YOLO(weights)
+    # Each thread needs its own model object (validators keep state on it); copying skips a reload
+    models = [model] + [copy.deepcopy(model) for _ in splits[1:]]
+
+    def run(split, split_model):
+        start = time.perf_counter()
+        metrics = split_model.val(data=data_yaml, split=split, imgsz=imgsz, batch=batch, device=device,
+                                  plots=False, verbose=False)
+        return {**box_metrics(metrics), "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(len(splits)) as pool:
+        futures = {split: pool.submit(run, split, m) for split, m in zip(splits, models)}
+        return {split: future.result() for split, future in futures.items()}
+
+
+def print_metrics(title, values):
+    print(f"\n{title}:")
+    for name in BOX_METRICS:
+        print(f"  {name:<10} {fmt(values.get(name))}")
+
+
+def train(args):
+    data_yaml = resolve_data(args.data)
+
+    if not args.skip_scan:
+        report = scan_dataset(dataset_dir_of(args.data))
+        print_report(report)
+
+    train_args = dict(args.train_args)
+    if args.hyp:
+        with open(args.hyp, "r") as f:
+            train_args.update(yaml.safe_load(f) or {})
+    train_args.update(args.set)
+
+    model = YOLO(args.weights)
+    print(f"Starting YOLOv8 training ({args.epochs} epochs at {args.imgsz}px on {args.device or 'auto'})...")
+    start = time.perf_counter()
+    model.train(
+        data=data_yaml, epochs=args.epochs, imgsz=args.imgsz, batch=args.batch, device=args.device,
+        workers=args.workers, project=args.project, name=args.name, verbose=True,
+        trainer=sharded_trainer(dataset_dir_of(args.data)),
+        **train_args,
+    )
+    train_seconds = time.perf_counter() - start
+    trainer = model.trainer
+    best = str(trainer.best) if os.path.exists(trainer.best) else str(trainer.last)
+
+    print("\nTraining Complete! Evaluating val and test...")
+    results = evaluate(best, data_yaml, args.imgsz, args.batch, args.device)
+    for split, values in results.items():
+        print_metrics(f"{split.capitalize()} ({values['seconds']:.0f}s)", values)
+
+    report = {
+        "name": os.path.basename(str(trainer.save_dir)),
+        "weights": best,
+        "data": data_yaml,
+        "settings": {"epochs": args.epochs, "imgsz": args.imgsz, "batch": args.batch, "device": args.device,
+                     "workers": args.workers, "base_weights": args.weights, **train_args},
+        "train_seconds": train_seconds,
+        "epoch_seconds": trainer.epoch_times,
+        "final_train_metrics": {k: float(v) for k, v in (trainer.metrics or {}).items()},
+        **results,
+    }
+    report_path = args.report or os.path.join("reports", f"train_{report['name']}.json")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {report_path}")
+    return report
+
+
+def parse_set(items):
+    """``key=value`` pairs for extra ``model.train`` arguments, with YAML value parsing."""
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        overrides[key] = yaml.safe_load(value)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="matt")
+    parser.add_argument("--data", help="Dataset directory or data yaml")
+    parser.add_argument("--weights", default="yolov8n.pt", help="Starting checkpoint")
+    parser.add_argument("--epochs", type=int)
+    parser.add_argument("--imgsz", type=int)
+    parser.add_argument("--batch", type=int)
+    parser.add_argument("--device", help="cpu, mps, 0, ... (default: the preset's)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--hyp", help="YAML of hyperparameters passed to model.train (e.g. hyp.yaml)")
+    parser.add_argument("--set", nargs="*", default=[], metavar="KEY=VALUE", help="Extra model.train arguments")
+    parser.add_argument("--skip-scan", action="store_true", help="Don't check the dataset before training")
+    parser.add_argument("--project", default="runs/detect")
+    parser.add_argument("--name", default="train")
+    parser.add_argument("--report", help="Report path (default: reports/train_<run name>.json)")
+    args = parser.parse_args()
+
+    for key, value in PRESETS[args.preset].items():
+        if getattr(args, key, None) is None:
+            setattr(args, key, value)
+    args.set = parse_set(args.set)
+    train(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,18 +62,36 @@
 
 ####################################### Yolo v8 #######################################
 
+import os
 import torch
 import gradio as gr
 from PIL import Image
 from ultralytics import YOLO
+from garbage_classification.model import model_identity
+from garbage_classification.prediction_cache import PredictionCache, content_hash
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
 
 # Load trained YOLO model
-model_dir = "runs/detect/train11/weights/best.pt"  # Change this to your model path
+# "registry" (the default) serves the best indexed run in runs/detect; a path pins those weights
+model_dir = resolve_model_path(os.getenv("MODEL_PATH", REGISTRY_SPEC), fallback="runs/detect/train11/weights/best.pt")
 model = YOLO(model_dir)  # Load custom YOLO model
+model_id = model_identity(model_dir)
+
+# ultralytics' default rather than the demos' shared CONF_THRESHOLD (0.35): this JSON endpoint has always returned
+# every box the model keeps and leaves filtering to the client. Explicit because it is part of the cache key
+API_CONF_THRESHOLD = 0.25
+
+# Re-submitted photos are answered from the cache instead of running the model again
+cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "256")),
+    max_age=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),  # Seconds
+    disk_dir=os.getenv("PREDICTION_CACHE_DIR") or None,
+    max_disk_bytes=int(float(os.getenv("PREDICTION_CACHE_DISK_MB", "512")) * 2**20),
+)
 
-def predict_image(image):
+def run_model(image):
     # Convert image to YOLO format (PIL image)
-    results = model(image)
+    results = model(image, conf=API_CONF_THRESHOLD)
 
     # Extract detections
     detections = results[0].boxes  # Bounding boxes, confidence scores, and class indices
@@ -94,6 +112,12 @@ def predict_image(image):
 
     return predictions
 
+def predict_image(image):
+    if image is None:
+        return []
+    key = cache.key(content_hash(image), model_id, conf=API_CONF_THRESHOLD)
+    return cache.get_or_compute(key, lambda: run_model(image))
+
 # Create Gradio interface
 iface = gr.Interface(
     fn=predict_image,
@@ -0,0 +1,34 @@
+import os
+
+import yaml
+
+# Split folders in the Roboflow YOLO export layout
+SPLIT_DIRS = {"train": "train", "val": "valid", "test": "test"}
+
+
+def load_dataset_config(dataset_dir):
+    """Read a dataset's data.yaml."""
+    with open(os.path.join(dataset_dir, "data.yaml"), "r") as f:
+        return yaml.safe_load(f)
+
+
+def resolve_data_yaml(dataset_dir="YOLO-Waste-Detection-1"):
+    """Write a data.yaml whose split paths point at this checkout and return its path.
+
+    The committed data.yaml files hold absolute paths from the machines they
+    were exported on, so ultralytics can't use them as-is.
+    """
+    config = load_dataset_config(dataset_dir)
+    local = {
+        "path": os.path.abspath(dataset_dir),
+        "train": f"{SPLIT_DIRS['train']}/images",
+        "val": f"{SPLIT_DIRS['val']}/images",
+        "test": f"{SPLIT_DIRS['test']}/images",
+        "nc": config["nc"],
+        "names": config["names"],
+    }
+
+    out_path = os.path.join(dataset_dir, "data.local.yaml")
+    with open(out_path, "w") as f:
+        yaml.safe_dump(local, f, sort_keys=False)
+    return out_path
@@ -0,0 +1,309 @@
+"""Audit recorded bin footage with the live demo's detection pipeline.
+
+The video is processed by three stages running in their own threads and
+connected by bounded queues, so decoding, inference and encoding overlap and
+a slow stage applies back-pressure instead of buffering the whole video:
+
+    decode  -> reads and samples frames (every Nth frame, or keyframes only)
+    infer   -> batches sampled frames through the detector and the box tracker
+    encode  -> draws the overlay, writes the annotated video and the counts CSV
+
+Skipped frames are only grabbed, not decoded, so sampling cuts decode cost as
+well as inference cost. The annotated video is written at the sampled rate,
+and each analysed frame is held until the next one's timestamp, so it lines up
+with the source even when only keyframes are analysed.
+
+Example:
+    analyze-video bin_cam.mp4 --every 5 --output bin_cam_annotated.mp4
+"""
+
+import argparse
+import csv
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from garbage_classification.categories import ClassTable, get_category_info
+from garbage_classification.detections import (CONF_THRESHOLD, Detections, extract_detections, load_class_thresholds,
+                                                predict_conf)
+from garbage_classification.model import BACKENDS, LazyModel, resolve_backend_path
+from garbage_classification.motion import MotionGate
+from garbage_classification.rendering import OverlayRenderer
+from garbage_classification.run_registry import REGISTRY_SPEC, resolve_model_path
+from garbage_classification.tracking import BoxTracker
+
+# A weights path, or "registry" for the best indexed run (see run_registry)
+DEFAULT_WEIGHTS = os.getenv("MODEL_PATH", REGISTRY_SPEC)
+
+# Marks the end of the stream on every queue
+_DONE = object()
+
+
+class Stage(threading.Thread):
+    """Pipeline thread that keeps the first exception so the caller can re-raise it."""
+
+    def __init__(self, name, target, *args):
+        super().__init__(name=name, daemon=True)
+        self._target_fn = target
+        self._args = args
+        self.error = None
+        self.busy_seconds = 0.0
+
+    def run(self):
+        try:
+            self._target_fn(self, *self._args)
+        except BaseException as e:
+            self.error = e
+
+
+def put(q, item, stop):
+    """``q.put`` that gives up once another stage has failed."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def get(q, stop):
+    """``q.get`` that returns the end marker once another stage has failed."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+class VideoAnalytics:
+    """Decode / infer / encode pipeline for one recorded video."""
+
+    def __init__(self, model, every=1, keyframes=False, keyframe_threshold=8.0, batch_size=8,
+                 imgsz=640, conf=CONF_THRESHOLD, queue_size=32, max_age=1.0):
+        self.model = model
+        self.every = max(1, int(every))
+        self.keyframes = keyframes
+        self.keyframe_threshold = keyframe_threshold
+        self.batch_size = max(1, int(batch_size))
+        self.imgsz = imgsz
+        self.conf = conf
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self.class_table = ClassTable(model.names, get_category_info)
+        self.renderer = OverlayRenderer()
+
+    def _decode(self, stage, path, out_q, stop, info):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Could not open video {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        info.update(
+            fps=fps,
+            size=(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+        )
+        # A scene-change gate that never forces a pass, so only real changes count as keyframes
+        gate = MotionGate(threshold=self.keyframe_threshold, max_interval=float("inf"), bgr=True) if self.keyframes else None
+
+        index = 0
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                if index % self.every:
+                    # Skipped frame: advance the stream without decoding the picture
+                    if not cap.grab():
+                        break
+                    index += 1
+                    continue
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                timestamp = index / fps
+                index += 1
+                if gate is not None and not gate.changed(frame, now=timestamp):
+                    continue
+                stage.busy_seconds += time.perf_counter() - start
+                if not put(out_q, (index - 1, timestamp, frame), stop):
+                    break
+        finally:
+            info["frames"] = index
+            cap.release()
+            put(out_q, _DONE, stop)
+
+    def _infer(self, stage, in_q, out_q, stop):
+        tracker = BoxTracker(max_age=self.max_age)
+        finished = False
+        while not finished and not stop.is_set():
+            # Block for one frame, then take whatever else is already decoded, up to a full batch
+            batch = [get(in_q, stop)]
+            while len(batch) < self.batch_size and batch[-1] is not _DONE:
+                try:
+                    batch.append(in_q.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _DONE:
+                batch.pop()
+                finished = True
+            if not batch:
+                break
+
+            start = time.perf_counter()
+            # OpenCV frames are BGR, which is what ultralytics expects for numpy input
+            results = self.model([frame for _, _, frame in batch], imgsz=self.imgsz, conf=predict_conf(self.conf),
+                                 verbose=False)
+            for (index, timestamp, frame), result in zip(batch, results):
+                detections = extract_detections(result, self.conf)
+                # Video time, not wall-clock time, drives the tracker
+                tracker.update(detections.xyxy, detections.conf, detections.class_id, now=timestamp)
+                tracks = tracker.active_tracks()
+                tracked = Detections(
+                    np.array([t.box for t in tracks], dtype=np.float32).reshape(-1, 4),
+                    np.array([t.conf for t in tracks], dtype=np.float32),
+                    np.array([t.class_id for t in tracks], dtype=np.int64),
+                )
+                stage.busy_seconds += time.perf_counter() - start
+                if not put(out_q, (index, timestamp, frame, tracked), stop):
+                    return
+                start = time.perf_counter()
+        put(out_q, _DONE, stop)
+
+    def _encode(self, stage, in_q, stop, info, output, counts_path):
+        writer = None
+        counts_file = open(counts_path, "w", newline="")
+        counts = csv.writer(counts_file)
+        counts.writerow(["frame", "time_s", *self.class_table.category_names, "total"])
+        table = self.class_table
+        last_frame, written = None, 0  # Output frames so far, one per sampled slot of the source
+        try:
+            while not stop.is_set():
+                item = get(in_q, stop)
+                if item is _DONE:
+                    if writer is not None:
+                        # Hold the last analysed frame to the end of the source
+                        slots = -(-info.get("frames", 0) // self.every)
+                        written = self._hold(writer, last_frame, written, slots)
+                    break
+                start = time.perf_counter()
+                index, timestamp, frame, tracked = item
+
+                per_category = tracked.category_counts(table)
+                counts.writerow([index, f"{timestamp:.3f}", *per_category.values(), len(tracked)])
+
+                if output:
+                    for box, conf, class_id in zip(tracked.xyxy, tracked.conf, tracked.class_id):
+                        # Category colours are RGB; the frame is BGR
+                        color = table.colors[class_id][::-1]
+                        self.renderer.draw(frame, box, table.categories[class_id], color,
+                                           table.labels[class_id], float(conf))
+                    if writer is None:
+                        height, width = frame.shape[:2]
+                        # Sampled frames are written at the sampled rate so playback keeps real-time pace
+                        out_fps = info["fps"] / self.every
+                        writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"mp4v"), out_fps, (width, height))
+                    # Keyframe gaps: repeat the previous frame until this frame's slot
+                    written = self._hold(writer, last_frame if last_frame is not None else frame, written,
+                                         index // self.every)
+                    writer.write(frame)
+                    last_frame, written = frame, written + 1
+                info["analysed"] = info.get("analysed", 0) + 1
+                stage.busy_seconds += time.perf_counter() - start
+        finally:
+            counts_file.close()
+            if writer is not None:
+                writer.release()
+
+    @staticmethod
+    def _hold(writer, frame, written, slot):
+        """Write ``frame`` until ``slot`` output frames exist; returns the new count."""
+        for _ in range(slot - written):
+            writer.write(frame)
+        return max(written, slot)
+
+    def run(self, path, output=None, counts_path=None):
+        """Process ``path`` and return a summary dict with throughput and per-stage busy time."""
+        counts_path = counts_path or os.path.splitext(output or path)[0] + "_counts.csv"
+        decoded_q = queue.Queue(maxsize=self.queue_size)
+        inferred_q = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        info = {}
+
+        stages = [
+            Stage("decode", self._decode, path, decoded_q, stop, info),
+            Stage("infer", self._infer, decoded_q, inferred_q, stop),
+            Stage("encode", self._encode, inferred_q, stop, info, output, counts_path),
+        ]
+        start = time.perf_counter()
+        for stage in stages:
+            stage.start()
+        try:
+            while any(stage.is_alive() for stage in stages):
+                if any(stage.error for stage in stages):
+                    stop.set()
+                time.sleep(0.05)
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+        for stage in stages:
+            stage.join()
+            if stage.error is not None:
+                raise RuntimeError(f"{stage.name} stage failed") from stage.error
+        elapsed = time.perf_counter() - start
+
+        video_seconds = info.get("frames", 0) / info.get("fps", 30.0)
+        summary = {
+            "video": path,
+            "frames": info.get("frames", 0),
+            "analysed_frames": info.get("analysed", 0),
+            "video_seconds": video_seconds,
+            "wall_seconds": elapsed,
+            "realtime_factor": video_seconds / elapsed if elapsed > 0 else 0.0,
+            "stage_busy_seconds": {stage.name: stage.busy_seconds for stage in stages},
+            "counts": counts_path,
+            "output": output,
+        }
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", help="Recorded video file")
+    parser.add_argument("--output", "-o", default=None, help="Annotated video to write (.mp4); omit to only count")
+    parser.add_argument("--counts", default=None, help="Per-frame category counts CSV (default: <video>_counts.csv)")
+    parser.add_argument("--every", type=int, default=1, help="Analyse every Nth frame")
+    parser.add_argument("--keyframes", action="store_true", help="Only analyse frames where the scene changed")
+    parser.add_argument("--keyframe-threshold", type=float, default=8.0,
+                        help="Mean pixel change (0-255) that counts as a scene change")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--backend", choices=BACKENDS, default=os.getenv("MODEL_BACKEND", "pytorch"))
+    parser.add_argument("--int8", action="store_true", default=os.getenv("MODEL_INT8", "0") == "1")
+    parser.add_argument("--batch", type=int, default=8, help="Frames per forward pass")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--thresholds", default=os.getenv("CLASS_THRESHOLDS"),
+                        help="Per-class confidence table from tune-thresholds")
+    parser.add_argument("--max-age", type=float, default=1.0, help="Seconds of video a track survives unseen")
+    args = parser.parse_args()
+
+    weights = resolve_backend_path(resolve_model_path(args.weights), args.backend, args.int8)
+    model = LazyModel(weights, imgsz=args.imgsz).start().wait()
+    pipeline = VideoAnalytics(model, every=args.every, keyframes=args.keyframes,
+                              keyframe_threshold=args.keyframe_threshold, batch_size=args.batch,
+                              imgsz=args.imgsz, conf=load_class_thresholds(args.thresholds, model.names, args.conf),
+                              max_age=args.max_age)
+    summary = pipeline.run(args.video, args.output, args.counts)
+
+    print(f"Analysed {summary['analysed_frames']} of {summary['frames']} frames "
+          f"({summary['video_seconds']:.1f}s of video) in {summary['wall_seconds']:.1f}s "
+          f"= {summary['realtime_factor']:.1f}x real time")
+    busy = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in summary["stage_busy_seconds"].items())
+    print(f"Stage busy time: {busy}")
+    print(f"Counts written to {summary['counts']}" + (f", video to {summary['output']}" if args.output else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import json
+import math
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Stored baseline timings and where fresh results are written
+BASELINE_PATH = Path(os.getenv("BENCH_BASELINE", Path(__file__).with_name("benchmark_baseline.json")))
+RESULTS_PATH = Path(os.getenv("BENCH_RESULTS", "bench_results.json"))
+
+# A stage fails when it is more than this factor slower than the baseline, relative to the calibration loop
+THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "1.25"))
+UPDATE_BASELINE = os.getenv("BENCH_UPDATE_BASELINE", "0") == "1"
+
+# Fast stages are called repeatedly within a round until it lasts this long, so timer and scheduler noise averages out
+MIN_ROUND_MS = 2.0
+
+
+def _calibration_workload():
+    """Fixed mix of interpreter and numpy work that tracks how fast this host runs the stages."""
+    a = np.random.default_rng(0).random((192, 192), dtype=np.float32)
+    for _ in range(5):
+        a = np.tanh(a @ a.T / 192)
+    sum(i * i for i in range(20000))
+
+
+def _time_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return 1000 * (time.perf_counter() - start)
+
+
+def calibrate(runs=3):
+    """Fastest of ``runs`` runs of the calibration loop, in milliseconds: how fast the host is right now."""
+    return min(_time_ms(_calibration_workload) for _ in range(runs))
+
+
+class BenchRecorder:
+    """Times benchmark stages and compares them against the stored baseline.
+
+    Every round is timed next to a calibration loop and stages are compared
+    on the median ratio between the two, so a baseline recorded on one
+    machine still holds on a faster one, or on a shared CI runner whose speed
+    drifts during the run.
+    """
+
+    def __init__(self, baseline):
+        self.baseline = baseline
+        self.results = {}
+
+    def measure(self, name, fn, rounds=30, warmup=3):
+        """Run ``fn`` repeatedly, record its latency and fail on a regression."""
+        for _ in range(warmup):
+            fn()
+        calls = max(1, math.ceil(MIN_ROUND_MS / max(_time_ms(fn), 1e-3)))
+
+        def round_fn():
+            for _ in range(calls):
+                fn()
+
+        _calibration_workload()
+        timings, calibrations = [], []
+        for _ in range(rounds):
+            calibrations.append(calibrate())
+            timings.append(_time_ms(round_fn) / calls)
+
+        relative = statistics.median(t / c for t, c in zip(timings, calibrations))
+        timings.sort()
+        result = {
+            "median_ms": statistics.median(timings),
+            "p90_ms": timings[min(len(timings) - 1, int(0.9 * len(timings)))],
+            "min_ms": timings[0],
+            "calibration_ms": statistics.median(calibrations),
+            "relative": relative,
+            "rounds": rounds,
+        }
+        self.results[name] = result
+
+        if UPDATE_BASELINE:
+            return result
+        reference = self.baseline.get(name)
+        if reference is None:
+            # A stage without a baseline can't regress; say so instead of passing
+            pytest.skip(f"No baseline for {name} in {BASELINE_PATH}; record one with BENCH_UPDATE_BASELINE=1")
+        # The baseline's median scaled to this host's speed during the run
+        expected = reference["relative"] * result["calibration_ms"]
+        if relative > reference["relative"] * THRESHOLD:
+            pytest.fail(
+                f"{name} regressed: {relative:.2f}x the calibration loop vs {reference['relative']:.2f}x in the "
+                f"baseline (limit {reference['relative'] * THRESHOLD:.2f}x); median {result['median_ms']:.3f} ms, "
+                f"about {expected:.3f} ms expected on this host"
+            )
+        return result
+
+
+@pytest.fixture(scope="session")
+def bench():
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())["results"]
+
+    recorder = BenchRecorder(baseline)
+    yield recorder
+
+    if not recorder.results:
+        return
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "host": platform.node(), "threshold": THRESHOLD,
+              "results": recorder.results}
+    RESULTS_PATH.write_text(json.dumps(report, indent=2))
+    if UPDATE_BASELINE:
+        merged = {**baseline, **recorder.results}
+        BASELINE_PATH.write_text(json.dumps({**report, "results": merged}, indent=2))
+
+
+@pytest.fixture
+def make_eval_cache(tmp_path):
+    """Write an ``eval_cache`` file from ``(image, xyxy, conf, class)`` predictions and ``(image, xyxy, class)`` boxes."""
+    from garbage_classification.eval_cache import EvalCache
+
+    def make(names, predictions, ground_truth, num_images=1, iou=0.7):
+        predictions = sorted(predictions, key=lambda p: p[0])
+        ground_truth = sorted(ground_truth, key=lambda g: g[0])
+        meta = {"weights": "test.pt", "model": "test", "split": "val", "imgsz": 640, "conf": 0.001, "iou": iou,
+                "names": list(names), "files": [f"{i}.jpg" for i in range(num_images)]}
+        path = tmp_path / f"cache_{len(list(tmp_path.iterdir()))}.npz"
+        np.savez(
+            path, meta=np.array(json.dumps(meta)),
+            pred_image=np.array([p[0] for p in predictions], dtype=np.int32),
+            pred_xyxy=np.array([p[1] for p in predictions], dtype=np.float32).reshape(-1, 4),
+            pred_conf=np.array([p[2] for p in predictions], dtype=np.float32),
+            pred_cls=np.array([p[3] for p in predictions], dtype=np.int16),
+            gt_image=np.array([g[0] for g in ground_truth], dtype=np.int32),
+            gt_xyxy=np.array([g[1] for g in ground_truth], dtype=np.float32).reshape(-1, 4),
+            gt_cls=np.array([g[2] for g in ground_truth], dtype=np.int64),
+        )
+        return EvalCache(path)
+
+    return make
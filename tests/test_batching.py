@@ -0,0 +1,89 @@
+"""Batching frames from concurrent callers into one forward pass."""
+
+import threading
+
+import pytest
+
+from garbage_classification.batching import BatchScheduler
+
+
+class EchoModel:
+    """Returns one result per frame, or misbehaves on request."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = None
+        self.drop_last = False
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, frames, **kwargs):
+        self.entered.set()
+        self.release.wait()
+        self.calls.append((list(frames), kwargs))
+        if self.fail is not None:
+            raise self.fail
+        return [f"result {frame}" for frame in frames[:-1 if self.drop_last else None]]
+
+
+class BrokenController:
+    imgsz = 320
+
+    def observe(self, latency_seconds):
+        raise ValueError("controller bug")
+
+
+def test_frames_come_back_to_their_callers():
+    model = EchoModel()
+    scheduler = BatchScheduler(model, max_batch_size=4, max_wait=0.05, imgsz=640)
+    futures = [scheduler.submit(i) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == ["result 0", "result 1", "result 2"]
+    assert model.calls[0][1] == {"verbose": False, "imgsz": 640}
+
+
+def test_model_error_fails_the_batch_and_the_worker_keeps_going():
+    model = EchoModel()
+    scheduler = BatchScheduler(model, max_wait=0)
+    model.fail = RuntimeError("out of memory")
+    with pytest.raises(RuntimeError, match="out of memory"):
+        scheduler.predict("a", timeout=5)
+    model.fail = None
+    assert scheduler.predict("b", timeout=5) == "result b"
+
+
+def test_short_results_fail_every_frame_of_the_batch():
+    model = EchoModel()
+    model.release.clear()
+    scheduler = BatchScheduler(model, max_batch_size=2, max_wait=0.5)
+    model.drop_last = True
+    futures = [scheduler.submit("a"), scheduler.submit("b")]
+    model.release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 results for a batch of 2"):
+            future.result(timeout=5)
+    model.drop_last = False
+    assert scheduler.predict("c", timeout=5) == "result c"
+
+
+def test_error_after_the_model_call_does_not_kill_the_worker():
+    model = EchoModel()
+    scheduler = BatchScheduler(model, max_wait=0, controller=BrokenController())
+    # Results are handed out before the controller fails, and the next batch still runs
+    assert scheduler.predict("a", timeout=5) == "result a"
+    assert scheduler.predict("b", timeout=5) == "result b"
+    assert model.calls[-1][1]["imgsz"] == 320
+
+
+def test_predict_times_out_and_drops_the_frame():
+    model = EchoModel()
+    model.release.clear()
+    scheduler = BatchScheduler(model, max_wait=0)
+    first = scheduler.submit("stuck")  # Holds the worker inside the model call
+    assert model.entered.wait(5)
+    with pytest.raises(TimeoutError):
+        scheduler.predict("late", timeout=0.05)
+    model.release.set()
+    assert first.result(timeout=5) == "result stuck"
+    assert scheduler.predict("next", timeout=5) == "result next"
+    assert all("late" not in frames for frames, _ in model.calls)
@@ -0,0 +1,122 @@
+"""CPU benchmarks for the live inference and rendering hot paths.
+
+Results go to ``bench_results.json``; a stage fails when it is more than
+``BENCH_THRESHOLD`` times slower than ``tests/benchmark_baseline.json``, after
+scaling both to the host's calibration loop. The model stages run a freshly
+built YOLOv8n with the waste classes, so they need no trained weights.
+Record a new baseline with ``BENCH_UPDATE_BASELINE=1 pytest tests/test_benchmarks.py``.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from garbage_classification.categories import WASTE_CATEGORIES, get_category_info
+from garbage_classification.rendering import OverlayRenderer
+
+# Image sizes used by the training scripts
+IMAGE_SIZES = [320, 640]
+RECORDED_FRAMES = "YOLO-Waste-Detection-1/test/images"
+
+ALL_LABELS = [item for data in WASTE_CATEGORIES.values() for item in data["items"]] + ["Not a real label"]
+
+
+def synthetic_frames(count=8, shape=(480, 640, 3)):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def recorded_frames(count=8):
+    cv2 = pytest.importorskip("cv2")
+    paths = sorted(glob.glob(os.path.join(RECORDED_FRAMES, "*.jpg")))[:count]
+    if not paths:
+        pytest.skip(f"No recorded frames in {RECORDED_FRAMES}")
+    return [cv2.imread(path)[:, :, ::-1].copy() for path in paths]
+
+
+@pytest.fixture(scope="module")
+def tiny_weights(tmp_path_factory):
+    """Untrained YOLOv8n weights for the waste classes: real model cost, no checkpoint to download."""
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("ultralytics")
+    from ultralytics import YOLO
+    from ultralytics.nn.tasks import DetectionModel
+
+    labels = ALL_LABELS[:-1]
+    torch.manual_seed(0)
+    model = YOLO("yolov8n.yaml", task="detect")
+    model.model = DetectionModel("yolov8n.yaml", nc=len(labels), verbose=False)
+    model.model.names = dict(enumerate(labels))
+    path = tmp_path_factory.mktemp("weights") / "tiny.pt"
+    model.save(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def live(tiny_weights):
+    """The live demo module serving the tiny model, loaded and warmed up."""
+    pytest.importorskip("gradio")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MODEL_PATH", tiny_weights)
+        # A single caller never fills a batch, so waiting for one only adds sleep jitter
+        mp.setenv("BATCH_MAX_WAIT", "0")
+        from garbage_classification import demo_live
+
+    demo_live.model.wait()
+    return demo_live
+
+
+def test_get_category_info(bench):
+    bench.measure("get_category_info", lambda: [get_category_info(label) for label in ALL_LABELS], rounds=200)
+
+
+def test_overlay_render(bench):
+    renderer = OverlayRenderer()
+    frame = synthetic_frames(1)[0]
+    boxes = [(40 * i, 60 + 30 * i, 40 * i + 150, 200 + 30 * i) for i in range(10)]
+
+    def draw():
+        for i, box in enumerate(boxes):
+            renderer.draw(frame, box, "recyclable", (0, 0, 255), ALL_LABELS[i], 0.5 + i / 20)
+
+    bench.measure("overlay_render_10_boxes", draw, rounds=200)
+
+
+def test_results_panel(bench, live):
+    panel = live.get_results_panel()
+    class_ids = list(range(min(10, len(panel.class_table))))
+    confs = [0.5 + i / 20 for i in range(len(class_ids))]
+    bench.measure("results_panel_render", lambda: panel.render(class_ids, confs), rounds=200)
+
+
+@pytest.mark.parametrize("imgsz", IMAGE_SIZES)
+def test_model_latency(bench, live, imgsz):
+    frames = synthetic_frames(4)
+    model = live.model.wait()
+
+    def run():
+        for frame in frames:
+            model(frame, imgsz=imgsz, verbose=False)
+
+    bench.measure(f"model_{imgsz}", run, rounds=10, warmup=1)
+
+
+@pytest.mark.parametrize("source", ["synthetic", "recorded"])
+@pytest.mark.parametrize("imgsz", IMAGE_SIZES)
+def test_process_frame(bench, live, imgsz, source):
+    frames = synthetic_frames(4) if source == "synthetic" else recorded_frames(4)
+    # Run the detector on every frame so the benchmark covers the full pipeline
+    session = live.StreamSession(detect_every=1, max_age=live.TRACK_MAX_AGE)
+    previous = live.scheduler.predict_kwargs.get("imgsz")
+    live.scheduler.predict_kwargs["imgsz"] = imgsz
+
+    def run():
+        for frame in frames:
+            live.process_frame(frame.copy(), session)
+
+    try:
+        bench.measure(f"process_frame_{source}_{imgsz}", run, rounds=10, warmup=1)
+    finally:
+        live.scheduler.predict_kwargs["imgsz"] = previous
@@ -0,0 +1,116 @@
+"""Resumable JSONL output of the bulk classifier."""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from garbage_classification import bulk_classify
+from garbage_classification.bulk_classify import JsonlWriter, ParquetWriter
+from garbage_classification.categories import ClassTable, get_category_info
+from garbage_classification.detections import load_class_thresholds
+
+
+def append(writer, records):
+    writer.open()
+    writer.write(records)
+    writer.close()
+
+
+def read_lines(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("partial", ['{"path": "b.jpg", "gar', "", "{"])
+def test_resume_after_a_truncated_record(tmp_path, partial):
+    path = tmp_path / "results.jsonl"
+    path.write_text(json.dumps({"path": "a.jpg"}) + "\n" + partial)
+    writer = JsonlWriter(str(path))
+    assert writer.done_paths() == {"a.jpg"}
+
+    append(writer, [{"path": "b.jpg"}, {"path": "c.jpg"}])
+    assert [r["path"] for r in read_lines(path)] == ["a.jpg", "b.jpg", "c.jpg"]
+    assert JsonlWriter(str(path)).done_paths() == {"a.jpg", "b.jpg", "c.jpg"}
+
+
+def test_only_a_partial_record(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('{"path": "a.j')
+    append(JsonlWriter(str(path)), [{"path": "a.jpg"}])
+    assert read_lines(path) == [{"path": "a.jpg"}]
+
+
+def test_new_file(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = JsonlWriter(str(path))
+    assert writer.done_paths() == set()
+    append(writer, [{"path": "a.jpg", "compost": 1}])
+    append(writer, [{"path": "b.jpg"}])
+    assert read_lines(path) == [{"path": "a.jpg", "compost": 1}, {"path": "b.jpg"}]
+
+
+
+def test_parquet_parts_hold_many_batches(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "results.parquet")
+    writer = ParquetWriter(path, rows_per_part=5)
+    writer.open()
+    for i in range(6):
+        writer.write([{"path": f"{i}a.jpg", "compost": 1}, {"path": f"{i}b.jpg", "error": "could not decode image"}])
+    assert len(list(tmp_path.glob("results.parquet/part-*.parquet"))) == 2  # Every 3 batches of 2 rows
+    writer.write([{"path": "last.jpg"}])
+    writer.close()
+
+    parts = sorted(p.name for p in tmp_path.glob("results.parquet/*"))
+    assert parts == ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"]
+    resumed = ParquetWriter(path)
+    assert len(resumed.done_paths()) == 13
+    assert resumed._part == 3
+
+
+def test_parquet_flushes_after_an_interval(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    now = [0.0]
+    monkeypatch.setattr(bulk_classify.time, "monotonic", lambda: now[0])
+    writer = ParquetWriter(str(tmp_path / "results.parquet"), flush_every=60.0)
+    writer.open()
+    now[0] = 30.0
+    writer.write([{"path": "a.jpg"}])
+    assert not list(tmp_path.glob("results.parquet/*"))
+    now[0] = 61.0
+    writer.write([{"path": "b.jpg"}])
+    assert ParquetWriter(str(tmp_path / "results.parquet")).done_paths() == {"a.jpg", "b.jpg"}
+
+
+class FilteringModel:
+    """Stands in for YOLO: the same two boxes for every image, minus those under ``conf`` (ultralytics' 0.25 default)."""
+
+    names = {0: "Foil", 1: "Plastic caps"}
+
+    def __init__(self):
+        self.torch = pytest.importorskip("torch")
+        pytest.importorskip("ultralytics")
+
+    def __call__(self, images, imgsz=640, conf=0.25, verbose=True):
+        from ultralytics.engine.results import Boxes
+
+        data = self.torch.tensor([[0, 0, 10, 10, 0.9, 0], [20, 20, 30, 30, 0.15, 1]])
+        return [SimpleNamespace(boxes=Boxes(data[data[:, 4] >= conf], image.shape[:2])) for image in images]
+
+
+def test_class_tuned_below_the_model_default_keeps_its_boxes(tmp_path, monkeypatch):
+    cv2 = pytest.importorskip("cv2")
+    model = FilteringModel()
+    image = tmp_path / "bin.jpg"
+    cv2.imwrite(str(image), np.zeros((32, 32, 3), dtype=np.uint8))
+    table = tmp_path / "class_thresholds.json"
+    table.write_text(json.dumps({"thresholds": {"Foil": 0.5, "Plastic caps": 0.1}}))
+
+    monkeypatch.setattr(bulk_classify, "_worker", {
+        "model": model, "imgsz": 640, "tiler": None, "table": ClassTable(model.names, get_category_info),
+        "conf": load_class_thresholds(str(table), model.names),
+    })
+    [record] = bulk_classify._classify_batch([str(image)])
+    assert [d["label"] for d in record["detections"]] == ["Foil", "Plastic caps"]
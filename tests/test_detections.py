@@ -0,0 +1,72 @@
+"""Confidence filtering of detector output, with one global or per-class thresholds."""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from garbage_classification.detections import (
+    CONF_THRESHOLD, extract_detections, load_class_thresholds, lowest_threshold, predict_conf,
+)
+
+NAMES = {0: "Foil", 1: "Paper", 2: "Plastic caps"}
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = tmp_path / "class_thresholds.json"
+    path.write_text(json.dumps({"thresholds": {"Foil": 0.6, "Plastic caps": 0.2, "Not a class": 0.9}}))
+    return str(path)
+
+
+def test_no_table_keeps_the_global_threshold():
+    assert load_class_thresholds(None, NAMES) == CONF_THRESHOLD == 0.35
+    assert load_class_thresholds("", NAMES, default=0.5) == 0.5
+
+
+def test_table_is_indexed_by_class_id(table_path):
+    thresholds = load_class_thresholds(table_path, NAMES)
+    assert thresholds.dtype == np.float32
+    np.testing.assert_allclose(thresholds, [0.6, 0.35, 0.2])  # Paper isn't in the table
+
+
+def test_missing_classes_use_the_given_default(table_path):
+    np.testing.assert_allclose(load_class_thresholds(table_path, NAMES, default=0.5), [0.6, 0.5, 0.2])
+
+
+def test_model_keeps_boxes_down_to_the_lowest_cutoff(table_path):
+    assert lowest_threshold(None) == CONF_THRESHOLD
+    assert lowest_threshold(table_path) == pytest.approx(0.2)
+    assert lowest_threshold(table_path, default=0.1) == pytest.approx(0.1)
+    assert predict_conf(load_class_thresholds(table_path, NAMES)) == pytest.approx(0.2)
+    assert predict_conf(0.35) == 0.35
+
+
+def fake_result(conf, cls):
+    """A ``Results`` stand-in holding real ultralytics ``Boxes``."""
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("ultralytics")
+    from ultralytics.engine.results import Boxes
+
+    boxes = [[10 * i, 0, 10 * i + 5, 5, c, k] for i, (c, k) in enumerate(zip(conf, cls))]
+    return SimpleNamespace(boxes=Boxes(torch.tensor(boxes, dtype=torch.float32), (100, 100)))
+
+
+def test_global_threshold_filters_boxes():
+    detections = extract_detections(fake_result([0.9, 0.34, 0.35], [0, 1, 2]))
+    np.testing.assert_allclose(detections.conf, [0.9, 0.35])
+    np.testing.assert_array_equal(detections.class_id, [0, 2])
+    assert detections.xyxy.shape == (2, 4)
+
+
+def test_per_class_thresholds_filter_boxes(table_path):
+    thresholds = load_class_thresholds(table_path, NAMES)
+    detections = extract_detections(fake_result([0.5, 0.3, 0.25, 0.7], [0, 1, 2, 0]), thresholds)
+    # Foil needs 0.6, Paper falls back to 0.35, Plastic caps needs 0.2
+    np.testing.assert_allclose(detections.conf, [0.25, 0.7])
+    np.testing.assert_array_equal(detections.class_id, [2, 0])
+
+
+def test_no_boxes_gives_empty_detections():
+    assert len(extract_detections(SimpleNamespace(boxes=None))) == 0
@@ -0,0 +1,65 @@
+"""Metrics recomputed from cached predictions."""
+
+import numpy as np
+import pytest
+
+from garbage_classification.eval_cache import evaluate
+
+NAMES = ["Foil", "Paper"]
+
+
+def boxes(image):
+    return [(image, [10, 10, 60, 60], 0), (image, [100, 100, 180, 160], 1)]
+
+
+@pytest.fixture
+def ground_truth():
+    return [box for image in range(4) for box in boxes(image)]
+
+
+def perfect(ground_truth, conf=0.9):
+    return [(image, xyxy, conf, cls) for image, xyxy, cls in ground_truth]
+
+
+def test_perfect_predictions(make_eval_cache, ground_truth):
+    metrics = evaluate(make_eval_cache(NAMES, perfect(ground_truth), ground_truth, num_images=4))
+    assert metrics["mAP50"] == pytest.approx(0.995, abs=1e-3)
+    assert metrics["mAP50-95"] == pytest.approx(0.995, abs=1e-3)
+    assert metrics["precision"] == metrics["recall"] == 1.0
+
+    counts = np.array(metrics["confusion_matrix"]["counts"])
+    np.testing.assert_array_equal(np.diag(counts)[:2], [4, 4])
+    assert counts.sum() == len(ground_truth)
+
+
+def test_false_positive_lowers_precision(make_eval_cache, ground_truth):
+    predictions = perfect(ground_truth) + [(0, [300, 300, 340, 340], 0.8, 0)]
+    metrics = evaluate(make_eval_cache(NAMES, predictions, ground_truth, num_images=4))
+    assert metrics["precision"] == pytest.approx(8 / 9)
+    assert metrics["recall"] == 1.0
+    foil = next(row for row in metrics["per_class"] if row["name"] == "Foil")
+    assert foil["precision"] == pytest.approx(4 / 5)
+
+    # Below the operating point the extra box doesn't count
+    assert evaluate(make_eval_cache(NAMES, predictions, ground_truth, num_images=4), conf=0.85)["precision"] == 1.0
+
+
+def test_stricter_nms_removes_duplicates(make_eval_cache, ground_truth):
+    # A second, shifted Foil box per image: IoU about 0.6 with the first, kept by the 0.7 collection NMS
+    duplicates = [(image, [15, 15, 65, 65], 0.7, 0) for image in range(4)]
+    cache = make_eval_cache(NAMES, perfect(ground_truth) + duplicates, ground_truth, num_images=4)
+
+    assert evaluate(cache)["precision"] == pytest.approx(8 / 12)
+    metrics = evaluate(cache, nms_iou=0.5)
+    assert metrics["nms_iou"] == 0.5
+    assert metrics["precision"] == 1.0
+    assert metrics["mAP50"] == pytest.approx(0.995, abs=1e-3)
+
+
+def test_class_map_merges_classes(make_eval_cache, ground_truth):
+    # Predicting the wrong class is a miss per class but a hit once both map to one category
+    predictions = [(image, xyxy, 0.9, 1 - cls) for image, xyxy, cls in ground_truth]
+    cache = make_eval_cache(NAMES, predictions, ground_truth, num_images=4)
+    assert evaluate(cache)["precision"] == 0.0
+    merged = evaluate(cache, class_map=[0, 0], class_names=["garbage"])
+    assert merged["precision"] == 1.0
@@ -0,0 +1,46 @@
+"""Prediction cache tiers, and keeping the disk tier bounded."""
+
+import os
+import time
+
+from garbage_classification.prediction_cache import PredictionCache
+
+
+def disk_files(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+
+def test_disk_hit_survives_a_restart(tmp_path):
+    PredictionCache(disk_dir=str(tmp_path)).put("ab12", [1, 2, 3])
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    assert cache.get("ab12") == [1, 2, 3]
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_and_half_written_files_are_swept_on_start_up(tmp_path):
+    cache = PredictionCache(max_age=60, disk_dir=str(tmp_path))
+    cache.put("aa01", "old")
+    cache.put("aa02", "fresh")
+    old = time.time() - 3600
+    os.utime(cache._disk_path("aa01"), (old, old))
+    leftover = cache._disk_path("aa03") + ".123.456.tmp"
+    open(leftover, "wb").close()
+    os.utime(leftover, (old, old))
+
+    PredictionCache(max_age=60, disk_dir=str(tmp_path))
+    assert disk_files(tmp_path) == ["aa02.pkl"]
+
+
+def test_disk_tier_drops_the_oldest_files_beyond_its_size_limit(tmp_path):
+    value = b"x" * 1000
+    cache = PredictionCache(max_age=None, disk_dir=str(tmp_path), max_disk_bytes=5500)
+    for i in range(5):
+        cache.put(f"k{i}", value)
+        stamp = time.time() - 100 + i
+        os.utime(cache._disk_path(f"k{i}"), (stamp, stamp))
+    assert len(disk_files(tmp_path)) == 5
+
+    cache.put("k5", value)  # Over the limit: trimmed to under 90% of it, oldest first
+    assert disk_files(tmp_path) == ["k2.pkl", "k3.pkl", "k4.pkl", "k5.pkl"]
+    assert cache.stats()["disk_evictions"] == 2
+    assert cache.get("k5") == value
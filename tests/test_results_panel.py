@@ -0,0 +1,53 @@
+"""Skipping results panel updates when the detections haven't materially changed."""
+
+import pytest
+
+from garbage_classification.categories import ClassTable, get_category_info
+from garbage_classification.results_panel import ResultsPanel
+from garbage_classification.session import StreamSession
+
+
+@pytest.fixture
+def panel():
+    table = ClassTable({0: "Foil", 1: "Paper", 2: "Plastic caps"}, get_category_info)
+    return ResultsPanel(table, "<div>{summary}</div><ol>{items}</ol>", "<b>{category}: {count}</b>",
+                        "<li>{number}. {label} ({category}) {confidence}</li>", "<p>Nothing detected</p>",
+                        conf_step=0.05)
+
+
+def test_first_frame_is_sent(panel):
+    html = panel.update(StreamSession(), [1, 2], [0.8, 0.6])
+    assert "1. Paper (compost) 80.0%" in html
+    assert "2. Plastic caps" in html
+
+
+def test_small_confidence_changes_are_skipped(panel):
+    session = StreamSession()
+    panel.update(session, [1, 2], [0.524, 0.6])
+    # Under the step even where rounding to 0.05 would cross a bucket edge
+    assert panel.update(session, [1, 2], [0.526, 0.6]) is None
+    assert panel.update(session, [1, 2], [0.56, 0.64]) is None
+
+
+def test_drift_from_the_sent_panel_is_resent(panel):
+    session = StreamSession()
+    panel.update(session, [1], [0.50])
+    assert panel.update(session, [1], [0.54]) is None
+    # Each step was small, but the panel on screen still says 50%
+    assert "58.0%" in panel.update(session, [1], [0.58])
+    assert panel.update(session, [1], [0.61]) is None
+
+
+def test_different_items_are_resent(panel):
+    session = StreamSession()
+    panel.update(session, [1, 2], [0.8, 0.6])
+    assert panel.update(session, [2, 1], [0.6, 0.8]) is not None
+    assert panel.update(session, [2], [0.6]) is not None
+    assert panel.update(session, [], []) == "<p>Nothing detected</p>"
+    assert panel.update(session, [], []) is None
+
+
+def test_sessions_are_independent(panel):
+    first, second = StreamSession(), StreamSession()
+    panel.update(first, [1], [0.8])
+    assert panel.update(second, [1], [0.8]) is not None
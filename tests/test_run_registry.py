@@ -0,0 +1,55 @@
+"""Choosing the model to serve from the run registry."""
+
+import pytest
+import yaml
+
+from garbage_classification.run_registry import RunRegistry
+
+WASTE_NAMES = ["Aluminum caps", "Foil", "Plastic caps"]
+RAW_NAMES = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
+
+
+def make_run(root, name, data, map50_95, imgsz=640):
+    run_dir = root / name
+    (run_dir / "weights").mkdir(parents=True)
+    (run_dir / "weights" / "best.pt").write_bytes(name.encode())  # Distinct content, distinct weights hash
+    (run_dir / "args.yaml").write_text(yaml.safe_dump({"mode": "train", "data": str(data), "imgsz": imgsz,
+                                                      "epochs": 1}))
+    (run_dir / "results.csv").write_text(
+        "epoch,metrics/precision(B),metrics/recall(B),metrics/mAP50(B),metrics/mAP50-95(B)\n"
+        f"1,0.5,0.5,{map50_95 + 0.1},{map50_95}\n"
+    )
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Run reports are looked up relative to the working directory
+    for dataset, names in [("waste", WASTE_NAMES), ("raw", RAW_NAMES)]:
+        (tmp_path / dataset).mkdir()
+        (tmp_path / dataset / "data.yaml").write_text(yaml.safe_dump({"nc": len(names), "names": names}))
+    root = tmp_path / "runs"
+    make_run(root, "waste", tmp_path / "waste", 0.40)
+    make_run(root, "raw", tmp_path / "raw" / "data.yaml", 0.70)  # Better score, other classes
+    make_run(root, "unknown", tmp_path / "missing", 0.90)  # Dataset config no longer exists
+
+    registry = RunRegistry(str(tmp_path / "registry.sqlite"))
+    registry.update([str(root)], verbose=False)
+    yield registry
+    registry.close()
+
+
+def test_best_only_considers_runs_with_the_serving_class_names(registry):
+    assert registry.best()["name"] == "unknown"
+    assert registry.best(names=WASTE_NAMES)["name"] == "waste"
+    assert registry.best(names=RAW_NAMES)["name"] == "raw"
+    assert registry.best(names=["Paper"]) is None
+
+
+def test_latency_budget_uses_the_requested_size(registry):
+    waste = next(run for run in registry.runs() if run["name"] == "waste")
+    registry.db.execute("INSERT INTO latency VALUES (?, 320, 'cpu', 'pytorch', 30.0, 0)", (waste["weights_hash"],))
+    registry.db.execute("INSERT INTO latency VALUES (?, 640, 'cpu', 'pytorch', 90.0, 0)", (waste["weights_hash"],))
+
+    assert registry.best(max_latency_ms=50, imgsz=320, names=WASTE_NAMES)["latency_ms"] == 30.0
+    assert registry.best(max_latency_ms=50, imgsz=640, names=WASTE_NAMES) is None
+    assert registry.best(max_latency_ms=100, names=WASTE_NAMES)["latency_ms"] == 90.0  # Training size
@@ -0,0 +1,40 @@
+"""Per-stream detector cadence and static-scene reuse."""
+
+import numpy as np
+
+from garbage_classification.session import StreamSession
+
+
+def detector_frames(session, frames, stride=1):
+    return [i for i in range(frames) if session.next_frame(stride)]
+
+
+def test_detector_runs_every_nth_frame():
+    assert detector_frames(StreamSession(detect_every=3), 10) == [0, 3, 6, 9]
+    assert detector_frames(StreamSession(detect_every=0), 3) == [0, 1, 2]
+
+
+def test_stride_thins_detector_runs():
+    assert detector_frames(StreamSession(detect_every=2), 13, stride=3) == [0, 6, 12]
+    assert detector_frames(StreamSession(detect_every=2), 5, stride=0) == [0, 2, 4]
+
+
+def test_static_scene_reuses_detections():
+    session = StreamSession(motion_threshold=3.0)
+    frame = np.full((48, 64, 3), 100, dtype=np.uint8)
+    assert session.scene_changed(frame)
+    assert not session.scene_changed(frame.copy())
+    assert session.scene_changed(frame + 50)
+
+
+def test_without_a_gate_every_frame_counts_as_changed():
+    session = StreamSession(motion_threshold=0.0)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    assert session.motion is None
+    assert session.scene_changed(frame) and session.scene_changed(frame)
+
+
+def test_tracker_settings_are_passed_through():
+    session = StreamSession(max_age=2.5, iou_threshold=0.4)
+    assert session.tracker.max_age == 2.5
+    assert session.tracker.iou_threshold == 0.4
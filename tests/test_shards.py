@@ -0,0 +1,51 @@
+"""Training from pre-decoded shards, including mosaic augmentation."""
+
+import os
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+from ultralytics.cfg import DEFAULT_CFG  # noqa: E402
+
+from garbage_classification.training.shards import ShardReader, ShardedYOLODataset, pack, shard_dir_for  # noqa: E402
+
+IMGSZ = 64
+
+
+@pytest.fixture
+def dataset_dir(tmp_path):
+    """Eight random images with one box each in a YOLO-layout train split."""
+    rng = np.random.default_rng(0)
+    for sub in ("images", "labels"):
+        os.makedirs(tmp_path / "train" / sub)
+    for i in range(8):
+        cv2.imwrite(str(tmp_path / "train" / "images" / f"{i}.jpg"), rng.integers(0, 255, (48, 80, 3), dtype=np.uint8))
+        (tmp_path / "train" / "labels" / f"{i}.txt").write_text("0 0.5 0.5 0.25 0.25\n")
+    return tmp_path
+
+
+def test_mosaic_samples_from_shards(dataset_dir):
+    pack(str(dataset_dir), "train", IMGSZ, shard_size=3)
+    dataset = ShardedYOLODataset(img_path=str(dataset_dir / "train" / "images"), imgsz=IMGSZ, augment=True,
+                                 hyp=DEFAULT_CFG, batch_size=2, data={"names": {0: "item"}, "nc": 1, "channels": 3})
+    dataset.shards = ShardReader(shard_dir_for(str(dataset_dir), "train", IMGSZ))
+    assert DEFAULT_CFG.mosaic > 0  # Mosaic is on, so samples pull other images through the buffer
+
+    for i in range(3 * len(dataset)):
+        sample = dataset[i % len(dataset)]
+        assert sample["img"].shape[-2:] == (IMGSZ, IMGSZ)
+
+    assert 0 < len(dataset.buffer) <= dataset.max_buffer_length
+    evicted = [j for j in range(len(dataset)) if j not in dataset.buffer]
+    assert all(dataset.ims[j] is None for j in evicted)
+
+
+def test_reader_matches_packed_image(dataset_dir):
+    pack(str(dataset_dir), "train", IMGSZ)
+    reader = ShardReader(shard_dir_for(str(dataset_dir), "train", IMGSZ))
+    image, (h0, w0), (h, w) = reader.get("anything/train/images/3.jpg")
+    assert (h0, w0) == (48, 80)
+    assert image.shape[:2] == (h, w) and max(h, w) == IMGSZ
@@ -0,0 +1,33 @@
+"""Per-class threshold tuning on cached predictions."""
+
+import pytest
+
+from garbage_classification.thresholds import tune
+
+BOX = [10, 10, 50, 50]
+ELSEWHERE = [200, 200, 240, 240]
+
+
+def test_ties_pick_the_highest_threshold(make_eval_cache):
+    # Every threshold between the false positive (0.3) and the hit (0.9) gives F1 = 1
+    cache = make_eval_cache(["a"], [(0, BOX, 0.9, 0), (0, ELSEWHERE, 0.3, 0)], [(0, BOX, 0)])
+    table = tune(cache, min_instances=1, default=0.35)
+    assert table["thresholds"]["a"] == pytest.approx(0.9)
+    assert table["classes"]["a"]["tuned"]
+
+
+def test_class_without_true_positives_keeps_default(make_eval_cache):
+    ground_truth = [(i, BOX, 1) for i in range(5)]
+    predictions = [(i, ELSEWHERE, 0.6, 1) for i in range(5)]
+    cache = make_eval_cache(["a", "b"], predictions, ground_truth, num_images=5)
+    table = tune(cache, min_instances=5, default=0.35)
+    assert table["thresholds"]["b"] == pytest.approx(0.35)
+    assert not table["classes"]["b"]["tuned"]
+
+
+def test_rare_class_keeps_default(make_eval_cache):
+    cache = make_eval_cache(["a"], [(0, BOX, 0.9, 0), (1, BOX, 0.8, 0)], [(0, BOX, 0), (1, BOX, 0)], num_images=2)
+    table = tune(cache, min_instances=5, default=0.35)
+    assert table["thresholds"]["a"] == pytest.approx(0.35)
+    assert not table["classes"]["a"]["tuned"]
+    assert table["classes"]["a"]["instances"] == 2
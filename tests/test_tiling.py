@@ -0,0 +1,103 @@
+"""Tile layout and merging boxes from overlapping tiles."""
+
+import numpy as np
+import pytest
+
+from garbage_classification.tiling import TiledDetector, edge_fragments, merge_detections, tile_grid, tile_origins
+
+
+@pytest.mark.parametrize("length, tile, overlap", [(3840, 640, 0.2), (2160, 640, 0.2), (1000, 640, 0.5), (641, 640, 0.0)])
+def test_tiles_cover_the_whole_axis(length, tile, overlap):
+    origins = tile_origins(length, tile, overlap)
+    assert origins[0] == 0
+    assert origins[-1] == length - tile
+    gaps = np.diff(origins)
+    assert (gaps > 0).all()
+    assert (gaps <= int(tile * (1 - overlap))).all()
+
+
+def test_image_smaller_than_a_tile_is_one_tile():
+    assert tile_origins(480, 640, 0.2) == [0]
+    assert tile_origins(640, 640, 0.2) == [0]
+    assert tile_grid(600, 400, 640, 0.2) == [(0, 0)]
+
+
+def test_4k_grid():
+    grid = tile_grid(3840, 2160, 640, 0.2)
+    assert len(grid) == 32
+    assert max(x for x, _ in grid) == 3840 - 640
+    assert max(y for _, y in grid) == 2160 - 640
+
+
+def seam_boxes(*boxes):
+    """Boxes from the tiles of a 1152x640 image (origins x = 0 and 512), flagged when cut off at the seam."""
+    xyxy = np.array([box for box, _ in boxes], dtype=np.float32)
+    origins = [x for _, x in boxes]
+    fragment = np.concatenate([edge_fragments(xyxy[i:i + 1], x, 0, 640, 640, 1152, 640) for i, x in enumerate(origins)])
+    return xyxy, fragment
+
+
+def test_seam_fragments_are_flagged():
+    xyxy, fragment = seam_boxes(([600, 100, 640, 140], 0), ([600, 100, 700, 140], 512), ([0, 0, 40, 40], 0),
+                                ([1100, 0, 1152, 40], 512), ([513, 0, 560, 40], 512))
+    # Image edges don't count; the right tile's left edge at x = 512 does
+    np.testing.assert_array_equal(fragment, [True, False, False, False, True])
+
+
+def test_box_split_at_a_seam_is_merged():
+    # An item at x = 600-700 crosses the left tile's edge at 640; the right tile sees all of it
+    xyxy, fragment = seam_boxes(([600, 100, 640, 140], 0), ([600, 100, 700, 140], 512))
+    merged = merge_detections(xyxy, np.array([0.8, 0.7], dtype=np.float32), np.array([2, 2]), fragment)
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy, [[600, 100, 700, 140]])
+    assert merged.conf[0] == pytest.approx(0.7)
+
+
+def test_item_wider_than_the_overlap_is_stitched():
+    # Neither tile holds all of x = 450-800, so both halves are fragments and the kept one is widened
+    xyxy, fragment = seam_boxes(([450, 100, 640, 140], 0), ([512, 100, 800, 140], 512))
+    merged = merge_detections(xyxy, np.array([0.6, 0.9], dtype=np.float32), np.array([2, 2]), fragment)
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy, [[450, 100, 800, 140]])
+    assert merged.conf[0] == pytest.approx(0.9)
+
+
+def test_coarse_box_keeps_the_items_inside_it():
+    # The whole-image pass boxes a cluster of caps; the tiles find each cap
+    coarse = [100, 100, 400, 200]
+    caps = [[120, 130, 150, 160], [230, 130, 260, 160], [340, 130, 370, 160]]
+    xyxy = np.array([coarse, *caps], dtype=np.float32)
+    merged = merge_detections(xyxy, np.array([0.5, 0.8, 0.8, 0.8], dtype=np.float32), np.array([1, 1, 1, 1]),
+                              np.zeros(4, dtype=bool))
+    assert len(merged) == 4
+    np.testing.assert_allclose(np.sort(merged.xyxy, axis=0), np.sort(xyxy, axis=0))
+
+
+def test_overlapping_duplicates_are_suppressed():
+    xyxy = np.array([[0, 0, 50, 50], [2, 2, 52, 52]], dtype=np.float32)
+    merged = merge_detections(xyxy, np.array([0.7, 0.9], dtype=np.float32), np.array([0, 0]))
+    np.testing.assert_allclose(merged.xyxy, [[2, 2, 52, 52]])
+
+
+def test_different_classes_are_never_merged():
+    xyxy = np.array([[0, 0, 50, 50], [0, 0, 50, 50], [5, 5, 45, 45]], dtype=np.float32)
+    merged = merge_detections(xyxy, np.array([0.9, 0.8, 0.7], dtype=np.float32), np.array([0, 1, 2]))
+    assert sorted(merged.class_id.tolist()) == [0, 1, 2]
+
+
+def test_separate_items_of_one_class_are_kept():
+    xyxy = np.array([[0, 0, 50, 50], [60, 0, 110, 50]], dtype=np.float32)
+    assert len(merge_detections(xyxy, np.array([0.9, 0.8], dtype=np.float32), np.array([0, 0]))) == 2
+
+
+def test_cut_adds_the_whole_image_pass():
+    tiler = TiledDetector(model=None, tile_size=640, overlap=0.2)
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    tiles, origins = tiler._cut(image)
+    assert len(tiles) == tiler.count_tiles(image) == len(tile_grid(1920, 1080, 640, 0.2)) + 1
+    assert tiles[-1] is image and origins[-1] is None
+    assert all(tile.shape == (640, 640, 3) for tile in tiles[:-1])
+
+    small = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert tiler.count_tiles(small) == 1
+    assert tiler._cut(small)[0][0] is small
@@ -0,0 +1,69 @@
+"""IoU box tracking between detector runs."""
+
+import numpy as np
+import pytest
+
+from garbage_classification.tracking import BoxTracker, iou_matrix
+
+
+def test_iou_matrix():
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+    iou = iou_matrix(boxes, boxes)
+    assert iou[0, 0] == pytest.approx(1.0)
+    assert iou[0, 1] == pytest.approx(50 / 150)
+    assert iou_matrix(boxes, np.zeros((0, 4))).shape == (2, 0)
+
+
+def test_matching_detection_updates_the_track():
+    tracker = BoxTracker(alpha=1.0, beta=0.0)
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    tracker.update([[2, 0, 12, 10]], [0.9], [3], now=0.1)
+
+    assert len(tracker.tracks) == 1
+    track = tracker.tracks[0]
+    assert track.id == 1 and track.hits == 2
+    assert track.conf == pytest.approx(0.9)
+    np.testing.assert_allclose(track.box, [2, 0, 12, 10])
+
+
+def test_other_class_or_no_overlap_starts_a_new_track():
+    tracker = BoxTracker()
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    tracker.update([[0, 0, 10, 10], [100, 100, 110, 110]], [0.5, 0.5], [4, 3], now=0.1)
+    assert sorted(t.id for t in tracker.tracks) == [1, 2, 3]
+    assert [t.hits for t in tracker.tracks] == [1, 1, 1]
+
+
+def test_tracks_expire_after_max_age():
+    tracker = BoxTracker(max_age=1.0)
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    tracker.predict(now=1.0)
+    assert len(tracker.tracks) == 1
+    tracker.predict(now=1.01)
+    assert tracker.tracks == []
+
+
+def test_predict_moves_boxes_along_their_velocity():
+    tracker = BoxTracker(alpha=1.0, beta=1.0)
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    tracker.update([[1, 0, 11, 10]], [0.5], [3], now=1.0)  # 1 px/s to the right
+    tracker.predict(now=1.5)
+    np.testing.assert_allclose(tracker.tracks[0].box, [1.5, 0, 11.5, 10])
+
+
+def test_hold_keeps_static_tracks_alive():
+    tracker = BoxTracker(max_age=1.0, alpha=1.0, beta=1.0)
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    tracker.update([[1, 0, 11, 10]], [0.5], [3], now=1.0)
+    tracker.hold(now=1.9)
+    tracker.predict(now=2.5)
+    assert len(tracker.tracks) == 1
+    np.testing.assert_allclose(tracker.tracks[0].box, [1, 0, 11, 10])
+
+
+def test_active_tracks_need_min_hits():
+    tracker = BoxTracker(min_hits=2)
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.0)
+    assert tracker.active_tracks() == []
+    tracker.update([[0, 0, 10, 10]], [0.5], [3], now=0.1)
+    assert len(tracker.active_tracks()) == 1